@@ -1,11 +1,8 @@
 import streamlit as st
-import pandas as pd
-import joblib
+import importlib
 import os
-from datetime import datetime
-import numpy as np
-import altair as alt
 import sys # Required for dynamic path resolution
+import time
 
 # --- CRITICAL FIX: Add project root to path for local module discovery ---
 # This ensures Python can find 'database' and 'app_modules'
@@ -15,42 +12,79 @@ if PROJECT_ROOT not in sys.path:
 
 
 # --- MLOPS IMPORTS ---
-from database.database_connector import get_db
-from database.auth_manager import authenticate_user, add_new_employee, update_employee, delete_employee, get_all_employees
-from sqlalchemy.orm import Session 
-from database.models import PredictionLog, Employee 
-
-# --- IMPORT MODULED PAGES ---
-# These functions MUST exist in the app_modules folder and contain their definitions.
-from app_modules.dashboard_reports import dashboard_page
-from app_modules.prediction_utility import prediction_page
-from app_modules.admin_management import admin_management_page 
+# Only what the login page needs is imported up front. Page modules (pandas,
+# altair, ...) are imported when first opened and the model is loaded in the
+# background after login (see PAGE_MODULES and get_engine_loader below).
+from app_modules.auth_session import LOGIN_FUTURE_KEY, start_login, establish_session, current_identity, logout
+from app_modules.model_loader import MODEL_PATH, BackgroundModelLoader
 
 
 # --- CONFIGURATION & MODEL LOADING ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__)) 
-MODEL_NAME = "fraud_detection_deployment_pipeline.pkl"
-# FIX: Use the simple path construction relative to the root
-MODEL_PATH = os.path.join(BASE_DIR, "models", MODEL_NAME)
+# MODEL_PATH is shared with the batch scorer and HTTP scoring service (app_modules/model_loader.py)
+
+# Sidebar label -> (module, page function); imported on first use
+PAGE_MODULES = {
+    "📊 Performance Dashboard": ("app_modules.dashboard_reports", "dashboard_page"),
+    "🔍 Real-Time Prediction": ("app_modules.prediction_utility", "prediction_page"),
+    "🗂️ Log Explorer": ("app_modules.log_explorer", "log_explorer_page"),
+    "🔐 Admin Management": ("app_modules.admin_management", "admin_management_page"),
+}
+
+
+def _build_scoring_engine(timings: dict):
+    """Loads the active registry version, warms it up and starts following the registry (loader thread)."""
+    started = time.perf_counter()
+    from app_modules.model_registry import HotSwapEngine, get_registry
+    from app_modules.scoring_engine import ThresholdPolicy
+    from app_modules.drift_monitor import get_drift_monitor
+    from app_modules.score_cache import get_score_cache
+    from app_modules.shadow_scoring import get_shadow_scorer
+    from app_modules.velocity_store import get_velocity_store
+    timings["import_seconds"] = time.perf_counter() - started
+
+    # The registry bootstraps itself from MODEL_PATH. FRAUDPULSE_COMPILED_SCORER=1 swaps in the
+    # pure-NumPy evaluator (app_modules/compiled_model.py); otherwise pipelines are memory-mapped.
+    # The challenger (FRAUDPULSE_SHADOW_MODEL) scores the same rows in the background, and
+    # resubmitted feature vectors are answered from the score cache (FRAUDPULSE_SCORE_CACHE_*), and
+    # every scored row updates the drift sketches (FRAUDPULSE_DRIFT_*).
+    engine = HotSwapEngine(get_registry(), ThresholdPolicy.from_env(), velocity_store=get_velocity_store(),
+                           shadow=get_shadow_scorer(), score_cache=get_score_cache(),
+                           drift_monitor=get_drift_monitor("streamlit"))
+    timings["load_seconds"] = engine.swaps[-1]["load_seconds"]
+    timings["warm_up_seconds"] = engine.swaps[-1]["warm_up_seconds"]
+    return engine.start_watching() # New activations are pre-warmed and swapped in without a restart
 
 
 @st.cache_resource
-def load_model():
-    """Loads the Stacking Ensemble Pipeline with its preprocessor."""
+def get_engine_loader() -> BackgroundModelLoader:
+    """Starts loading the Stacking Ensemble Pipeline once per server process."""
+    return BackgroundModelLoader(_build_scoring_engine)
+
+
+def wait_for_engine():
+    """Returns the warmed-up scoring engine, waiting for the background load if needed."""
+    loader = get_engine_loader()
     try:
-        if not os.path.exists(MODEL_PATH):
-            st.error(f"❌ CRITICAL ERROR: Model file not found at expected path: {MODEL_PATH}")
-            st.warning("Please ensure the 'models' folder is next to app.py.")
-            st.stop()
-        
-        pipeline = joblib.load(MODEL_PATH)
-        st.sidebar.success("✅ Model Pipeline Loaded")
-        return pipeline
+        if not loader.ready():
+            with st.spinner("Loading the fraud detection model..."):
+                return loader.result()
+        return loader.result()
+    except FileNotFoundError:
+        st.error(f"❌ CRITICAL ERROR: Model file not found at expected path: {MODEL_PATH}")
+        st.warning("Please ensure the 'models' folder is next to app.py.")
+        st.stop()
     except Exception as e:
         st.error(f"❌ GENERAL ERROR loading pipeline: {e}")
         st.stop()
 
-model = load_model()
+
+def render_page(label: str):
+    module_name, function_name = PAGE_MODULES[label]
+    page_function = getattr(importlib.import_module(module_name), function_name)
+    if label == "🔍 Real-Time Prediction":
+        page_function(wait_for_engine()) # The scoring engine is passed directly to the prediction page
+    else:
+        page_function()
 
 
 # --- PAGE DEFINITIONS (Helpers) ---
@@ -62,22 +96,39 @@ def login_page():
     st.markdown("Access restricted to FraudPulse analysts and risk officers.")
     st.divider()
 
+    if st.session_state.pop('session_expired', False):
+        st.info("Your session has expired. Please log in again.")
+
+    pending = st.session_state.get(LOGIN_FUTURE_KEY)
+
     with st.form("login_form"):
         username = st.text_input("Username")
         password = st.text_input("Password", type="password")
-        submitted = st.form_submit_button("Log In")
-
-    if submitted:
-        db_generator = get_db()
-        db: Session = next(db_generator)
-        
-        user = authenticate_user(db, username, password)
-        
-        if user:
-            st.session_state['logged_in'] = True
-            st.session_state['username'] = user.username
-            st.session_state['is_admin'] = user.is_admin
-            st.session_state['user_id'] = user.id
+        submitted = st.form_submit_button("Log In", disabled=pending is not None)
+
+    if submitted and username and password:
+        # bcrypt runs on the auth thread pool; this script run only polls the future
+        st.session_state[LOGIN_FUTURE_KEY] = start_login(username, password)
+        st.rerun()
+
+    if pending is not None:
+        if not pending.done():
+            with st.spinner("Verifying credentials..."):
+                try:
+                    pending.exception(timeout=0.2)
+                except TimeoutError:
+                    pass
+            st.rerun()
+
+        st.session_state.pop(LOGIN_FUTURE_KEY, None)
+        try:
+            identity = pending.result()
+        except Exception as e:
+            st.error(f"⚠️ Login failed due to a system error: {e}")
+            return
+
+        if identity:
+            establish_session(identity)
             st.success("Login Successful! Redirecting to Dashboard...")
             st.rerun()
         else:
@@ -89,27 +140,30 @@ def login_page():
 def main():
     st.set_page_config(layout="wide", page_title="FraudPulse MLOps System")
     
-    # Initialize session state for login
-    if 'logged_in' not in st.session_state:
-        st.session_state['logged_in'] = False
-        st.session_state['is_admin'] = False
-        st.session_state['username'] = None
-    
     # 1. AUTHENTICATION GATE
-    if not st.session_state.get('logged_in'):
+    # The signed session token is checked on every rerun (HMAC only, no DB query);
+    # it also refreshes the logged_in/username/is_admin/user_id keys the pages read.
+    if current_identity() is None:
         login_page()
         return 
 
     # 2. LOGGED-IN NAVIGATION
+    loader = get_engine_loader() # First call after login starts the background model load
     st.sidebar.title(f"Welcome, {st.session_state.get('username')}")
-    st.sidebar.button("Logout", on_click=lambda: st.session_state.update(logged_in=False, username=None, is_admin=False, user_id=None))
+    st.sidebar.button("Logout", on_click=logout)
+    if loader.ready() and not loader.failed():
+        st.sidebar.success(f"✅ Model {loader.result().model_version} Loaded ({loader.timings.get('total_seconds', 0.0):.1f}s)")
+    elif loader.ready():
+        st.sidebar.error("❌ Model failed to load")
+    else:
+        st.sidebar.info("⏳ Loading model in the background...")
     
     st.title("FraudPulse: MLOps Financial Fraud Detection System")
     
     # --- RBAC: Define Available Pages ---
     is_admin = st.session_state.get('is_admin', False)
     
-    page_options = ["🔍 Real-Time Prediction"]
+    page_options = ["🔍 Real-Time Prediction", "🗂️ Log Explorer"]
     
     if is_admin:
         page_options.insert(0, "📊 Performance Dashboard")
@@ -119,17 +173,9 @@ def main():
     selected_page = st.sidebar.radio("Go to Page", page_options, key="sidebar_nav")
 
     # --- Conditional Page Rendering ---
-    
-    # FIX: The model argument is passed directly to the prediction page call
-    page_map = {
-        "📊 Performance Dashboard": dashboard_page,
-        "🔍 Real-Time Prediction": lambda: prediction_page(model), 
-        "🔐 Admin Management": admin_management_page
-    }
-
     # Render content based on the sidebar selection
-    if selected_page in page_map:
-        page_map[selected_page]()
+    if selected_page in PAGE_MODULES:
+        render_page(selected_page)
 
 
 if __name__ == "__main__":
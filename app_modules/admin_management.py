@@ -1,36 +1,37 @@
 # app_modules/admin_management.py (Complete CRUD UI Logic)
 
+import pandas as pd
 import streamlit as st
 from sqlalchemy.orm import Session
-from database.database_connector import get_db
-from database.auth_manager import add_new_employee, update_employee, delete_employee, get_all_employees
-from database.models import Employee # Needed for querying
+from database.database_connector import session_scope, pool_monitor
+from database.auth_manager import add_new_employee, update_employee, delete_employee, search_employees, bulk_add_employees
+from app_modules.auth_session import SessionIdentity, establish_session
+from app_modules.model_registry import RegistryError, get_registry
+from app_modules.score_cache import get_score_cache
 
+EMPLOYEE_PAGE_SIZES = [25, 50, 100]
+TRUE_STRINGS = {"1", "true", "yes", "y", "admin"}
 
-def admin_management_page():
-    
-    # Helper function to get current user ID and username
-    def get_current_user_db_details(db: Session):
-        username = st.session_state.get('username')
-        if username:
-            user = db.query(Employee).filter(Employee.username == username).first()
-            return user.id if user else None, username
-        return None, None
-        
-    # --- SECURITY CHECK (Role-Based Access Control) ---
-    if not st.session_state.get('logged_in') or not st.session_state.get('is_admin'):
-        st.error("🚨 Access Denied. You must be logged in as an Administrator to view this page.")
-        return
 
-    st.title("🔐 Employee Management System (CRUD)")
-    st.markdown("Administrator panel for managing user accounts and privileges (Admin vs. Standard Employee).")
-    st.divider()
+def read_employee_csv(uploaded_file) -> list[dict]:
+    """Parses an uploaded CSV with username, password and optional is_admin columns."""
+    frame = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+    frame.columns = [column.strip().lower() for column in frame.columns]
+    missing = {"username", "password"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(sorted(missing))}")
+    if "is_admin" in frame.columns:
+        frame["is_admin"] = frame["is_admin"].str.strip().str.lower().isin(TRUE_STRINGS)
+    else:
+        frame["is_admin"] = False
+    return frame[["username", "password", "is_admin"]].to_dict("records")
 
-    # --- Database Session Setup ---
-    db_generator = get_db()
-    db: Session = next(db_generator)
-    
-    current_user_db_id, current_username = get_current_user_db_details(db)
+
+def _employee_admin_panel(db: Session):
+    """Sections 1-2: create, bulk import, browse, update and delete employees."""
+    # Identity comes from the verified session token (app.py), not a per-rerun user lookup
+    current_user_db_id = st.session_state.get('user_id')
+    current_username = st.session_state.get('username')
 
 
     # --- SECTION A: CREATE (Add New Employee) ---
@@ -54,62 +55,180 @@ def admin_management_page():
             else:
                 st.warning("Please enter a valid username and password.")
     
+    # --- SECTION A.2: BULK CREATE (CSV Import) ---
+    with st.expander("Bulk Import from CSV", expanded=False):
+        st.caption("Columns: `username`, `password`, optional `is_admin` (true/false). "
+                   "Existing usernames are skipped; everything else is created in one transaction.")
+        uploaded = st.file_uploader("Employee CSV", type=["csv"], key="bulk_import_file")
+        if uploaded is not None and st.button("Import Employees", key="bulk_import_submit"):
+            try:
+                rows = read_employee_csv(uploaded)
+                with st.spinner(f"Hashing and importing {len(rows):,} accounts..."):
+                    result = bulk_add_employees(db, rows)
+            except Exception as e:
+                st.error(f"⚠️ Import failed, no accounts were created. Error: {e}")
+            else:
+                st.success(f"Created {len(result.created):,} account(s).")
+                if result.existing:
+                    st.warning(f"Skipped {len(result.existing):,} existing username(s): {', '.join(result.existing[:20])}")
+                if result.duplicates:
+                    st.warning(f"Ignored {len(result.duplicates):,} repeated row(s) in the file: {', '.join(result.duplicates[:20])}")
+                if result.invalid:
+                    st.warning(f"Ignored {len(result.invalid):,} row(s) without a username or password.")
+
     st.divider()
 
     # --- SECTION B: READ, UPDATE, DELETE (RUD Operations) ---
     st.subheader("2. Manage Existing Employees (Read, Update, Delete)")
-    
-    employees = get_all_employees(db) # READ operation
-    
-    # Display table and RUD forms dynamically
-    for employee in employees:
-        
-        # Determine if the current employee is the one logged in (cannot delete own account)
+
+    col_search, col_size = st.columns([3, 1])
+    search = col_search.text_input("Search by username", key="employee_search").strip()
+    page_size = col_size.selectbox("Rows per page", EMPLOYEE_PAGE_SIZES, index=1, key="employee_page_size")
+
+    # Cursor stack (last id of each previous page), reset whenever the search or page size changes
+    state_key = (search, page_size)
+    if st.session_state.get("employee_page_key") != state_key:
+        st.session_state["employee_page_key"] = state_key
+        st.session_state["employee_cursors"] = [0]
+    cursors = st.session_state["employee_cursors"]
+
+    employees, next_after_id = search_employees(db, search, after_id=cursors[-1], page_size=page_size) # READ operation
+
+    st.caption(f"Page {len(cursors)} · {len(employees)} employee(s)")
+    st.dataframe(
+        pd.DataFrame({
+            "ID": [employee.id for employee in employees],
+            "Username": [employee.username + (" (You)" if employee.id == current_user_db_id else "") for employee in employees],
+            "Admin": [bool(employee.is_admin) for employee in employees],
+            "Created": [employee.created_at for employee in employees],
+        }),
+        use_container_width=True, hide_index=True,
+    )
+
+    col_prev, col_next, _ = st.columns([1, 1, 4])
+    if col_prev.button("⬅️ Previous", disabled=len(cursors) == 1, key="employee_prev", use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    if col_next.button("Next ➡️", disabled=next_after_id is None, key="employee_next", use_container_width=True):
+        cursors.append(next_after_id)
+        st.rerun()
+
+    # Forms are rendered for the selected employee only, not for every row
+    by_label = {f"{employee.id} · {employee.username}": employee for employee in employees}
+    selected = st.selectbox("Select an employee to edit or delete", ["—"] + list(by_label), key="employee_selected")
+    employee = by_label.get(selected)
+
+    if employee is not None:
         is_current_user = (employee.id == current_user_db_id)
-        
-        with st.container(border=True):
-            col_id, col_user, col_admin, col_actions = st.columns([0.5, 2, 1.5, 2])
-            
-            # Read Operation (Display)
-            col_id.markdown(f"**ID:** `{employee.id}`")
-            col_user.markdown(f"**User:** `{employee.username}` {'(You)' if is_current_user else ''}")
-            col_admin.markdown(f"**Admin:** {employee.is_admin}")
-            
-            # Actions Column
-            col_actions_inner = col_actions.container()
 
+        with st.container(border=True):
             # --- UPDATE (U) ---
-            if col_actions_inner.button("Edit/Update", key=f"edit_{employee.id}", use_container_width=True):
-                st.session_state[f'edit_user_{employee.id}'] = not st.session_state.get(f'edit_user_{employee.id}', False)
-                st.rerun()
-
-            if st.session_state.get(f'edit_user_{employee.id}'):
-                with st.form(f"update_form_{employee.id}"):
-                    st.markdown(f"#### Update Details for {employee.username}")
-                    
-                    new_username_val = st.text_input("New Username", value=employee.username, key=f"new_user_{employee.id}")
-                    new_password_val = st.text_input("New Password (Leave Blank)", type="password", key=f"new_pass_{employee.id}")
-                    new_is_admin_val = st.checkbox("Is Administrator?", value=employee.is_admin, key=f"new_admin_{employee.id}")
-                    
-                    if st.form_submit_button("Save Changes"):
-                        updated_user = update_employee(db, employee.id, new_username_val, new_password_val if new_password_val else None, new_is_admin_val)
-                        if updated_user:
-                            st.success(f"User {updated_user.username} updated successfully.")
-                            st.session_state[f'edit_user_{employee.id}'] = False
-                            st.rerun()
-                        else:
-                            st.error("Error updating user.")
+            with st.form(f"update_form_{employee.id}"):
+                st.markdown(f"#### Update Details for {employee.username}")
+                
+                new_username_val = st.text_input("New Username", value=employee.username, key=f"new_user_{employee.id}")
+                new_password_val = st.text_input("New Password (Leave Blank)", type="password", key=f"new_pass_{employee.id}")
+                new_is_admin_val = st.checkbox("Is Administrator?", value=employee.is_admin, key=f"new_admin_{employee.id}")
+                
+                if st.form_submit_button("Save Changes"):
+                    updated_user = update_employee(db, employee.id, new_username_val, new_password_val if new_password_val else None, new_is_admin_val)
+                    if updated_user:
+                        if updated_user.id == current_user_db_id:
+                            # Re-issue the token so the session reflects the new name/role
+                            establish_session(SessionIdentity(updated_user.id, updated_user.username, bool(updated_user.is_admin), 0.0))
+                        st.success(f"User {updated_user.username} updated successfully.")
+                        st.rerun()
+                    else:
+                        st.error("Error updating user.")
 
             # --- DELETE (D) ---
             if not is_current_user:
-                if col_actions_inner.button("Delete User", key=f"delete_{employee.id}", use_container_width=True):
+                if st.button("Delete User", key=f"delete_{employee.id}"):
                     # Pass the current username for the security check in auth_manager.py
                     if delete_employee(db, employee.id, current_username):
                         st.success(f"User {employee.username} deleted.")
+                        st.session_state.pop("employee_selected", None)
                         st.rerun()
                     else:
                         st.error("Cannot delete an existing administrator account.")
             else:
-                col_actions_inner.markdown("**(Cannot delete active session)**")
+                st.markdown("**(Cannot delete active session)**")
+
+
+def admin_management_page():
+        
+    # --- SECURITY CHECK (Role-Based Access Control) ---
+    if not st.session_state.get('logged_in') or not st.session_state.get('is_admin'):
+        st.error("🚨 Access Denied. You must be logged in as an Administrator to view this page.")
+        return
+
+    st.title("🔐 Employee Management System (CRUD)")
+    st.markdown("Administrator panel for managing user accounts and privileges (Admin vs. Standard Employee).")
+    st.divider()
+
+    with session_scope() as db: # Closed (and rolled back on error) even when a button triggers st.rerun()
+        _employee_admin_panel(db)
+
+    st.divider()
+
+    # --- SECTION C: DATABASE CONNECTION HEALTH ---
+    st.subheader("3. Database Connection Health")
+    stats = pool_monitor.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Connection Checkouts", f"{stats['checkouts']:,}")
+    col2.metric("Checked Out Now", stats['checked_out'], help=f"Peak: {stats['peak_checked_out']}")
+    col3.metric("Mean Session Held", f"{stats['mean_session_held_ms']:.1f} ms", help=f"Max: {stats['max_session_held_ms']:.1f} ms")
+    col4.metric("Slow Sessions", stats['slow_sessions'], help=f"Held longer than {pool_monitor.leak_after_seconds:.0f}s")
+    leaks = stats['suspected_leaks']
+    if leaks['sessions'] or leaks['connections']:
+        st.warning(f"⚠️ Suspected leaks: {len(leaks['sessions'])} open session(s), {leaks['connections']} long-held connection(s).")
+        st.json(leaks)
+
+    st.divider()
 
-    db.close()
\ No newline at end of file
+    # --- SECTION D: MODEL REGISTRY ---
+    st.subheader("4. Model Registry")
+    try:
+        registry = get_registry()
+        manifests = registry.versions()
+        active = registry.active_version()
+    except (RegistryError, OSError) as e:
+        st.error(f"⚠️ Could not read the model registry. Error: {e}")
+        return
+
+    st.dataframe(
+        pd.DataFrame({
+            "Version": [manifest.version for manifest in manifests],
+            "Active": [manifest.version == active for manifest in manifests],
+            "Registered (UTC)": [manifest.created_at for manifest in manifests],
+            "SHA-256": [manifest.sha256[:12] for manifest in manifests],
+            "Features": [len(manifest.feature_schema.get("inputs", [])) for manifest in manifests],
+            "Metrics": [", ".join(f"{k}={v}" for k, v in manifest.metrics.items()) for manifest in manifests],
+        }),
+        use_container_width=True, hide_index=True,
+    )
+    col_version, col_activate = st.columns([3, 1])
+    versions = [manifest.version for manifest in manifests]
+    target = col_version.selectbox("Version to serve", versions,
+                                   index=versions.index(active) if active in versions else 0, key="registry_target")
+    if col_activate.button("Activate", disabled=target == active, use_container_width=True):
+        registry.activate(target)
+        st.success(f"✅ Activated {target}. Running servers pre-warm it and switch within a few seconds.")
+
+    st.divider()
+
+    # --- SECTION E: SCORE CACHE ---
+    st.subheader("5. Score Cache")
+    cache = get_score_cache()
+    if cache is None:
+        st.info("The score cache is disabled (FRAUDPULSE_SCORE_CACHE_ENTRIES=0).")
+        return
+    cache_stats = cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}", help=f"{cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses")
+    col2.metric("Entries", f"{cache_stats['entries']:,}", help=f"Max {cache_stats['max_entries']:,} (~{cache_stats['bytes'] / 2**20:.2f} of {cache_stats['max_bytes'] / 2**20:.1f} MB)")
+    col3.metric("Evictions", f"{cache_stats['evictions']:,}", help=f"Expired after {cache_stats['ttl_seconds']:.0f}s: {cache_stats['expirations']:,}")
+    col4.metric("Invalidations", f"{cache_stats['invalidations']:,}", help="Full clears (model swaps and manual clears)")
+    if st.button("Clear Score Cache"):
+        cache.clear()
+        st.success("✅ Score cache cleared.")
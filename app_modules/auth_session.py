@@ -0,0 +1,141 @@
+# app_modules/auth_session.py (Login Verification & Signed Session Tokens)
+"""Authentication layer for the Streamlit UI.
+
+Password checks (bcrypt, deliberately slow) run on a small shared thread pool
+via `start_login()`, so the script thread only polls a future and the login
+form stays responsive. A successful login yields a signed, expiring session
+token that carries the user's id, name and role; every rerun verifies the
+token with an HMAC (microseconds, no database query) instead of re-reading
+the Employee row.
+
+Configuration:
+    FRAUDPULSE_SESSION_SECRET       HMAC key (default: random per process, so
+                                    tokens do not survive a server restart)
+    FRAUDPULSE_SESSION_TTL_MINUTES  token lifetime (default 480)
+    FRAUDPULSE_AUTH_WORKERS         concurrent bcrypt checks (default 2)
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
+
+import streamlit as st
+
+from database.auth_manager import authenticate_user
+from database.database_connector import session_scope
+
+
+# --- CONFIGURATION ---
+SESSION_SECRET_ENV_VAR = "FRAUDPULSE_SESSION_SECRET"
+SESSION_TTL_ENV_VAR = "FRAUDPULSE_SESSION_TTL_MINUTES"
+AUTH_WORKERS_ENV_VAR = "FRAUDPULSE_AUTH_WORKERS"
+DEFAULT_SESSION_TTL_MINUTES = 480
+DEFAULT_AUTH_WORKERS = 2
+
+TOKEN_KEY = "session_token"
+LOGIN_FUTURE_KEY = "login_future"
+
+_SECRET = (os.environ.get(SESSION_SECRET_ENV_VAR) or secrets.token_hex(32)).encode("utf-8")
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get(AUTH_WORKERS_ENV_VAR, DEFAULT_AUTH_WORKERS)),
+                               thread_name_prefix="auth")
+
+
+class SessionIdentity(NamedTuple):
+    """Who is logged in, as recorded in a verified session token."""
+    user_id: int
+    username: str
+    is_admin: bool
+    expires_at: float  # Unix time
+
+
+# --- TOKENS ---
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_SECRET, payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_token(user_id: int, username: str, is_admin: bool, ttl_minutes: float | None = None) -> str:
+    """Returns '<payload>.<signature>' for the given identity."""
+    ttl = float(ttl_minutes if ttl_minutes is not None
+                else os.environ.get(SESSION_TTL_ENV_VAR, DEFAULT_SESSION_TTL_MINUTES))
+    claims = {"uid": int(user_id), "sub": username, "adm": bool(is_admin), "exp": time.time() + ttl * 60}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token: str | None) -> SessionIdentity | None:
+    """Identity from a token, or None if it is missing, tampered with or expired."""
+    if not token or "." not in token:
+        return None
+    payload, signature = token.rsplit(".", 1)
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+        identity = SessionIdentity(int(claims["uid"]), str(claims["sub"]), bool(claims["adm"]), float(claims["exp"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+    return identity if identity.expires_at > time.time() else None
+
+
+# --- LOGIN / SESSION STATE ---
+
+def _verify_credentials(username: str, password: str) -> SessionIdentity | None:
+    """Runs on the auth pool: bcrypt check (and rehash) with its own DB session."""
+    with session_scope() as db:
+        user = authenticate_user(db, username, password)
+        if user is None:
+            return None
+        return SessionIdentity(user.id, user.username, bool(user.is_admin), 0.0)  # Expiry set when the token is issued
+
+
+def start_login(username: str, password: str) -> Future:
+    """Queues a credential check; the future resolves to a SessionIdentity or None."""
+    return _executor.submit(_verify_credentials, username, password)
+
+
+def establish_session(identity: SessionIdentity):
+    """Issues a fresh token for `identity` and mirrors it into the legacy session keys."""
+    token = issue_token(identity.user_id, identity.username, identity.is_admin)
+    st.session_state[TOKEN_KEY] = token
+    _mirror_identity(verify_token(token))
+
+
+def _mirror_identity(identity: SessionIdentity | None):
+    # Pages read these keys directly; they are derived from the token, never trusted on their own.
+    st.session_state.update(
+        logged_in=identity is not None,
+        username=identity.username if identity else None,
+        is_admin=identity.is_admin if identity else False,
+        user_id=identity.user_id if identity else None,
+    )
+
+
+def current_identity() -> SessionIdentity | None:
+    """Verifies this session's token (no database access); clears the session if invalid."""
+    identity = verify_token(st.session_state.get(TOKEN_KEY))
+    if identity is None and st.session_state.get(TOKEN_KEY):
+        st.session_state.pop(TOKEN_KEY, None)
+        st.session_state["session_expired"] = True
+    _mirror_identity(identity)
+    return identity
+
+
+def logout():
+    st.session_state.pop(TOKEN_KEY, None)
+    st.session_state.pop(LOGIN_FUTURE_KEY, None)
+    _mirror_identity(None)
@@ -0,0 +1,246 @@
+# app_modules/batch_scoring.py (Headless Bulk Scoring Engine)
+"""Scores PaySim-format CSV/Parquet extracts without the Streamlit UI.
+
+Usage (from the project root):
+    python -m app_modules.batch_scoring INPUT_FILE OUTPUT_FILE [--chunksize N] [--workers N]
+                                        [--velocity-snapshot PATH]
+
+The input is read in bounded-size chunks, each chunk is feature-engineered and
+scored in a worker process (the pipeline is loaded once per worker), and the
+results are streamed to OUTPUT_FILE with the same columns as PredictionLog.
+Velocity counts (Orig_Count_1step) are taken from a VelocityStore in the parent
+process, which sees chunks in file order, before the chunk is dispatched.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+# --- Add project root to path so 'database' and 'app_modules' resolve when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.model_loader import load_pipeline, serving_mmap_mode
+from app_modules.model_registry import get_registry
+from app_modules.scoring_engine import ScoringEngine, ThresholdPolicy
+from app_modules.velocity_store import VelocityStore
+from database.log_writer import LOGGED_INPUT_COLUMNS
+from database.models import PredictionLog
+
+
+# --- CONFIGURATION ---
+DEFAULT_CHUNKSIZE = 100_000
+
+# Output schema mirrors the prediction_logs table (minus the autoincrement key)
+OUTPUT_COLUMNS = [column.name for column in PredictionLog.__table__.columns if column.name != "id"]
+
+# Explicit dtypes keep chunk memory predictable (no object inference on numeric columns)
+RAW_DTYPES = {
+    "step": "int32",
+    "type": "object",
+    "amount": "float64",
+    "nameOrig": "object",
+    "oldbalanceOrg": "float64",
+    "newbalanceOrig": "float64",
+    "nameDest": "object",
+    "oldbalanceDest": "float64",
+    "newbalanceDest": "float64",
+}
+
+
+# --- WORKER PROCESS STATE ---
+# Each worker loads the pipeline exactly once (ProcessPoolExecutor initializer).
+_worker_engine = None
+
+
+def _limit_estimator_threads(pipeline):
+    """Pins nested estimators to one thread; parallelism comes from the process pool."""
+    n_jobs_params = {name: 1 for name in pipeline.get_params(deep=True) if name.endswith("n_jobs")}
+    if n_jobs_params:
+        pipeline.set_params(**n_jobs_params)
+    return pipeline
+
+
+def resolve_model(model_path: str | None = None) -> tuple[str, str]:
+    """(artifact path, model version): the registry's active version, or the version of `model_path`."""
+    registry = get_registry()
+    if model_path is None:
+        version = registry.active_version()
+        return registry.artifact_path(version), version
+    return model_path, registry.version_for_file(model_path) or os.path.basename(model_path)
+
+
+def _build_engine(model_path: str, model_version: str) -> ScoringEngine:
+    # Velocity counts arrive precomputed from the parent, so workers get no store.
+    # The memory-mapped artifact lets all workers share one copy of the model's arrays.
+    pipeline = load_pipeline(model_path, mmap_mode=serving_mmap_mode())
+    return ScoringEngine(_limit_estimator_threads(pipeline), ThresholdPolicy.from_env(), model_version=model_version)
+
+
+def _init_worker(model_path: str, model_version: str):
+    global _worker_engine
+    _worker_engine = _build_engine(model_path, model_version)
+
+
+def score_chunk(chunk: pd.DataFrame, engine: ScoringEngine | None = None) -> pd.DataFrame:
+    """Feature-engineers and scores one chunk, returning rows shaped like PredictionLog."""
+    engine = engine if engine is not None else _worker_engine
+    result = engine.score(chunk)
+
+    return pd.DataFrame({
+        **{column: chunk[field].to_numpy() for field, column in LOGGED_INPUT_COLUMNS.items()},
+        "risk_score": result.risk_score,
+        "predicted_class": result.predicted_class,
+        "model_version": result.model_version,
+        "timestamp": datetime.utcnow(),  # Naive UTC, like every prediction_logs writer
+    }, columns=OUTPUT_COLUMNS)
+
+
+# --- INPUT / OUTPUT STREAMING ---
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def iter_chunks(input_path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Yields DataFrames of at most `chunksize` rows from a CSV or Parquet file."""
+    if _is_parquet(input_path):
+        import pyarrow.parquet as pq  # Optional dependency, only needed for Parquet input
+
+        parquet_file = pq.ParquetFile(input_path)
+        columns = [name for name in RAW_DTYPES if name in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            input_path,
+            usecols=lambda name: name in RAW_DTYPES,
+            dtype=RAW_DTYPES,
+            chunksize=chunksize,
+        )
+
+
+class ResultWriter:
+    """Appends scored chunks to a CSV or Parquet file without holding earlier chunks in memory."""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.rows_written = 0
+        self._parquet_writer = None
+
+    def write(self, scored: pd.DataFrame):
+        if _is_parquet(self.output_path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(scored, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            scored.to_csv(
+                self.output_path,
+                mode="w" if self.rows_written == 0 else "a",
+                header=self.rows_written == 0,
+                index=False,
+            )
+        self.rows_written += len(scored)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+# --- ORCHESTRATION ---
+
+def _with_velocity(chunks, velocity_store: VelocityStore):
+    """Fills Orig_Count_1step for each chunk from the (parent-process) velocity store."""
+    for chunk in chunks:
+        chunk["Orig_Count_1step"] = velocity_store.record_batch(chunk["nameOrig"], chunk["step"])
+        yield chunk
+
+
+def run_batch_scoring(input_path: str, output_path: str, model_path: str | None = None,
+                      chunksize: int = DEFAULT_CHUNKSIZE, workers: int | None = None,
+                      velocity_store: VelocityStore | None = None, verbose: bool = True) -> dict:
+    """Scores `input_path` chunk by chunk and streams results to `output_path`.
+
+    At most `2 * workers` chunks are in flight at any time, so memory stays flat
+    regardless of the input size. Output order matches input order. The model
+    version is resolved once, so the whole run is scored by a single version.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    model_path, model_version = resolve_model(model_path)
+    velocity_store = velocity_store if velocity_store is not None else VelocityStore()
+    chunks = _with_velocity(iter_chunks(input_path, chunksize), velocity_store)
+    writer = ResultWriter(output_path)
+    start = time.perf_counter()
+
+    def _report(scored):
+        writer.write(scored)
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"  scored {writer.rows_written:,} rows ({writer.rows_written / elapsed:,.0f} rows/s)")
+
+    try:
+        if workers == 0:
+            # In-process mode (no pool), useful for small files and debugging
+            engine = _build_engine(model_path, model_version)
+            for chunk in chunks:
+                _report(score_chunk(chunk, engine))
+        else:
+            max_in_flight = 2 * workers
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_path, model_version)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk))
+                    if len(pending) >= max_in_flight:
+                        _report(pending.popleft().result())
+                while pending:
+                    _report(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": writer.rows_written,
+        "seconds": elapsed,
+        "rows_per_second": writer.rows_written / elapsed if elapsed > 0 else 0.0,
+    }
+    if verbose:
+        print(f"✅ Scored {summary['rows']:,} rows with model {model_version} in {elapsed:.2f}s "
+              f"({summary['rows_per_second']:,.0f} rows/s) -> {output_path}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse headless bulk scorer")
+    parser.add_argument("input_path", help="PaySim-format CSV or Parquet file")
+    parser.add_argument("output_path", help="Destination CSV or Parquet file")
+    parser.add_argument("--model-path", default=None,
+                        help="Pipeline file to use (default: the registry's active version)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count, 0 = score in-process)")
+    parser.add_argument("--velocity-snapshot", default=None,
+                        help="Warm-start velocity counts from this .npz and save them back afterwards")
+    args = parser.parse_args(argv)
+
+    velocity_store = VelocityStore.load(args.velocity_snapshot) if args.velocity_snapshot else None
+    run_batch_scoring(args.input_path, args.output_path, model_path=args.model_path,
+                      chunksize=args.chunksize, workers=args.workers, velocity_store=velocity_store)
+    if velocity_store is not None:
+        velocity_store.snapshot()
+
+
+if __name__ == "__main__":
+    main()
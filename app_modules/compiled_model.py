@@ -0,0 +1,497 @@
+# app_modules/compiled_model.py (Compiled NumPy Evaluator)
+"""Flattens the fitted deployment pipeline into plain arrays and scores with NumPy only.
+
+Usage (from the project root):
+    python -m app_modules.compiled_model export [--model-path PKL] [--output NPZ]
+
+Supported pipeline pieces:
+    - ColumnTransformer with StandardScaler / OneHotEncoder (handle_unknown='ignore', drop) blocks
+    - XGBClassifier (binary:logistic), RandomForestClassifier, LogisticRegression
+    - StackingClassifier over those, with a LogisticRegression meta-learner
+
+Trees are stored as concatenated node arrays (feature, threshold, left, right,
+default_left, value) where leaves point to themselves, so all trees advance one
+level per vectorized step. Outputs match the original pipeline within
+PARITY_TOLERANCE, which `export_pipeline` checks before writing.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+# --- Add project root to path so 'app_modules' resolves when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.features import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+from app_modules.model_loader import MODEL_PATH, load_pipeline, serving_mmap_mode
+
+
+# --- CONFIGURATION ---
+PARITY_TOLERANCE = 1e-5  # Max absolute difference in fraud probability vs. the sklearn pipeline
+COMPILED_SUFFIX = ".compiled.npz"
+COMPILED_SCORER_ENV_VAR = "FRAUDPULSE_COMPILED_SCORER"  # "1" = serve from the compiled artifact
+
+
+class UnsupportedModelError(TypeError):
+    """Raised when the pipeline contains a component the compiler cannot flatten."""
+
+
+def compiled_path_for(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + COMPILED_SUFFIX
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sigmoid(margin: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-margin))
+
+
+# --- EXPORT: PREPROCESSING ---
+
+def _export_preprocessor(preprocessor, arrays: dict) -> list[dict]:
+    """Describes each ColumnTransformer block; parameters go into `arrays`."""
+    blocks = []
+    for index, (name, transformer, columns) in enumerate(preprocessor.transformers_):
+        if isinstance(transformer, str):
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            raise UnsupportedModelError(f"Unsupported transformer '{name}': {transformer}")
+        kind = type(transformer).__name__
+        prefix = f"pre{index}"
+        if kind == "StandardScaler":
+            n = len(columns)
+            arrays[f"{prefix}_mean"] = transformer.mean_ if transformer.with_mean else np.zeros(n)
+            arrays[f"{prefix}_scale"] = transformer.scale_ if transformer.with_std else np.ones(n)
+            blocks.append({"kind": "scale", "prefix": prefix, "columns": list(columns)})
+        elif kind == "OneHotEncoder":
+            if transformer.handle_unknown not in ("ignore", "infrequent_if_exist", "error"):
+                raise UnsupportedModelError(f"OneHotEncoder handle_unknown={transformer.handle_unknown}")
+            drop_idx = transformer.drop_idx_
+            for position, column in enumerate(columns):
+                categories = [str(c) for c in transformer.categories_[position]]
+                dropped = None if drop_idx is None or drop_idx[position] is None else int(drop_idx[position])
+                kept = [c for i, c in enumerate(categories) if i != dropped]
+                blocks.append({"kind": "onehot", "columns": [column], "categories": kept})
+        else:
+            raise UnsupportedModelError(f"Unsupported transformer '{name}': {kind}")
+    return blocks
+
+
+# --- EXPORT: TREES ---
+
+def _pack_trees(trees: list[dict], strict_less: bool, input_dtype: str) -> dict:
+    """Concatenates per-tree node arrays into one forest with absolute child indices."""
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for tree in trees:
+        n = len(tree["left"])
+        is_leaf = tree["left"] < 0
+        node_ids = np.arange(n) + offset
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree["feature"]))
+        threshold.append(np.where(is_leaf, 0.0, tree["threshold"]))
+        left.append(np.where(is_leaf, node_ids, tree["left"] + offset))
+        right.append(np.where(is_leaf, node_ids, tree["right"] + offset))
+        default_left.append(tree["default_left"].astype(bool))
+        value.append(tree["value"])
+        max_depth = max(max_depth, _tree_depth(tree["left"], tree["right"]))
+        offset += n
+    return {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(input_dtype),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "default_left": np.concatenate(default_left),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "meta": {"strict_less": strict_less, "max_depth": max_depth, "input_dtype": input_dtype},
+    }
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth, frontier = 0, [0]
+    while frontier:
+        children = [c for node in frontier for c in (left[node], right[node]) if c >= 0]
+        if not children:
+            break
+        depth, frontier = depth + 1, children
+    return depth
+
+
+def _export_xgboost(model) -> dict:
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise UnsupportedModelError(f"XGBoost objective '{objective}' is not supported")
+
+    trees_json = learner["gradient_booster"]["model"]["trees"]
+    try:
+        # Early-stopped models predict with the best iteration only
+        n_trees = (model.best_iteration + 1) * max(1, int(model.get_params().get("num_parallel_tree") or 1))
+        trees_json = trees_json[:n_trees]
+    except AttributeError:
+        pass
+
+    trees = []
+    for tree in trees_json:
+        if any(tree.get("split_type", [0])):
+            raise UnsupportedModelError("Categorical XGBoost splits are not supported")
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        trees.append({
+            "left": left,
+            "right": np.asarray(tree["right_children"], dtype=np.int64),
+            "feature": np.asarray(tree["split_indices"], dtype=np.int64),
+            "threshold": np.asarray(tree["split_conditions"], dtype=np.float32),
+            "default_left": np.asarray(tree["default_left"], dtype=bool),
+            # Leaf weights are stored in split_conditions for leaf nodes
+            "value": np.where(left < 0, np.asarray(tree["split_conditions"], dtype=np.float32), 0.0),
+        })
+
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    forest = _pack_trees(trees, strict_less=True, input_dtype="float32")
+    forest["meta"].update({"kind": "xgboost", "base_margin": float(np.log(base_score / (1.0 - base_score)))})
+    return forest
+
+
+def _export_random_forest(model) -> dict:
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        counts = tree.value[:, 0, :]
+        totals = counts.sum(axis=1, keepdims=True)
+        proba = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        trees.append({
+            "left": tree.children_left.astype(np.int64),
+            "right": tree.children_right.astype(np.int64),
+            "feature": tree.feature.astype(np.int64),
+            "threshold": tree.threshold,
+            "default_left": np.asarray(missing_left, dtype=bool),
+            "value": proba[:, list(model.classes_).index(1)],
+        })
+    forest = _pack_trees(trees, strict_less=False, input_dtype="float64")
+    forest["meta"].update({"kind": "random_forest"})
+    return forest
+
+
+def _export_estimator(model, prefix: str, arrays: dict) -> dict:
+    """Stores `model` parameters under `prefix` and returns its structural spec."""
+    kind = type(model).__name__
+    if kind == "XGBClassifier":
+        forest = _export_xgboost(model)
+    elif kind == "RandomForestClassifier":
+        forest = _export_random_forest(model)
+    elif kind == "LogisticRegression":
+        if model.coef_.shape[0] != 1:
+            raise UnsupportedModelError("Only binary LogisticRegression is supported")
+        arrays[f"{prefix}_coef"] = model.coef_[0].astype(np.float64)
+        arrays[f"{prefix}_intercept"] = np.asarray(model.intercept_[:1], dtype=np.float64)
+        return {"kind": "logistic", "prefix": prefix}
+    elif kind == "StackingClassifier":
+        if any(method not in ("predict_proba", "decision_function") for method in model.stack_method_):
+            raise UnsupportedModelError(f"Unsupported stack methods: {model.stack_method_}")
+        bases = [
+            dict(_export_estimator(estimator, f"{prefix}_base{i}", arrays), stack_method=method)
+            for i, (estimator, method) in enumerate(zip(model.estimators_, model.stack_method_))
+            if estimator != "drop"
+        ]
+        final = _export_estimator(model.final_estimator_, f"{prefix}_final", arrays)
+        return {"kind": "stacking", "bases": bases, "final": final, "passthrough": bool(model.passthrough)}
+    else:
+        raise UnsupportedModelError(f"Unsupported classifier: {kind}")
+
+    meta = forest.pop("meta")
+    for key, array in forest.items():
+        arrays[f"{prefix}_{key}"] = array
+    return dict(meta, prefix=prefix)
+
+
+# --- EVALUATION ---
+
+def _eval_forest(spec: dict, arrays: dict, X: np.ndarray) -> np.ndarray:
+    """Returns the summed leaf values of every tree for each row of X."""
+    p = spec["prefix"]
+    feature, threshold = arrays[f"{p}_feature"], arrays[f"{p}_threshold"]
+    left, right, default_left = arrays[f"{p}_left"], arrays[f"{p}_right"], arrays[f"{p}_default_left"]
+    X = X.astype(spec["input_dtype"], copy=False)
+
+    rows = np.arange(X.shape[0])[:, None]
+    nodes = np.broadcast_to(arrays[f"{p}_roots"], (X.shape[0], len(arrays[f"{p}_roots"])))
+    for _ in range(spec["max_depth"]):
+        x = X[rows, feature[nodes]]
+        go_left = x < threshold[nodes] if spec["strict_less"] else x <= threshold[nodes]
+        go_left = np.where(np.isnan(x), default_left[nodes], go_left)
+        nodes = np.where(go_left, left[nodes], right[nodes])
+    return arrays[f"{p}_value"][nodes].sum(axis=1)
+
+
+def _eval_estimator(spec: dict, arrays: dict, X: np.ndarray, output: str = "proba") -> np.ndarray:
+    """Class-1 probability (or margin, for `output='margin'`) of an exported estimator."""
+    kind = spec["kind"]
+    if kind == "xgboost":
+        # XGBoost accumulates leaf weights in float32
+        margin = _eval_forest(spec, arrays, X).astype(np.float32) + np.float32(spec["base_margin"])
+        return margin.astype(np.float64) if output == "margin" else _sigmoid(margin.astype(np.float64))
+    if kind == "random_forest":
+        proba = _eval_forest(spec, arrays, X) / len(arrays[f"{spec['prefix']}_roots"])
+        return proba
+    if kind == "logistic":
+        margin = X @ arrays[f"{spec['prefix']}_coef"] + arrays[f"{spec['prefix']}_intercept"][0]
+        return margin if output == "margin" else _sigmoid(margin)
+    if kind == "stacking":
+        stacked = np.column_stack([
+            _eval_estimator(base, arrays, X,
+                            output="margin" if base["stack_method"] == "decision_function" else "proba")
+            for base in spec["bases"]
+        ])
+        if spec["passthrough"]:
+            stacked = np.hstack([stacked, X])
+        return _eval_estimator(spec["final"], arrays, stacked, output)
+    raise UnsupportedModelError(f"Unknown compiled estimator kind: {kind}")
+
+
+class CompiledPipeline:
+    """Pure-NumPy scorer built from an exported pipeline.
+
+    Exposes `feature_names_in_` and `predict_proba(frame)` like the sklearn
+    pipeline, so it can be dropped into ScoringEngine, plus
+    `predict_proba_record(features)` for a single dict without any DataFrame.
+    """
+
+    def __init__(self, spec: dict, arrays: dict):
+        self.spec = spec
+        self.arrays = arrays
+        self.feature_names_in_ = np.asarray(spec["feature_names_in"], dtype=object)
+        self.n_features_out = spec["n_features_out"]
+        self.source_sha256 = spec.get("source_sha256")
+        self._blocks = spec["preprocessor"]
+        for block in self._blocks:
+            if block["kind"] == "onehot":
+                block["lookup"] = {category: i for i, category in enumerate(block["categories"])}
+        self._numeric_plan = self._plan_numeric_path()
+
+    def _plan_numeric_path(self):
+        """(positions, indices, mean, scale, onehot blocks) for `predict_proba_numeric`, or None if unsupported."""
+        positions, indices, means, scales, onehots = [], [], [], [], []
+        position = 0
+        for block in self._blocks:
+            if block["kind"] == "scale":
+                if not set(block["columns"]) <= set(NUMERIC_FEATURES):
+                    return None
+                width = len(block["columns"])
+                positions.extend(range(position, position + width))
+                indices.extend(NUMERIC_FEATURES.index(c) for c in block["columns"])
+                means.append(self.arrays[f"{block['prefix']}_mean"])
+                scales.append(self.arrays[f"{block['prefix']}_scale"])
+            else:
+                if block["columns"] != CATEGORICAL_FEATURES:
+                    return None
+                width = len(block["categories"])
+                onehots.append((position, block["lookup"]))
+            position += width
+        return (np.asarray(positions, dtype=np.intp), np.asarray(indices, dtype=np.intp),
+                np.concatenate(means) if means else np.zeros(0), np.concatenate(scales) if scales else np.ones(0),
+                onehots)
+
+    # --- Construction / persistence ---
+
+    @classmethod
+    def from_pipeline(cls, pipeline, source_sha256: str | None = None) -> "CompiledPipeline":
+        spec, arrays = export_arrays(pipeline)
+        spec["source_sha256"] = source_sha256
+        return cls(spec, arrays)
+
+    def save(self, path: str):
+        spec = {k: v for k, v in self.spec.items()}
+        spec["preprocessor"] = [{k: v for k, v in b.items() if k != "lookup"} for b in self._blocks]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as handle:
+            np.savez(handle, __spec__=np.asarray(json.dumps(spec)), **self.arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledPipeline":
+        with np.load(path, allow_pickle=False) as data:
+            spec = json.loads(str(data["__spec__"]))
+            arrays = {key: data[key] for key in data.files if key != "__spec__"}
+        return cls(spec, arrays)
+
+    # --- Preprocessing ---
+
+    def transform(self, frame) -> np.ndarray:
+        """Applies the flattened ColumnTransformer to a DataFrame of engineered features."""
+        n_rows = len(frame)
+        out = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+        position = 0
+        for block in self._blocks:
+            if block["kind"] == "scale":
+                p = block["prefix"]
+                width = len(block["columns"])
+                values = frame[block["columns"]].to_numpy(dtype=np.float64)
+                out[:, position:position + width] = (values - self.arrays[f"{p}_mean"]) / self.arrays[f"{p}_scale"]
+            else:
+                width = len(block["categories"])
+                values = frame[block["columns"][0]].to_numpy().astype(str)
+                for i, category in enumerate(block["categories"]):
+                    out[:, position + i] = values == category
+            position += width
+        return out
+
+    def transform_record(self, features: dict) -> np.ndarray:
+        """Single-row transform straight from a dict of engineered features."""
+        out = np.zeros((1, self.n_features_out), dtype=np.float64)
+        position = 0
+        for block in self._blocks:
+            if block["kind"] == "scale":
+                p = block["prefix"]
+                width = len(block["columns"])
+                values = np.fromiter((features[c] for c in block["columns"]), dtype=np.float64, count=width)
+                out[0, position:position + width] = (values - self.arrays[f"{p}_mean"]) / self.arrays[f"{p}_scale"]
+            else:
+                width = len(block["categories"])
+                hit = block["lookup"].get(str(features[block["columns"][0]]))
+                if hit is not None:
+                    out[0, position + hit] = 1.0
+            position += width
+        return out
+
+    # --- Scoring ---
+
+    def predict_proba_transformed(self, X: np.ndarray) -> np.ndarray:
+        return _eval_estimator(self.spec["classifier"], self.arrays, X)
+
+    def predict_proba(self, frame) -> np.ndarray:
+        fraud = self.predict_proba_transformed(self.transform(frame))
+        return np.column_stack([1.0 - fraud, fraud])
+
+    def predict_proba_record(self, features: dict) -> float:
+        """Fraud probability for one dict of engineered features."""
+        return float(self.predict_proba_transformed(self.transform_record(features))[0])
+
+    @property
+    def supports_numeric_path(self) -> bool:
+        return self._numeric_plan is not None
+
+    def predict_proba_numeric(self, transaction_type: str, numeric: np.ndarray) -> float:
+        """Fraud probability from `features.engineer_record` output (no dict lookups, no DataFrame)."""
+        positions, indices, mean, scale, onehots = self._numeric_plan
+        out = np.zeros((1, self.n_features_out), dtype=np.float64)
+        out[0, positions] = (numeric[indices] - mean) / scale
+        for position, lookup in onehots:
+            hit = lookup.get(transaction_type)
+            if hit is not None:
+                out[0, position + hit] = 1.0
+        return float(self.predict_proba_transformed(out)[0])
+
+
+def export_arrays(pipeline) -> tuple[dict, dict]:
+    """Flattens a fitted (preprocessor, classifier) pipeline into a JSON spec and named arrays."""
+    if len(pipeline.steps) != 2:
+        raise UnsupportedModelError("Expected a two-step (preprocessor, classifier) pipeline")
+    preprocessor, classifier = pipeline.steps[0][1], pipeline.steps[1][1]
+
+    arrays = {}
+    blocks = _export_preprocessor(preprocessor, arrays)
+    n_features_out = sum(len(b["columns"]) if b["kind"] == "scale" else len(b["categories"]) for b in blocks)
+    spec = {
+        "feature_names_in": [str(name) for name in pipeline.feature_names_in_],
+        "preprocessor": blocks,
+        "n_features_out": n_features_out,
+        "classifier": _export_estimator(classifier, "clf", arrays),
+    }
+    return spec, arrays
+
+
+# --- PARITY CHECK ---
+
+def parity_sample(n_rows: int = 2000, seed: int = 7):
+    """Deterministic PaySim-like engineered-feature frame used for parity checks."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    amount = rng.lognormal(10, 2, n_rows)
+    old_orig = rng.lognormal(10, 2.5, n_rows) * (rng.random(n_rows) > 0.3)
+    new_orig = np.maximum(old_orig - amount, 0) * (rng.random(n_rows) > 0.2)
+    old_dest = rng.lognormal(10, 2.5, n_rows) * (rng.random(n_rows) > 0.4)
+    new_dest = old_dest + amount * (rng.random(n_rows) > 0.3)
+    return pd.DataFrame({
+        "type": rng.choice(["CASH_IN", "CASH_OUT", "DEBIT", "PAYMENT", "TRANSFER"], n_rows),
+        "amount": amount,
+        "oldbalanceOrg": old_orig,
+        "newbalanceOrig": new_orig,
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": new_dest,
+        "balanceDiffOrig": old_orig - new_orig,
+        "balanceDiffDest": new_dest - old_dest,
+        "is_merchant": rng.integers(0, 2, n_rows),
+        "Orig_Count_1step": rng.poisson(0.3, n_rows),
+    })
+
+
+def check_parity(pipeline, compiled: CompiledPipeline, frame=None) -> float:
+    """Returns the max |p_sklearn - p_compiled| and raises if it exceeds PARITY_TOLERANCE."""
+    frame = parity_sample() if frame is None else frame
+    frame = frame[list(pipeline.feature_names_in_)]
+    expected = pipeline.predict_proba(frame)[:, 1]
+    actual = compiled.predict_proba(frame)[:, 1]
+    max_error = float(np.max(np.abs(expected - actual)))
+    if max_error > PARITY_TOLERANCE:
+        raise AssertionError(f"Compiled model deviates by {max_error:.3g} (> {PARITY_TOLERANCE:g})")
+    return max_error
+
+
+def export_pipeline(model_path: str = MODEL_PATH, output_path: str | None = None) -> CompiledPipeline:
+    """Compiles the pickle at `model_path`, verifies parity and writes the .npz artifact."""
+    output_path = output_path or compiled_path_for(model_path)
+    pipeline = load_pipeline(model_path)
+    compiled = CompiledPipeline.from_pipeline(pipeline, source_sha256=_file_sha256(model_path))
+    max_error = check_parity(pipeline, compiled)
+    compiled.save(output_path)
+    print(f"✅ Compiled model written to {output_path} (max parity error {max_error:.2e})")
+    return compiled
+
+
+def load_compiled(model_path: str = MODEL_PATH) -> CompiledPipeline:
+    """Loads the compiled artifact for `model_path`, recompiling it if missing or stale."""
+    output_path = compiled_path_for(model_path)
+    if os.path.exists(output_path):
+        compiled = CompiledPipeline.load(output_path)
+        if compiled.source_sha256 == _file_sha256(model_path):
+            return compiled
+    return export_pipeline(model_path, output_path)
+
+
+def load_for_serving(model_path: str = MODEL_PATH):
+    """Compiled evaluator when FRAUDPULSE_COMPILED_SCORER=1, otherwise the (memory-mapped) sklearn pipeline."""
+    if os.environ.get(COMPILED_SCORER_ENV_VAR) == "1":
+        return load_compiled(model_path)
+    return load_pipeline(model_path, mmap_mode=serving_mmap_mode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse pipeline compiler")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Flatten the pipeline into a .npz artifact")
+    export_parser.add_argument("--model-path", default=MODEL_PATH)
+    export_parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_pipeline(args.model_path, args.output)
+
+
+if __name__ == "__main__":
+    main()
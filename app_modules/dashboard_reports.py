@@ -1,33 +1,66 @@
 # app_modules/dashboard_reports.py
 
+import datetime
+
 import streamlit as st
 import pandas as pd
 import altair as alt
-from sqlalchemy.orm import Session
 # FIX: Corrected import to reference external database package
-from database.database_connector import get_db
-from database.models import PredictionLog # For retrieving log data
+from database.database_connector import session_scope
 from database.models import Employee # Ensure Employee model is available if needed
+from database.rollups import refresh_rollups, get_high_water_mark, get_kpi_summary, get_type_breakdown
+from database.timeseries import TimeSeries, align, choose_bucket, get_time_series
+from database.schema import ensure_schema
+from database.log_queries import fetch_log_page, format_log_frame
+from app_modules.shadow_scoring import get_shadow_scorer
+from app_modules.explanations import get_explainer, global_importance, reference_features
+from app_modules.model_registry import get_registry
+from app_modules.drift_monitor import drift_report, get_drift_monitor, get_reference, load_merged_state
+from app_modules.features import TRANSACTION_TYPES
 
 
-# --- Data for Part A: Original Dataset Analysis (Simulated) ---
-NUMERICAL_SUMMARY_DATA = {
-    'Metric': ['Count', 'Mean', 'Std Dev', 'Min', '25%', '50% (Median)', '75%', 'Max'],
-    'Amount': [6362620, 179861, 603858, 0, 13389, 74871, 208721, 92445516],
-    'Old Balance Org': [6362620, 83387, 862410, 0, 0, 14208, 107315, 59585040],
-    'New Balance Dest': [6362620, 119991, 600670, 0, 0, 14660, 292837, 356015889]
+# Time-series ranges offered on the dashboard (bucket size follows from the range)
+TIME_RANGES = {
+    "Last hour": datetime.timedelta(hours=1),
+    "Last 24 hours": datetime.timedelta(days=1),
+    "Last 7 days": datetime.timedelta(days=7),
+    "Last 30 days": datetime.timedelta(days=30),
+    "Last 365 days": datetime.timedelta(days=365),
 }
-DF_DESCRIBE = pd.DataFrame(NUMERICAL_SUMMARY_DATA).set_index('Metric')
 
-# Data for Visualizations (Simulated from confirmed EDA insights)
-VOLUME_DATA = pd.DataFrame({
-    'Transaction Type': ['PAYMENT', 'CASH_OUT', 'CASH_IN', 'TRANSFER', 'DEBIT'],
-    'Volume (Millions)': [2.15, 2.23, 1.40, 0.53, 0.17]
-})
-FEATURE_IMPORTANCE_DATA = pd.DataFrame({
-    'Feature': ['balanceDiffOrig', 'Orig_Count_1step', 'is_merchant', 'amount'],
-    'Importance Score': [0.45, 0.25, 0.15, 0.10] 
-}).sort_values(by='Importance Score', ascending=False)
+
+# --- LIVE KPI HELPERS (served from the hourly rollup tables) ---
+
+def sync_rollups() -> int:
+    """Folds any new prediction_logs rows into the rollups and returns the high-water mark."""
+    ensure_schema()
+    with session_scope(commit=True) as db:
+        refresh_rollups(db)
+        return get_high_water_mark(db)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_live_kpis(high_water_mark: int) -> dict:
+    """KPI frames for a given rollup high-water mark (the argument is the cache key)."""
+    with session_scope() as db:
+        return {
+            "summary": get_kpi_summary(db),
+            "by_type": get_type_breakdown(db),
+        }
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_time_series(start: datetime.datetime, end: datetime.datetime, transaction_types: tuple[str, ...] | None,
+                     high_water_mark: int) -> TimeSeries:
+    """SQL-bucketed series for a bucket-aligned range (range, bucket, types and high-water mark are the cache key)."""
+    with session_scope() as db:
+        return get_time_series(db, start, end, transaction_types)
+
+
+@st.cache_data(show_spinner="Computing feature contributions...", max_entries=2)
+def load_global_importance(model_version: str) -> pd.DataFrame:
+    """Mean |contribution| per feature for a model version over the reference sample (cached per version)."""
+    return global_importance(get_explainer(model_version), reference_features())
 
 
 # --- MAIN PAGE FUNCTION ---
@@ -44,24 +77,72 @@ def dashboard_page():
 
     # ... [Rest of the dashboard_page() function content, including charts and metrics] ...
     
-    # --- SECTION A: OPERATIONAL METRICS ---
-    st.header("1. Model Validation and Cost-Benefit")
+    # --- SECTION A: OPERATIONAL METRICS (live, from prediction_logs rollups) ---
+    st.header("1. Live Scoring KPIs")
+    try:
+        high_water_mark = sync_rollups()
+        kpis = load_live_kpis(high_water_mark)
+    except Exception as e:
+        st.error(f"⚠️ Could not load live KPIs. Error: {e}")
+        return
+    summary = kpis["summary"]
+
     col1, col2, col3 = st.columns(3)
-    
-    col1.metric("Final Precision (Correct Flags)", "89%", "44.5x Improvement vs. Legacy")
-    col2.metric("Final Recall (Fraud Catch Rate)", "80%", "Minimal Loss for Max Precision")
-    col3.metric("False Alarms (FP in Test)", "23", "Minimal Operational Overhead")
+    col1.metric("Predictions Logged", f"{summary['predictions']:,}")
+    col2.metric("Fraud-Flag Rate", f"{summary['fraud_rate']:.2%}", f"{summary['fraud_flags']:,} flagged", delta_color="off")
+    col3.metric("Mean Risk Score", f"{summary['mean_risk_score']:.4f}")
+
+    # Time series: bucketing and aggregation run in SQL, and at most DEFAULT_MAX_POINTS buckets reach the browser
+    r1, r2 = st.columns([1, 2])
+    range_label = r1.selectbox("Time Range", list(TIME_RANGES), index=1)
+    selected_types = r2.multiselect("Transaction Types", TRANSACTION_TYPES, default=TRANSACTION_TYPES)
+    span = TIME_RANGES[range_label]
+    now = datetime.datetime.utcnow()
+    _, bucket_seconds = choose_bucket(now - span, now)
+    end = align(now, bucket_seconds) + datetime.timedelta(seconds=bucket_seconds)  # Key moves once per bucket
+    transaction_types = None if set(selected_types) == set(TRANSACTION_TYPES) else tuple(sorted(selected_types))
+    try:
+        series = load_time_series(end - span, end, transaction_types, high_water_mark)
+    except Exception as e:
+        st.error(f"⚠️ Could not load the prediction time series. Error: {e}")
+        series = None
+
+    if series is not None and series.frame.empty:
+        st.info(f"No predictions logged in the selected range ({range_label.lower()}).")
+    elif series is not None:
+        x = alt.X('Bucket:T', title=f'Time (UTC, {series.bucket_label} buckets)')
+        tooltip = [alt.Tooltip('Bucket:T', format='%Y-%m-%d %H:%M'), 'Predictions', 'Fraud Flags',
+                   alt.Tooltip('Fraud Flag Rate', format='.2%'), alt.Tooltip('Mean Risk Score', format='.4f')]
+        volume_chart = alt.Chart(series.frame).mark_bar().encode(
+            x=x,
+            y=alt.Y('Predictions:Q', title='Predictions'),
+            color=alt.Color('Fraud Flag Rate:Q', scale=alt.Scale(scheme='reds')),
+            tooltip=tooltip
+        ).properties(title=f"Predictions per {series.bucket_label} ({range_label.lower()})", height=220)
+        risk_chart = alt.Chart(series.frame).transform_fold(
+            ['Mean Risk Score', 'Fraud Flag Rate'], as_=['Metric', 'Value']
+        ).mark_line(point=len(series.frame) <= 60).encode(
+            x=x,
+            y=alt.Y('Value:Q', title='Rate / Score'),
+            color=alt.Color('Metric:N', title=None),
+            tooltip=tooltip
+        ).properties(title="Mean Risk Score and Fraud-Flag Rate", height=220)
+        st.altair_chart(volume_chart, use_container_width=True)
+        st.altair_chart(risk_chart, use_container_width=True)
+        st.caption(f"{len(series.frame):,} points, aggregated in the database from "
+                   f"{'the hourly rollups' if series.source == 'rollups' else 'prediction_logs'}.")
     st.markdown("---")
 
     # --- SECTION B: ANALYTICAL VISUALIZATIONS ---
     st.header("2. Analytical Insights and Risk Scoping")
     c1, c2 = st.columns(2)
     
-    # Chart 1: Transaction Volume Distribution
-    volume_chart = alt.Chart(VOLUME_DATA).mark_bar().encode(
+    # Chart 1: Transaction Volume Distribution (scored transactions, from rollups)
+    volume_chart = alt.Chart(kpis["by_type"]).mark_bar().encode(
         x=alt.X('Transaction Type', sort='-y'),
-        y=alt.Y('Volume (Millions)', title='Volume (Millions)'),
-        tooltip=['Transaction Type', 'Volume (Millions)']
+        y=alt.Y('Predictions', title='Scored Transactions'),
+        tooltip=['Transaction Type', 'Predictions', alt.Tooltip('Fraud Flag Rate', format='.2%'),
+                 alt.Tooltip('Mean Risk Score', format='.4f')]
     ).transform_calculate(
         is_high_risk = "datum['Transaction Type'] == 'TRANSFER' || datum['Transaction Type'] == 'CASH_OUT'"
     ).encode(
@@ -75,42 +156,86 @@ def dashboard_page():
     c1.subheader("Transaction Volume")
     c1.altair_chart(volume_chart, use_container_width=True)
 
-    # Chart 3: Feature Importance
-    importance_chart = alt.Chart(FEATURE_IMPORTANCE_DATA).mark_bar(color='darkblue').encode(
-        x=alt.X('Importance Score', title='Predictive Power (Proxy)'),
-        y=alt.Y('Feature', sort='-x'),
-        tooltip=['Feature', alt.Tooltip('Importance Score', format='.2f')]
-    ).properties(title="Feature Importance in Fraud Detection").interactive()
-    
+    # Chart 3: Feature Importance (aggregated per-transaction contributions of the active model)
     st.subheader("3. Model Explainability: Feature Importance")
-    st.altair_chart(importance_chart, use_container_width=True)
+    try:
+        model_version = get_registry().active_version()
+        importance = load_global_importance(model_version)
+        importance_chart = alt.Chart(importance).mark_bar(color='darkblue').encode(
+            x=alt.X('Mean |Contribution|', title='Mean |Contribution| (log-odds)'),
+            y=alt.Y('Feature', sort='-x'),
+            tooltip=['Feature', alt.Tooltip('Mean |Contribution|', format='.3f'),
+                     alt.Tooltip('Mean Contribution', format='+.3f'), alt.Tooltip('Share', format='.1%')]
+        ).properties(title=f"Feature Importance in Fraud Detection (model {model_version})").interactive()
+        st.altair_chart(importance_chart, use_container_width=True)
+        st.caption("Mean absolute per-transaction contribution (TreeSHAP for XGBoost) over a fixed "
+                   "reference sample of synthetic PaySim transactions.")
+    except Exception as e:
+        st.warning(f"⚠️ Feature importance is unavailable for the active model: {e}")
 
 
     # --- Section 2.2: Live Prediction Log (ADBMS Read Operation) ---
     st.subheader("2.2 Recent Prediction Log (ADBMS Read Operation)")
     
     try:
-        db_generator = get_db()
-        db: Session = next(db_generator)
-        
-        # Retrieve the last 100 logged predictions for display (READ operation)
-        logs = db.query(PredictionLog).order_by(PredictionLog.timestamp.desc()).limit(100).all()
+        with session_scope() as db:
+            # Retrieve the last 100 logged predictions (first keyset page, built column-wise)
+            page = fetch_log_page(db, page_size=100)
         
-        # Convert objects to DataFrame for clean display
-        log_data = [{
-            'ID': log.id,
-            'Timestamp': log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'User': st.session_state.get('username', 'N/A'),
-            'Type': log.transaction_type,
-            'Amount': f"{log.amount:,.2f}",
-            'Risk Score': f"{log.risk_score:.4f}",
-            'Predicted': 'FRAUD' if log.predicted_class == 1 else 'SAFE',
-        } for log in logs]
-        
-        st.dataframe(log_data, use_container_width=True)
+        st.dataframe(format_log_frame(page.rows), use_container_width=True, hide_index=True)
+        st.caption("Use the 🗂️ Log Explorer page to filter and page through older predictions.")
         
     except Exception as e:
         st.error(f"⚠️ Could not load prediction logs for reporting. Error: {e}")
-    finally:
-        if 'db' in locals() and db:
-            db.close()
\ No newline at end of file
+
+
+    # --- SECTION C: PRODUCTION DRIFT (persisted sketches; never scans prediction_logs) ---
+    st.subheader("4. Production Traffic Drift")
+    try:
+        with session_scope() as db:
+            drift_state, drift_sources = load_merged_state(db, get_drift_monitor())
+        reference = get_reference()
+        if drift_state.count == 0:
+            st.info("No predictions have been sketched yet.")
+        else:
+            report = drift_report(drift_state, reference)
+            st.dataframe(report, use_container_width=True, hide_index=True, column_config={
+                "Mean": st.column_config.NumberColumn(format="%.4g"),
+                "Std": st.column_config.NumberColumn(format="%.4g"),
+                "P50": st.column_config.NumberColumn(format="%.4g"),
+                "P99": st.column_config.NumberColumn(format="%.4g"),
+                "PSI": st.column_config.NumberColumn(format="%.3f"),
+                "KS": st.column_config.NumberColumn(format="%.3f"),
+            })
+            st.caption(f"{drift_state.count:,} predictions from {', '.join(s['source'] for s in drift_sources)}. "
+                       "PSI ≥ 0.1 is worth watching, ≥ 0.25 is significant drift.")
+        if reference is None:
+            st.info("No training reference yet: run `python -m app_modules.drift_monitor reference TRAINING_FILE` "
+                    "to enable PSI/KS.")
+        else:
+            st.caption(f"Reference: `{reference.data['source']}` ({reference.data['rows']:,} rows, "
+                       f"model {reference.data['model_version']}).")
+    except Exception as e:
+        st.warning(f"⚠️ Could not load drift sketches. Error: {e}")
+
+
+    # --- SECTION D: CHAMPION VS. CHALLENGER (shadow scoring, running statistics) ---
+    st.subheader("5. Champion vs. Challenger (Shadow Scoring)")
+    shadow = get_shadow_scorer()
+    if shadow is None:
+        st.info("Shadow scoring is disabled (set FRAUDPULSE_SHADOW_MODEL to a challenger pipeline or registry version).")
+        return
+
+    stats = shadow.summary()
+    st.caption(f"Challenger: `{stats['challenger_version']}` · statistics since this server started; "
+               f"every pair is stored in the `shadow_scores` table.")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Shadow-Scored Rows", f"{stats['rows']:,}", f"{stats['shed']:,} shed", delta_color="off")
+    col2.metric("Decision Agreement", "—" if stats['agreement_rate'] is None else f"{stats['agreement_rate']:.2%}")
+    col3.metric("Mean |Score Delta|", "—" if stats['mean_abs_score_delta'] is None else f"{stats['mean_abs_score_delta']:.4f}",
+                None if stats['mean_score_delta'] is None else f"mean {stats['mean_score_delta']:+.4f}", delta_color="off")
+    col4.metric("Challenger Batch Latency", "—" if stats['mean_challenger_batch_ms'] is None else f"{stats['mean_challenger_batch_ms']:.2f} ms",
+                None if stats['mean_champion_batch_ms'] is None else f"champion {stats['mean_champion_batch_ms']:.2f} ms", delta_color="off")
+    if stats['rows']:
+        st.dataframe(pd.DataFrame(stats['confusion'], index=["Champion SAFE", "Champion FRAUD"],
+                                  columns=["Challenger SAFE", "Challenger FRAUD"]), use_container_width=True)
@@ -0,0 +1,511 @@
+# app_modules/drift_monitor.py (Streaming Feature & Score Drift Monitor)
+"""Constant-memory sketches of production traffic, compared against a training reference.
+
+Usage (from the project root):
+    python -m app_modules.drift_monitor reference TRAINING_FILE [--output models/drift_reference.json]
+    python -m app_modules.drift_monitor report
+
+Every scored transaction updates, for each engineered numeric feature and for
+risk_score (one vectorized step over all of them, O(1) per prediction):
+    - running moments (count, mean, variance via Welford/Chan, min, max)
+    - a fixed-bin histogram on the reference's decile edges (the PSI bins)
+    - a quantile sketch: log-spaced buckets with ~1% relative error over a fixed
+      value range (DDSketch-style), used for percentiles and the KS statistic
+plus category counts for 'type'. Sketches merge by addition, so each process
+(Streamlit app, scoring service, stream worker) keeps its own, persists it to the
+drift_sketches table every FRAUDPULSE_DRIFT_PERSIST_INTERVAL seconds, and the
+dashboard merges the rows; nothing reads prediction_logs.
+
+The reference (`reference` command) scores a training file with the active
+model in two passes (decile edges from the quantile sketches, then exact
+histograms on those edges) and stores per-feature bin edges/proportions and a
+quantile grid with its CDF. PSI uses the histogram bins; KS is the largest gap
+between the reference and live CDFs at the grid points (sketch resolution).
+
+Configuration (environment):
+    FRAUDPULSE_DRIFT_MONITOR              "0" disables monitoring
+    FRAUDPULSE_DRIFT_REFERENCE            reference JSON (default models/drift_reference.json)
+    FRAUDPULSE_DRIFT_PERSIST_INTERVAL     seconds between persists (default 60)
+"""
+
+import argparse
+import atexit
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Add project root to path so 'database' and 'app_modules' resolve when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.features import NUMERIC_FEATURES, TRANSACTION_TYPES
+
+
+# --- CONFIGURATION ---
+MONITORED = NUMERIC_FEATURES + ["risk_score"]
+MONITOR_ENV_VAR = "FRAUDPULSE_DRIFT_MONITOR"
+REFERENCE_ENV_VAR = "FRAUDPULSE_DRIFT_REFERENCE"
+PERSIST_INTERVAL_ENV_VAR = "FRAUDPULSE_DRIFT_PERSIST_INTERVAL"
+DEFAULT_REFERENCE_PATH = os.path.join(PROJECT_ROOT, "models", "drift_reference.json")
+DEFAULT_PERSIST_INTERVAL = 60.0
+
+# Quantile sketch layout (shared by every feature so updates vectorize): |x| in [1e-9, 1e13]
+RELATIVE_ACCURACY = 0.01
+SKETCH_MIN, SKETCH_MAX = 1e-9, 1e13
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+_OFFSET = int(np.floor(np.log(SKETCH_MIN) / _LOG_GAMMA))
+N_BUCKETS = int(np.ceil(np.log(SKETCH_MAX) / _LOG_GAMMA)) - _OFFSET + 1
+_BUCKET_VALUES = 2 * _GAMMA ** (np.arange(N_BUCKETS) + _OFFSET) / (_GAMMA + 1)
+# One signed row per feature: negative buckets (descending magnitude), the zero bucket, positive buckets
+_SIGNED_VALUES = np.concatenate([-_BUCKET_VALUES[::-1], [0.0], _BUCKET_VALUES])
+
+HISTOGRAM_BINS = 10                     # Reference deciles
+KS_GRID = np.linspace(0.01, 0.99, 99)   # Reference quantiles compared for KS
+PSI_EPSILON = 1e-4
+PSI_WARN, PSI_ALERT = 0.1, 0.25         # Usual PSI rules of thumb
+
+
+def _signed_index(values: np.ndarray) -> np.ndarray:
+    """Column of each value in the signed sketch row."""
+    magnitude = np.abs(values)
+    buckets = np.ceil(np.log(np.maximum(magnitude, SKETCH_MIN)) / _LOG_GAMMA).astype(np.int64) - _OFFSET
+    np.clip(buckets, 0, N_BUCKETS - 1, out=buckets)
+    signed = N_BUCKETS + np.sign(values).astype(np.int64) * (buckets + 1)
+    signed[magnitude < SKETCH_MIN] = N_BUCKETS
+    return signed
+
+
+# --- SKETCH STATE ---
+
+class SketchState:
+    """Moments, histograms and quantile sketches for MONITORED (one row per feature) plus type counts."""
+
+    def __init__(self, edges: np.ndarray | None = None):
+        n = len(MONITORED)
+        # Inner bin edges per feature, padded with +inf where deciles coincide (e.g. the 0/1 is_merchant)
+        self.edges = np.full((n, HISTOGRAM_BINS - 1), np.inf) if edges is None else np.asarray(edges, dtype=np.float64)
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.histogram = np.zeros((n, self.edges.shape[1] + 1), dtype=np.int64)
+        self.sketch = np.zeros((n, len(_SIGNED_VALUES)), dtype=np.int64)
+        self.types: dict[str, int] = {}
+        self._rows = np.arange(n)
+        self._sketch_offsets = self._rows * self.sketch.shape[1]
+
+    # --- Updates ---
+
+    def add(self, transaction_type: str, values: np.ndarray):
+        """One transaction: `values` in MONITORED order."""
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+        self.histogram[self._rows, (values[:, None] > self.edges).sum(axis=1)] += 1
+        self.sketch.ravel()[self._sketch_offsets + _signed_index(values)] += 1
+        self.types[transaction_type] = self.types.get(transaction_type, 0) + 1
+
+    def add_many(self, transaction_types, values: np.ndarray):
+        """A batch: `values` is (rows x MONITORED)."""
+        if len(values) == 0:
+            return
+        n = len(values)
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        np.minimum(self.min, values.min(axis=0), out=self.min)
+        np.maximum(self.max, values.max(axis=0), out=self.max)
+        for i in range(len(MONITORED)):
+            column = values[:, i]
+            self.histogram[i] += np.bincount(np.searchsorted(self.edges[i], column, side="left"),
+                                             minlength=self.histogram.shape[1])
+            self.sketch[i] += np.bincount(_signed_index(column), minlength=self.sketch.shape[1])
+        types, counts = np.unique(np.asarray(transaction_types, dtype=str), return_counts=True)
+        for transaction_type, count in zip(types.tolist(), counts.tolist()):
+            self.types[transaction_type] = self.types.get(transaction_type, 0) + count
+
+    def merge(self, other: "SketchState"):
+        """Adds `other` (same edges) into this state (Chan et al. for the moments)."""
+        if other.count == 0:
+            return
+        if not np.array_equal(other.edges, self.edges):
+            raise ValueError("Cannot merge sketches binned on different reference edges")
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / total
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min, self.max = np.minimum(self.min, other.min), np.maximum(self.max, other.max)
+        self.histogram += other.histogram
+        self.sketch += other.sketch
+        for transaction_type, count in other.types.items():
+            self.types[transaction_type] = self.types.get(transaction_type, 0) + count
+
+    # --- Queries ---
+
+    def quantiles(self, i: int, probabilities) -> np.ndarray:
+        if self.count == 0:
+            return np.full(len(probabilities), np.nan)
+        cumulative = np.cumsum(self.sketch[i])
+        ranks = np.asarray(probabilities) * (self.count - 1)
+        found = _SIGNED_VALUES[np.searchsorted(cumulative, ranks, side="right")]
+        return np.clip(found, self.min[i], self.max[i])
+
+    def cdf(self, i: int, points) -> np.ndarray:
+        cumulative = np.cumsum(self.sketch[i])
+        positions = np.searchsorted(_SIGNED_VALUES, np.asarray(points, dtype=np.float64), side="right") - 1
+        return np.where(positions >= 0, cumulative[np.maximum(positions, 0)], 0) / max(self.count, 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.m2 / self.count) if self.count > 1 else np.zeros(len(MONITORED))
+
+    # --- Serialization (sparse: sketches are mostly empty buckets) ---
+
+    def to_dict(self) -> dict:
+        def sparse_rows(matrix):
+            return [{"index": np.flatnonzero(row).tolist(), "count": row[row != 0].tolist()} for row in matrix]
+        return {
+            "features": MONITORED, "relative_accuracy": RELATIVE_ACCURACY, "count": self.count,
+            "mean": self.mean.tolist(), "m2": self.m2.tolist(),
+            "min": [None if np.isinf(v) else v for v in self.min.tolist()],
+            "max": [None if np.isinf(v) else v for v in self.max.tolist()],
+            "edges": [[None if np.isinf(v) else v for v in row] for row in self.edges.tolist()],
+            "histogram": self.histogram.tolist(), "sketch": sparse_rows(self.sketch), "types": self.types,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SketchState":
+        if data.get("features") != MONITORED or data.get("relative_accuracy") != RELATIVE_ACCURACY:
+            raise ValueError("Sketch layout does not match this version of the drift monitor")
+        edges = np.array([[np.inf if v is None else v for v in row] for row in data["edges"]], dtype=np.float64)
+        state = cls(edges)
+        state.count = int(data["count"])
+        state.mean, state.m2 = np.asarray(data["mean"], dtype=np.float64), np.asarray(data["m2"], dtype=np.float64)
+        state.min = np.array([np.inf if v is None else v for v in data["min"]], dtype=np.float64)
+        state.max = np.array([-np.inf if v is None else v for v in data["max"]], dtype=np.float64)
+        state.histogram = np.asarray(data["histogram"], dtype=np.int64)
+        for i, row in enumerate(data["sketch"]):
+            state.sketch[i, row["index"]] = row["count"]
+        state.types = {k: int(v) for k, v in data["types"].items()}
+        return state
+
+
+# --- REFERENCE & DRIFT STATISTICS ---
+
+class DriftReference:
+    """Training-time distribution summary: bin edges and proportions, quantile grid, type mix."""
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.edges = np.array([[np.inf if v is None else v for v in row] for row in data["edges"]], dtype=np.float64)
+        self.proportions = np.asarray(data["proportions"], dtype=np.float64)
+        self.quantile_grid = np.asarray(data["quantile_grid"], dtype=np.float64)
+        self.grid_cdf = np.asarray(data["grid_cdf"], dtype=np.float64)
+        self.type_proportions = data["type_proportions"]
+
+    @staticmethod
+    def decile_edges(state: SketchState) -> np.ndarray:
+        """Inner decile edges per feature from a state's quantile sketches (duplicates padded with +inf)."""
+        edges = np.full((len(MONITORED), HISTOGRAM_BINS - 1), np.inf)
+        for i in range(len(MONITORED)):
+            unique = np.unique(state.quantiles(i, np.arange(1, HISTOGRAM_BINS) / HISTOGRAM_BINS))
+            edges[i, :len(unique)] = unique
+        return edges
+
+    @classmethod
+    def from_state(cls, state: SketchState, source: str, model_version: str | None) -> "DriftReference":
+        """Summarizes a reference state that was binned on its own decile edges (see build_reference)."""
+        grid = np.array([state.quantiles(i, KS_GRID) for i in range(len(MONITORED))])
+        total_types = sum(state.types.values()) or 1
+        return cls({
+            "features": MONITORED, "source": source, "model_version": model_version, "rows": state.count,
+            "created_at": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+            "edges": [[None if np.isinf(v) else v for v in row] for row in state.edges.tolist()],
+            "proportions": (state.histogram / max(state.count, 1)).tolist(), "quantile_grid": grid.tolist(),
+            "grid_cdf": [state.cdf(i, grid[i]).tolist() for i in range(len(MONITORED))],
+            "type_proportions": {t: state.types.get(t, 0) / total_types for t in TRANSACTION_TYPES},
+            "mean": state.mean.tolist(), "std": state.std.tolist(),
+        })
+
+    @classmethod
+    def load(cls, path: str) -> "DriftReference | None":
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data) if data.get("features") == MONITORED else None
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, path)
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two proportion vectors."""
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), PSI_EPSILON)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_report(state: SketchState, reference: DriftReference | None) -> pd.DataFrame:
+    """One row per monitored feature (plus 'type'): live summary and, with a reference, PSI and KS."""
+    rows = []
+    percentiles = np.array([0.5, 0.99])
+    for i, feature in enumerate(MONITORED):
+        p50, p99 = state.quantiles(i, percentiles)
+        row = {"Feature": feature, "Count": state.count, "Mean": state.mean[i] if state.count else np.nan,
+               "Std": state.std[i] if state.count else np.nan, "P50": p50, "P99": p99,
+               "PSI": np.nan, "KS": np.nan}
+        if reference is not None and state.count:
+            live = state.histogram[i] / state.count
+            bins = int(np.isfinite(reference.edges[i]).sum()) + 1
+            if np.array_equal(state.edges[i], reference.edges[i]):
+                row["PSI"] = psi(reference.proportions[i, :bins], live[:bins])
+            row["KS"] = float(np.max(np.abs(state.cdf(i, reference.quantile_grid[i]) - reference.grid_cdf[i])))
+        rows.append(row)
+
+    type_row = {"Feature": "type", "Count": state.count, "Mean": np.nan, "Std": np.nan, "P50": np.nan,
+                "P99": np.nan, "PSI": np.nan, "KS": np.nan}
+    if reference is not None and state.count:
+        total = sum(state.types.values())
+        type_row["PSI"] = psi([reference.type_proportions.get(t, 0.0) for t in TRANSACTION_TYPES],
+                              [state.types.get(t, 0) / total for t in TRANSACTION_TYPES])
+    rows.append(type_row)
+
+    report = pd.DataFrame(rows)
+    report["Status"] = np.select([report["PSI"] >= PSI_ALERT, report["PSI"] >= PSI_WARN, report["PSI"].notna()],
+                                 ["🚨 drift", "⚠️ watch", "✅ stable"], default="—")
+    return report
+
+
+# --- LIVE MONITOR ---
+
+class DriftMonitor:
+    """Thread-safe sketches for one serving process, persisted to drift_sketches under `source`."""
+
+    def __init__(self, source: str, reference: DriftReference | None = None, session_factory=None):
+        self.source = source
+        self.reference = reference
+        self.session_factory = session_factory
+        self.state = SketchState(reference.edges if reference is not None else None)
+        self._lock = threading.Lock()
+        self._persister: threading.Thread | None = None
+
+    def observe(self, transaction_type: str, numeric: np.ndarray, risk_score: float):
+        """One prediction: engineered numeric features (NUMERIC_FEATURES order) and its score."""
+        values = np.append(np.asarray(numeric, dtype=np.float64), float(risk_score))
+        with self._lock:
+            self.state.add(transaction_type, values)
+
+    def observe_batch(self, transaction_types, numeric: np.ndarray, risk_scores: np.ndarray):
+        """Many predictions: (rows x NUMERIC_FEATURES) features and their scores."""
+        values = np.column_stack([np.asarray(numeric, dtype=np.float64), np.asarray(risk_scores, dtype=np.float64)])
+        with self._lock:
+            if len(values) == 1:
+                self.state.add(str(transaction_types[0]), values[0])
+            else:
+                self.state.add_many(transaction_types, values)
+
+    def snapshot(self) -> SketchState:
+        with self._lock:
+            return SketchState.from_dict(self.state.to_dict())
+
+    # --- Persistence ---
+
+    def _sessions(self):
+        if self.session_factory is None:
+            from database.database_connector import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory
+
+    def restore(self):
+        """Continues from this source's persisted sketches (if they use the same reference bins)."""
+        from database.models import DriftSketch
+        from database.schema import ensure_schema
+
+        session_factory = self._sessions()
+        ensure_schema(session_factory.kw["bind"])
+        with session_factory() as db:
+            row = db.get(DriftSketch, self.source)
+            if row is None:
+                return
+            try:
+                stored = SketchState.from_dict(json.loads(row.state))
+            except (ValueError, KeyError) as e:
+                print(f"⚠️ Ignoring stored drift sketches for {self.source}: {e}")
+                return
+        with self._lock:
+            if np.array_equal(stored.edges, self.state.edges):
+                stored.merge(self.state)
+                self.state = stored
+
+    def persist(self):
+        """Upserts this source's sketches (one small row; never touches prediction_logs)."""
+        from database.models import DriftSketch
+
+        with self._lock:
+            payload = json.dumps(self.state.to_dict())
+            count = self.state.count
+        session_factory = self._sessions()
+        with session_factory() as db:
+            row = db.get(DriftSketch, self.source)
+            if row is None:
+                row = DriftSketch(source=self.source)
+                db.add(row)
+            row.state, row.row_count, row.updated_at = payload, count, datetime.datetime.utcnow()
+            db.commit()
+
+    def start_persisting(self, interval: float):
+        if self._persister is not None:
+            return self
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.persist()
+                except Exception as e:
+                    print(f"⚠️ Drift sketch persist failed: {e}")
+
+        self._persister = threading.Thread(target=_run, name="drift-monitor-persister", daemon=True)
+        self._persister.start()
+        atexit.register(self.persist)
+        return self
+
+
+def load_merged_state(db, live: DriftMonitor | None = None) -> tuple[SketchState, list[dict]]:
+    """All sources' persisted sketches merged (the live monitor's in-memory state replaces its own row)."""
+    from database.models import DriftSketch
+
+    reference = get_reference()
+    merged = SketchState(reference.edges if reference is not None else None)
+    sources = []
+    for row in db.query(DriftSketch).all():
+        if live is not None and row.source == live.source:
+            continue
+        try:
+            state = SketchState.from_dict(json.loads(row.state))
+        except (ValueError, KeyError):
+            continue  # Written by an incompatible sketch layout
+        if not np.array_equal(state.edges, merged.edges):
+            continue  # Binned on another reference; picks up the current one when that process restarts
+        merged.merge(state)
+        sources.append({"source": row.source, "rows": row.row_count, "updated_at": row.updated_at})
+    if live is not None:
+        state = live.snapshot()
+        merged.merge(state)
+        sources.append({"source": live.source, "rows": state.count, "updated_at": "live"})
+    return merged, sources
+
+
+# --- PROCESS-WIDE MONITOR ---
+_shared_monitor: DriftMonitor | None = None
+_shared_initialized = False
+_shared_lock = threading.Lock()
+
+
+def get_reference() -> DriftReference | None:
+    return DriftReference.load(os.environ.get(REFERENCE_ENV_VAR, DEFAULT_REFERENCE_PATH))
+
+
+def get_drift_monitor(source: str = "streamlit") -> DriftMonitor | None:
+    """This process's monitor (restored from and persisted to drift_sketches), or None when disabled.
+
+    The first caller's `source` names the process for its lifetime.
+    """
+    global _shared_monitor, _shared_initialized
+    with _shared_lock:
+        if not _shared_initialized:
+            _shared_initialized = True
+            if os.environ.get(MONITOR_ENV_VAR, "1") != "0":
+                monitor = DriftMonitor(source, get_reference())
+                try:
+                    monitor.restore()
+                except Exception as e:
+                    print(f"⚠️ Could not restore drift sketches for {source}: {e}")
+                interval = float(os.environ.get(PERSIST_INTERVAL_ENV_VAR, DEFAULT_PERSIST_INTERVAL))
+                _shared_monitor = monitor.start_persisting(interval)
+        return _shared_monitor
+
+
+# --- CLI ---
+
+def _sketch_file(input_path: str, engine, edges: np.ndarray | None, chunksize: int) -> SketchState:
+    from app_modules.batch_scoring import iter_chunks
+    from app_modules.velocity_store import VelocityStore
+
+    velocity_store = VelocityStore()
+    state = SketchState(edges)
+    for chunk in iter_chunks(input_path, chunksize):
+        chunk["Orig_Count_1step"] = velocity_store.record_batch(chunk["nameOrig"].to_numpy(), chunk["step"].to_numpy())
+        result = engine.score(chunk)  # Adds the engineered columns to `chunk` in place
+        state.add_many(chunk["type"].to_numpy(),
+                       np.column_stack([chunk[NUMERIC_FEATURES].to_numpy(dtype=np.float64), result.risk_score]))
+    return state
+
+
+def build_reference(input_path: str, model_path: str | None = None, chunksize: int = 100_000) -> DriftReference:
+    """Streams a PaySim training file through the active model (twice) and summarizes features and scores."""
+    from app_modules.batch_scoring import resolve_model
+    from app_modules.model_loader import load_pipeline, serving_mmap_mode
+    from app_modules.scoring_engine import ScoringEngine
+
+    model_path, model_version = resolve_model(model_path)
+    engine = ScoringEngine(load_pipeline(model_path, mmap_mode=serving_mmap_mode()), model_version=model_version)
+    # Sketch CDFs are bucket-granular, so the PSI bin proportions come from an exact second pass
+    edges = DriftReference.decile_edges(_sketch_file(input_path, engine, None, chunksize))
+    state = _sketch_file(input_path, engine, edges, chunksize)
+    return DriftReference.from_state(state, os.path.basename(input_path), model_version)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse drift monitor")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reference_parser = subparsers.add_parser("reference", help="Build the training reference")
+    reference_parser.add_argument("input_path", help="PaySim-format training CSV or Parquet file")
+    reference_parser.add_argument("--output", default=os.environ.get(REFERENCE_ENV_VAR, DEFAULT_REFERENCE_PATH))
+    reference_parser.add_argument("--model-path", default=None, help="Default: the registry's active version")
+    subparsers.add_parser("report", help="Print drift for all persisted sources")
+    args = parser.parse_args(argv)
+
+    if args.command == "reference":
+        reference = build_reference(args.input_path, args.model_path)
+        reference.save(args.output)
+        print(f"✅ Drift reference over {reference.data['rows']:,} rows written to {args.output}. "
+              f"Restart serving processes to bin live traffic on its edges.")
+    else:
+        from database.database_connector import session_scope
+        from database.schema import ensure_schema
+
+        ensure_schema()
+        with session_scope() as db:
+            state, sources = load_merged_state(db)
+        if not sources:
+            print("⚠️ No drift sketches have been persisted yet.")
+            return
+        print(f"Sources: {', '.join(source['source'] for source in sources)} ({state.count:,} predictions)")
+        print(drift_report(state, get_reference()).to_string(index=False, float_format=lambda v: f"{v:,.4g}"))
+
+
+if __name__ == "__main__":
+    main()
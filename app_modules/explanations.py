@@ -0,0 +1,301 @@
+# app_modules/explanations.py (Per-Prediction Feature Contributions)
+"""Additive per-transaction explanations for the deployment pipeline.
+
+Contributions are in log-odds and sum, with the base value, to the model's
+fraud logit, so `sigmoid(base_value + contributions.sum())` is the risk score.
+They are reported per raw (pre-ColumnTransformer) feature: scaled columns map
+one-to-one and every one-hot column of 'type' is summed back into 'type'.
+
+Per classifier:
+    - XGBClassifier: XGBoost's native TreeSHAP (`pred_contribs=True`)
+    - LogisticRegression: exact linear terms (coef * transformed value)
+    - RandomForestClassifier: path attribution (Saabas), a fast TreeSHAP
+      approximation computed with one sparse product over all decision paths
+    - StackingClassifier: each base model's contributions, moved to the space the
+      meta-learner reads (probability or margin), weighted by its coefficients
+
+Explanations are never computed on the scoring path. `explain()` takes a batch
+of engineered features, looks each row up in an LRU cache keyed by a hash of its
+transformed feature vector and computes all misses in one vectorized pass.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from app_modules.features import engineer_frame, prior_sender_counts
+
+
+# --- CONFIGURATION ---
+DEFAULT_CACHE_SIZE = 50_000  # Cached rows per explainer (~ (features + 1) * 8 bytes each)
+REFERENCE_ROWS = 2_000       # Synthetic transactions behind the dashboard's global importance
+REFERENCE_SEED = 31
+
+
+class UnsupportedExplanationError(TypeError):
+    """Raised when the pipeline contains a component the explainer cannot attribute."""
+
+
+class Explanation(NamedTuple):
+    contributions: pd.DataFrame  # One row per transaction, one column per raw feature (log-odds)
+    base_value: np.ndarray       # Log-odds before any feature is considered
+    risk_score: np.ndarray       # sigmoid(base_value + row sum), equal to the model's probability
+    model_version: str | None
+
+
+def _sigmoid(margin: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-margin))
+
+
+def _logit(proba: np.ndarray) -> np.ndarray:
+    proba = np.clip(proba, 1e-12, 1 - 1e-12)
+    return np.log(proba / (1.0 - proba))
+
+
+def _convert(phi: np.ndarray, bias: np.ndarray, space: str, target: str) -> tuple[np.ndarray, np.ndarray]:
+    """Moves additive contributions between probability and margin space, keeping both end points exact.
+
+    Contributions are rescaled proportionally so they still sum to the converted
+    prediction minus the converted bias (the derivative is used when they cancel out).
+    """
+    if space == target:
+        return phi, bias
+    total = bias + phi.sum(axis=1)
+    if target == "proba":
+        new_bias, new_total = _sigmoid(bias), _sigmoid(total)
+        slope = new_total * (1.0 - new_total)
+    else:
+        new_bias, new_total = _logit(bias), _logit(total)
+        clipped = np.clip(total, 1e-12, 1 - 1e-12)
+        slope = 1.0 / (clipped * (1.0 - clipped))
+    delta = total - bias
+    safe = np.abs(delta) > 1e-12
+    scale = np.where(safe, (new_total - new_bias) / np.where(safe, delta, 1.0), slope)
+    return phi * scale[:, None], np.broadcast_to(new_bias, total.shape).astype(np.float64)
+
+
+# --- PER-ESTIMATOR CONTRIBUTIONS (transformed feature space) ---
+
+def _xgboost_contributor(model):
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    try:
+        iteration_range = (0, model.best_iteration + 1)  # Same trees as predict_proba after early stopping
+    except AttributeError:
+        iteration_range = (0, 0)
+
+    def contribute(X):
+        contribs = booster.predict(xgb.DMatrix(X, missing=model.missing), pred_contribs=True,
+                                   iteration_range=iteration_range).astype(np.float64)
+        return contribs[:, :-1], contribs[:, -1], "margin"
+    return contribute
+
+
+def _random_forest_contributor(model, n_features: int):
+    # Each node's change in class-1 probability is credited to the feature its parent split on;
+    # a row's contributions are the sum over the nodes on its decision paths (node_deltas stacks all trees).
+    blocks, biases = [], []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        proba = value[:, 1] / value.sum(axis=1)
+        parent = np.full(tree.node_count, -1)
+        internal = np.flatnonzero(tree.children_left >= 0)
+        parent[tree.children_left[internal]] = internal
+        parent[tree.children_right[internal]] = internal
+        child = np.flatnonzero(parent >= 0)
+        blocks.append(sparse.csr_matrix(
+            (proba[child] - proba[parent[child]], (child, tree.feature[parent[child]])),
+            shape=(tree.node_count, n_features),
+        ))
+        biases.append(proba[0])
+    node_deltas = sparse.vstack(blocks).tocsr() / len(blocks)
+    bias = float(np.mean(biases))
+
+    def contribute(X):
+        paths, _ = model.decision_path(X)
+        phi = np.asarray((paths @ node_deltas).todense())
+        return phi, np.full(len(X), bias), "proba"
+    return contribute
+
+
+def _logistic_contributor(model):
+    if model.coef_.shape[0] != 1:
+        raise UnsupportedExplanationError("Only binary LogisticRegression is supported")
+    coef, intercept = model.coef_[0].astype(np.float64), float(model.intercept_[0])
+
+    def contribute(X):
+        return X * coef, np.full(len(X), intercept), "margin"
+    return contribute
+
+
+def _stacking_contributor(model, n_features: int):
+    if any(method not in ("predict_proba", "decision_function") for method in model.stack_method_):
+        raise UnsupportedExplanationError(f"Unsupported stack methods: {model.stack_method_}")
+    bases = [
+        (_contributor(estimator, n_features), "proba" if method == "predict_proba" else "margin")
+        for estimator, method in zip(model.estimators_, model.stack_method_)
+        if estimator != "drop"
+    ]
+    final = model.final_estimator_
+    if type(final).__name__ != "LogisticRegression" or final.coef_.shape[0] != 1:
+        raise UnsupportedExplanationError("Stacking is only explained with a binary LogisticRegression meta-learner")
+    weights = final.coef_[0].astype(np.float64)
+    intercept = float(final.intercept_[0])
+
+    def contribute(X):
+        phi = np.zeros_like(X, dtype=np.float64)
+        bias = np.full(len(X), intercept)
+        for weight, (base, space) in zip(weights, bases):
+            base_phi, base_bias, base_space = base(X)
+            base_phi, base_bias = _convert(base_phi, base_bias, base_space, space)
+            phi += weight * base_phi
+            bias += weight * base_bias
+        if model.passthrough:
+            phi += X * weights[len(bases):]
+        return phi, bias, "margin"
+    return contribute
+
+
+def _contributor(model, n_features: int):
+    kind = type(model).__name__
+    if kind == "XGBClassifier":
+        return _xgboost_contributor(model)
+    if kind == "RandomForestClassifier":
+        return _random_forest_contributor(model, n_features)
+    if kind == "LogisticRegression":
+        return _logistic_contributor(model)
+    if kind == "StackingClassifier":
+        return _stacking_contributor(model, n_features)
+    raise UnsupportedExplanationError(f"Unsupported classifier: {kind}")
+
+
+def _raw_feature_map(preprocessor, raw_features: list[str]) -> np.ndarray:
+    """(transformed columns x raw features) 0/1 matrix summing transformed contributions per input column."""
+    mapping = np.zeros((sum(s.stop - s.start for s in preprocessor.output_indices_.values()), len(raw_features)))
+    for name, transformer, columns in preprocessor.transformers_:
+        output = preprocessor.output_indices_[name]
+        width = output.stop - output.start
+        if width == 0:
+            continue
+        columns = list(columns)
+        if width == len(columns):
+            for offset, column in enumerate(columns):
+                mapping[output.start + offset, raw_features.index(column)] = 1.0
+        elif len(columns) == 1:
+            mapping[output, raw_features.index(columns[0])] = 1.0
+        else:
+            raise UnsupportedExplanationError(f"Cannot map the outputs of '{name}' back to its input columns")
+    return mapping
+
+
+# --- EXPLAINER ---
+
+class PipelineExplainer:
+    """Batched, cached contributions for a fitted Pipeline(preprocessor, classifier)."""
+
+    def __init__(self, pipeline, model_version: str | None = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.model_version = model_version
+        self.feature_names = list(pipeline.feature_names_in_)
+        self.preprocessor, classifier = pipeline[:-1], pipeline[-1]
+        self._mapping = _raw_feature_map(pipeline[0], self.feature_names)
+        self._contribute = _contributor(classifier, self._mapping.shape[0])
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()  # row hash -> [base, contributions...]
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _compute(self, X: np.ndarray) -> np.ndarray:
+        phi, bias, space = self._contribute(X)
+        phi, bias = _convert(phi, bias, space, "margin")
+        return np.column_stack([bias, phi @ self._mapping])
+
+    def explain(self, features: pd.DataFrame) -> Explanation:
+        """Contributions for a DataFrame of engineered features (as passed to the pipeline)."""
+        X = np.ascontiguousarray(self.preprocessor.transform(features[self.feature_names]), dtype=np.float64)
+        keys = [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in X]
+        values = np.empty((len(X), len(self.feature_names) + 1))
+
+        with self._lock:
+            missing = []
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    values[i] = cached
+            self.hits += len(X) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            values[missing] = self._compute(X[missing])
+            with self._lock:
+                for i in missing:
+                    self._cache[keys[i]] = values[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        contributions = pd.DataFrame(values[:, 1:], columns=self.feature_names, index=features.index)
+        return Explanation(contributions, values[:, 0], _sigmoid(values.sum(axis=1)), self.model_version)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cached_rows": len(self._cache), "hits": self.hits, "misses": self.misses,
+                    "model_version": self.model_version}
+
+
+def top_reasons(explanation: Explanation, row: int = 0, k: int = 3) -> list[tuple[str, float]]:
+    """The `k` features that moved row `row` most, as (feature, log-odds contribution)."""
+    contributions = explanation.contributions.iloc[row]
+    order = contributions.abs().sort_values(ascending=False).index[:k]
+    return [(feature, float(contributions[feature])) for feature in order]
+
+
+def global_importance(explainer: PipelineExplainer, features: pd.DataFrame) -> pd.DataFrame:
+    """Mean absolute (and mean signed) contribution per raw feature over `features`, largest first."""
+    contributions = explainer.explain(features).contributions
+    importance = pd.DataFrame({
+        "Feature": contributions.columns,
+        "Mean |Contribution|": contributions.abs().mean().to_numpy(),
+        "Mean Contribution": contributions.mean().to_numpy(),
+    })
+    importance["Share"] = importance["Mean |Contribution|"] / importance["Mean |Contribution|"].sum()
+    return importance.sort_values("Mean |Contribution|", ascending=False, ignore_index=True)
+
+
+def reference_features(n_rows: int = REFERENCE_ROWS, seed: int = REFERENCE_SEED) -> pd.DataFrame:
+    """Engineered features for a deterministic synthetic PaySim sample (velocity as in training)."""
+    from app_modules.synthetic_paysim import generate_transactions
+
+    frame = generate_transactions(n_rows, seed=seed)
+    frame["Orig_Count_1step"] = prior_sender_counts(frame["nameOrig"], frame["step"])
+    return engineer_frame(frame)
+
+
+# --- PROCESS-WIDE EXPLAINERS ---
+_explainers: OrderedDict[str, PipelineExplainer] = OrderedDict()
+_explainers_lock = threading.Lock()
+_MAX_EXPLAINERS = 2  # Current and previous model version
+
+
+def get_explainer(model_version: str) -> PipelineExplainer:
+    """The explainer for a registry version, built from its sklearn pipeline on first use."""
+    with _explainers_lock:
+        explainer = _explainers.get(model_version)
+        if explainer is None:
+            from app_modules.model_loader import load_pipeline, serving_mmap_mode
+            from app_modules.model_registry import get_registry
+
+            # Always the sklearn pipeline, even when serving from the compiled evaluator
+            pipeline = load_pipeline(get_registry().artifact_path(model_version), mmap_mode=serving_mmap_mode())
+            explainer = _explainers[model_version] = PipelineExplainer(pipeline, model_version)
+            while len(_explainers) > _MAX_EXPLAINERS:
+                _explainers.popitem(last=False)
+        return explainer
@@ -0,0 +1,71 @@
+# app_modules/log_explorer.py (Prediction Log Explorer)
+
+import datetime
+
+import streamlit as st
+from database.database_connector import session_scope
+from database.log_queries import LogFilters, fetch_log_page, format_log_frame
+from database.schema import ensure_schema
+
+TRANSACTION_TYPES = ["TRANSFER", "CASH_OUT", "PAYMENT", "CASH_IN", "DEBIT"]
+PAGE_SIZE_OPTIONS = [50, 100, 250, 500]
+
+
+def _filter_form() -> LogFilters:
+    """Renders the filter widgets and returns the resulting LogFilters."""
+    with st.expander("Filters", expanded=True):
+        c1, c2, c3 = st.columns([2, 2, 1])
+        types = c1.multiselect("Transaction Type", TRANSACTION_TYPES)
+        min_score, max_score = c2.slider("Risk Score Range", 0.0, 1.0, (0.0, 1.0), step=0.01)
+        predicted = c3.selectbox("Predicted", ["Any", "FRAUD", "SAFE"])
+
+        c4, c5 = st.columns(2)
+        today = datetime.date.today()
+        start_date = c4.date_input("From (UTC)", value=today - datetime.timedelta(days=28))
+        end_date = c5.date_input("To (UTC, inclusive)", value=today)
+
+    return LogFilters(
+        transaction_types=tuple(types) or None,
+        min_risk_score=min_score if min_score > 0.0 else None,
+        max_risk_score=max_score if max_score < 1.0 else None,
+        predicted_class={"Any": None, "FRAUD": 1, "SAFE": 0}[predicted],
+        start_time=datetime.datetime.combine(start_date, datetime.time.min) if start_date else None,
+        end_time=datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min) if end_date else None,
+    )
+
+
+# --- MAIN PAGE FUNCTION ---
+def log_explorer_page():
+    st.header("Prediction Log Explorer")
+    st.markdown("Browse historical predictions, newest first. Paging uses (timestamp, id) cursors, so deep pages load as fast as the first.")
+    st.divider()
+
+    filters = _filter_form()
+    page_size = st.selectbox("Rows per page", PAGE_SIZE_OPTIONS, index=1)
+
+    # Cursor stack: entry i is the cursor that produced page i (None = first page).
+    # Changing any filter or the page size starts again from the first page.
+    state_key = (filters, page_size)
+    if st.session_state.get("log_explorer_key") != state_key:
+        st.session_state["log_explorer_key"] = state_key
+        st.session_state["log_explorer_cursors"] = [None]
+    cursors = st.session_state["log_explorer_cursors"]
+
+    try:
+        ensure_schema()  # Creates the (type|class, timestamp, id) indexes on older databases
+        with session_scope() as db:
+            page = fetch_log_page(db, filters, after=cursors[-1], page_size=page_size)
+    except Exception as e:
+        st.error(f"⚠️ Could not load prediction logs. Error: {e}")
+        return
+
+    st.caption(f"Page {len(cursors)} · {len(page.rows)} rows")
+    st.dataframe(format_log_frame(page.rows), use_container_width=True, hide_index=True)
+
+    col_prev, col_next, _ = st.columns([1, 1, 4])
+    if col_prev.button("⬅️ Newer", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    if col_next.button("Older ➡️", disabled=page.next_cursor is None, use_container_width=True):
+        cursors.append(page.next_cursor)
+        st.rerun()
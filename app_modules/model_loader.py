@@ -0,0 +1,118 @@
+# app_modules/model_loader.py (Shared Model Loading)
+"""Single place that knows where the deployment pipeline lives and how to load it.
+
+Used by the Streamlit app (wrapped in st.cache_resource), the batch scorer and
+the HTTP scoring service, so every entry point scores with the same artifact.
+
+The pickle in models/ may be compressed, which rules out memory-mapping. With
+`mmap_mode` set, `load_pipeline` loads an uncompressed copy next to it
+(`<model>.mmap.joblib`, exported on first use and whenever the pickle is newer)
+so NumPy arrays inside the pipeline are mapped read-only from the page cache
+and shared between processes (batch-scoring workers, several app servers).
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import joblib
+
+
+# --- CONFIGURATION ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_NAME = "fraud_detection_deployment_pipeline.pkl"
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", MODEL_NAME)
+MMAP_SUFFIX = ".mmap.joblib"
+MMAP_MODE_ENV_VAR = "FRAUDPULSE_MODEL_MMAP"  # joblib mmap_mode for serving ("r" default, "" disables)
+
+# Raw transaction fields every scoring entry point requires
+RAW_INPUT_FIELDS = [
+    "type", "amount", "oldbalanceOrg", "newbalanceOrig", "oldbalanceDest",
+    "newbalanceDest", "step", "nameOrig", "nameDest",
+]
+
+
+def mmap_path_for(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + MMAP_SUFFIX
+
+
+def serving_mmap_mode() -> str | None:
+    return os.environ.get(MMAP_MODE_ENV_VAR, "r") or None
+
+
+def export_mmap_artifact(model_path: str = MODEL_PATH, output_path: str | None = None) -> str:
+    """Re-dumps the pipeline uncompressed so its arrays can be memory-mapped (atomic write)."""
+    output_path = output_path or mmap_path_for(model_path)
+    pipeline = joblib.load(model_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=MMAP_SUFFIX)
+    os.close(fd)
+    try:
+        joblib.dump(pipeline, tmp_path, compress=0)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return output_path
+
+
+def load_pipeline(model_path: str = MODEL_PATH, mmap_mode: str | None = None):
+    """Loads the fitted scikit-learn pipeline (raises FileNotFoundError if missing).
+
+    With `mmap_mode` (e.g. "r") the memory-mappable copy is used, falling back
+    to the original pickle if it cannot be written (read-only model folder).
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found at expected path: {model_path}")
+    if mmap_mode:
+        mmap_path = mmap_path_for(model_path)
+        try:
+            if not os.path.exists(mmap_path) or os.path.getmtime(mmap_path) < os.path.getmtime(model_path):
+                export_mmap_artifact(model_path, mmap_path)
+            return joblib.load(mmap_path, mmap_mode=mmap_mode)
+        except OSError as e:
+            print(f"⚠️ Memory-mapped model unavailable ({e}); loading {model_path} directly.")
+    return joblib.load(model_path)
+
+
+# --- BACKGROUND LOADING ---
+
+class BackgroundModelLoader:
+    """Runs `build(timings)` on a daemon thread so callers can keep rendering meanwhile.
+
+    `build` receives a dict to record named durations (seconds) in; the total
+    wall time is stored under "total_seconds" when it finishes.
+    """
+
+    def __init__(self, build):
+        self.timings: dict[str, float] = {}
+        self._build = build
+        self._result = None
+        self._error: BaseException | None = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self._result = self._build(self.timings)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.timings["total_seconds"] = time.perf_counter() - started
+            self._done.set()
+
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def result(self, timeout: float | None = None):
+        """Blocks until loaded; re-raises the loading error, TimeoutError if still running."""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Model is still loading.")
+        if self._error is not None:
+            raise self._error
+        return self._result
@@ -0,0 +1,358 @@
+# app_modules/model_registry.py (Versioned Model Registry & Hot-Swap)
+"""Local model registry with atomic activation and zero-restart model swaps.
+
+Layout (default models/registry, override with FRAUDPULSE_MODEL_REGISTRY):
+
+    models/registry/
+        ACTIVE                      name of the version serving traffic
+        <version>/pipeline.pkl      the fitted pipeline, copied in at registration
+        <version>/manifest.json     version, sha256, feature schema, metrics, ...
+
+Usage (from the project root):
+    python -m app_modules.model_registry list
+    python -m app_modules.model_registry register path/to/pipeline.pkl [--version V] [--metrics m.json] [--activate]
+    python -m app_modules.model_registry activate V
+
+Activation only rewrites ACTIVE (atomically). Running processes hold a
+`HotSwapEngine`, which polls ACTIVE, loads and warms up the new version in the
+background and then switches with a single reference assignment. Requests in
+flight finish on the engine they started with, and every ScoreResult carries
+the version that actually produced it.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+# --- Add project root to path so 'database' and 'app_modules' resolve when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.model_loader import MODEL_PATH, load_pipeline
+
+
+# --- CONFIGURATION ---
+REGISTRY_ENV_VAR = "FRAUDPULSE_MODEL_REGISTRY"
+REGISTRY_DIR = os.environ.get(REGISTRY_ENV_VAR, os.path.join(PROJECT_ROOT, "models", "registry"))
+POLL_INTERVAL_ENV_VAR = "FRAUDPULSE_REGISTRY_POLL_SECONDS"
+DEFAULT_POLL_INTERVAL = 5.0
+ACTIVE_FILE = "ACTIVE"
+MANIFEST_FILE = "manifest.json"
+ARTIFACT_FILE = "pipeline.pkl"
+VERSION_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")  # One path component; no leading dot
+
+# Version recorded for the pickle that shipped before the registry existed
+# (matches the historical PredictionLog.model_version default).
+LEGACY_VERSION = "1.0_Stacking_Ensemble"
+
+
+class RegistryError(Exception):
+    """Raised for unknown or invalid versions, checksum mismatches or an empty registry."""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_valid_version(version) -> bool:
+    """True for a version usable as one registry directory name."""
+    return isinstance(version, str) and bool(VERSION_PATTERN.fullmatch(version)) and ".." not in version
+
+
+def _atomic_write_text(path: str, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def feature_schema(pipeline) -> dict:
+    """Input columns plus the categories any fitted one-hot encoder expects."""
+    schema = {"inputs": [str(name) for name in getattr(pipeline, "feature_names_in_", [])], "categorical": {}}
+    steps = getattr(pipeline, "named_steps", {})
+    for step in steps.values():
+        for _, transformer, columns in getattr(step, "transformers_", []):
+            categories = getattr(transformer, "categories_", None)
+            if categories is not None and not isinstance(columns, str):
+                for column, values in zip(columns, categories):
+                    schema["categorical"][str(column)] = [str(value) for value in values]
+    return schema
+
+
+@dataclass
+class ModelManifest:
+    version: str
+    sha256: str
+    artifact: str = ARTIFACT_FILE
+    feature_schema: dict = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+    created_at: str = ""
+    source: str = ""
+    notes: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelManifest":
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+
+class ModelRegistry:
+    """Reads and writes the registry directory; safe to share between processes."""
+
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+
+    # --- Reading ---
+
+    def _version_dir(self, version: str) -> str:
+        if not is_valid_version(version):
+            raise RegistryError(f"Invalid model version {version!r}: use letters, digits, '.', '_' and '-'")
+        return os.path.join(self.root, version)
+
+    def artifact_path(self, version: str) -> str:
+        return os.path.join(self._version_dir(version), self.manifest(version).artifact)
+
+    def manifest(self, version: str) -> ModelManifest:
+        path = os.path.join(self._version_dir(version), MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise RegistryError(f"Unknown model version: {version}")
+        with open(path) as f:
+            return ModelManifest.from_dict(json.load(f))
+
+    def versions(self) -> list[ModelManifest]:
+        """All registered versions, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        # Skips .staging-* directories of in-flight (or crashed) registrations
+        manifests = [self.manifest(name) for name in os.listdir(self.root)
+                     if is_valid_version(name) and os.path.exists(os.path.join(self.root, name, MANIFEST_FILE))]
+        return sorted(manifests, key=lambda manifest: manifest.created_at)
+
+    def active_version(self) -> str | None:
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def version_for_file(self, path: str) -> str | None:
+        """Registered version whose artifact has the same checksum as `path`, if any."""
+        checksum = file_sha256(path)
+        return next((manifest.version for manifest in self.versions() if manifest.sha256 == checksum), None)
+
+    # --- Writing ---
+
+    def register(self, pipeline_path: str, version: str | None = None, metrics: dict | None = None,
+                 notes: str = "", activate: bool = False) -> ModelManifest:
+        """Copies a pickled pipeline into the registry and writes its manifest."""
+        checksum = file_sha256(pipeline_path)
+        version = version or f"{datetime.datetime.utcnow():%Y%m%d%H%M%S}-{checksum[:8]}"
+        version_dir = self._version_dir(version)
+        if os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+            raise RegistryError(f"Model version already registered: {version}")
+
+        pipeline = load_pipeline(pipeline_path)  # Also proves the artifact unpickles
+        manifest = ModelManifest(
+            version=version, sha256=checksum, feature_schema=feature_schema(pipeline),
+            metrics=dict(metrics or {}), created_at=datetime.datetime.utcnow().isoformat(timespec="milliseconds"),
+            source=os.path.abspath(pipeline_path), notes=notes,
+        )
+
+        # Stage in a temp dir and rename, so a half-written version is never visible
+        os.makedirs(self.root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.root, prefix=".staging-")
+        try:
+            shutil.copyfile(pipeline_path, os.path.join(staging_dir, ARTIFACT_FILE))
+            with open(os.path.join(staging_dir, MANIFEST_FILE), "w") as f:
+                json.dump(asdict(manifest), f, indent=2)
+            os.replace(staging_dir, version_dir)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return manifest
+
+    def activate(self, version: str):
+        """Points ACTIVE at `version` (atomic rename); serving processes pick it up on their next poll."""
+        self.manifest(version)  # Raises for unknown versions
+        _atomic_write_text(os.path.join(self.root, ACTIVE_FILE), version + "\n")
+
+    def ensure_bootstrapped(self, legacy_model_path: str = MODEL_PATH):
+        """Registers the shipped pickle as LEGACY_VERSION when the registry is empty."""
+        if self.active_version() is None:
+            if not self.versions():
+                try:
+                    self.register(legacy_model_path, version=LEGACY_VERSION,
+                                  notes="Deployment pipeline shipped before the registry existed.")
+                except (RegistryError, OSError):
+                    if not self.versions():  # Lost a race with another process bootstrapping: fine
+                        raise
+            self.activate(self.versions()[-1].version)
+
+    def load(self, version: str):
+        """Loads a version's pipeline after verifying its checksum."""
+        path = self.artifact_path(version)
+        manifest = self.manifest(version)
+        if file_sha256(path) != manifest.sha256:
+            raise RegistryError(f"Checksum mismatch for model version {version}: {path}")
+        from app_modules.compiled_model import load_for_serving  # Compiled or memory-mapped, per environment
+        return load_for_serving(path)
+
+
+def get_registry() -> ModelRegistry:
+    """The default registry, bootstrapped from MODEL_PATH on first use."""
+    registry = ModelRegistry()
+    registry.ensure_bootstrapped()
+    return registry
+
+
+# --- HOT-SWAPPABLE ENGINE ---
+
+class HotSwapEngine:
+    """A ScoringEngine stand-in whose pipeline follows the registry's ACTIVE version.
+
+    `score()` reads the current engine once per call, so a batch is always
+    scored (and labelled) by a single version. Other attributes are delegated
+    to the current engine.
+    """
+
+    def __init__(self, registry: ModelRegistry | None = None, threshold_policy=None, velocity_store=None,
+                 version: str | None = None, shadow=None, score_cache=None, drift_monitor=None):
+        self.registry = registry or get_registry()
+        self.threshold_policy = threshold_policy
+        self.velocity_store = velocity_store
+        self.shadow = shadow  # Carried over to every swapped-in engine
+        self.score_cache = score_cache  # Shared by every engine, cleared on each swap
+        self.drift_monitor = drift_monitor  # Shared by every engine (risk_score sketches span swaps)
+        self._swap_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self.swaps: list[dict] = []  # History: version, load/warm-up seconds, time
+        self._failed_version: str | None = None  # Not retried until ACTIVE points elsewhere
+        self._engine = self._build(version or self.registry.active_version())
+
+    def _build(self, version: str):
+        from app_modules.scoring_engine import ScoringEngine, ThresholdPolicy
+        started = time.perf_counter()
+        pipeline = self.registry.load(version)
+        load_seconds = time.perf_counter() - started
+        engine = ScoringEngine(pipeline, self.threshold_policy or ThresholdPolicy.from_env(),
+                               velocity_store=self.velocity_store, model_version=version, shadow=self.shadow,
+                               score_cache=self.score_cache, drift_monitor=self.drift_monitor)
+        warm_up_seconds = engine.warm_up()  # Also fails fast if the feature schema does not fit
+        self.swaps.append({"version": version, "load_seconds": load_seconds, "warm_up_seconds": warm_up_seconds,
+                           "at": datetime.datetime.utcnow().isoformat(timespec="seconds")})
+        return engine
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def model_version(self) -> str:
+        return self._engine.model_version
+
+    def score(self, records):
+        return self._engine.score(records)
+
+    def __getattr__(self, name):
+        if name == "_engine":  # Not built yet (e.g. during __init__)
+            raise AttributeError(name)
+        return getattr(self._engine, name)
+
+    def swap_to(self, version: str) -> bool:
+        """Loads and warms `version`, then switches traffic to it; keeps the old one on failure."""
+        with self._swap_lock:
+            if version == self._engine.model_version:
+                return False
+            try:
+                new_engine = self._build(version)
+            except Exception as e:
+                self._failed_version = version
+                print(f"⚠️ Model swap to {version} failed, still serving {self._engine.model_version}: {e}")
+                return False
+            self._engine = new_engine  # Single reference assignment: atomic for concurrent readers
+            self._failed_version = None
+            if self.score_cache is not None:
+                self.score_cache.clear()  # Keys carry the version too; this just frees the old entries
+            print(f"✅ Now serving model version {version}")
+            return True
+
+    def check_for_update(self) -> bool:
+        active = self.registry.active_version()
+        return active is not None and active != self._failed_version and self.swap_to(active)
+
+    def start_watching(self, interval: float | None = None):
+        """Polls the registry's ACTIVE pointer on a daemon thread."""
+        if self._watcher is not None:
+            return self
+        interval = float(interval if interval is not None
+                         else os.environ.get(POLL_INTERVAL_ENV_VAR, DEFAULT_POLL_INTERVAL))
+
+        def _watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_update()
+                except Exception as e:
+                    print(f"⚠️ Model registry poll failed: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse model registry")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Show registered versions")
+    register_parser = subparsers.add_parser("register", help="Add a pickled pipeline as a new version")
+    register_parser.add_argument("pipeline_path")
+    register_parser.add_argument("--version", default=None)
+    register_parser.add_argument("--metrics", default=None, help="JSON file with evaluation metrics")
+    register_parser.add_argument("--notes", default="")
+    register_parser.add_argument("--activate", action="store_true")
+    activate_parser = subparsers.add_parser("activate", help="Switch serving traffic to a version")
+    activate_parser.add_argument("version")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    if args.command == "list":
+        active = registry.active_version()
+        for manifest in registry.versions():
+            marker = "*" if manifest.version == active else " "
+            print(f"{marker} {manifest.version:<32} {manifest.created_at}  sha256={manifest.sha256[:12]}  "
+                  f"metrics={json.dumps(manifest.metrics)}")
+    elif args.command == "register":
+        metrics = None
+        if args.metrics:
+            with open(args.metrics) as f:
+                metrics = json.load(f)
+        manifest = registry.register(args.pipeline_path, args.version, metrics, args.notes, args.activate)
+        print(f"✅ Registered {manifest.version}{' (active)' if args.activate else ''}")
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"✅ Activated {args.version}; serving processes switch after pre-warming it.")
+
+
+if __name__ == "__main__":
+    main()
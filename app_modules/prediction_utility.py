@@ -2,27 +2,15 @@
 
 import streamlit as st
 import pandas as pd
-from sqlalchemy.orm import Session
-from database.database_connector import get_db
-from database.models import PredictionLog 
-import numpy as np
-
-# --- HELPER FUNCTION: Feature Engineering ---
-
-def feature_engineer_input(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Applies the custom feature engineering logic to raw input data."""
-    
-    input_df["balanceDiffOrig"] = input_df["oldbalanceOrg"] - input_df["newbalanceOrig"]
-    input_df["balanceDiffDest"] = input_df["newbalanceDest"] - input_df["oldbalanceDest"]
-    input_df["is_merchant"] = input_df["nameDest"].str.startswith('M').astype(int)
-    input_df['Orig_Count_1step'] = 0 
-    
-    return input_df
+import altair as alt
+from database.log_writer import get_log_writer, prediction_log_row
+from app_modules.features import engineer_frame
 
+# Feature engineering lives in app_modules/features.py (shared with training and batch scoring)
 
 # --- MAIN PAGE FUNCTION ---
-# FIX: Function MUST accept the 'model' argument
-def prediction_page(model): 
+# FIX: Function MUST accept the scoring engine (app_modules/scoring_engine.py) built in app.py
+def prediction_page(engine): 
     st.header("Real-Time Risk Assessment Utility")
     st.markdown("Enter the 9 required raw transaction parameters below to test the Stacking Ensemble Model.")
     st.divider()
@@ -48,44 +36,33 @@ def prediction_page(model):
         oldbalanceDest = c8.number_input("Old Balance (Receiver)", min_value=0.0, value=100.0)
         newbalanceDest = c9.number_input("New Balance (Receiver)", min_value=0.0, value=10099.0)
 
+        explain = st.checkbox("Explain the score (always shown for FRAUD flags)", value=False)
         submitted = st.form_submit_button("PREDICT RISK")
 
         if submitted:
-            # 1. Create Raw Data Frame
-            input_data = pd.DataFrame([{
+            # 1. Raw Transaction Record
+            input_record = {
                 "type": transaction_type, "amount": amount, "oldbalanceOrg": oldbalanceOrg, 
                 "newbalanceOrig": newbalanceOrig, "oldbalanceDest": oldbalanceDest, 
                 "newbalanceDest": newbalanceDest, "step": step, "nameOrig": nameOrig, 
                 "nameDest": nameDest, "isFlaggedFraud": 0
-            }])
+            }
             
-            # 2. Feature Engineering
-            input_data_fe = feature_engineer_input(input_data)
-            
-            # 3. Final Feature Selection 
-            X_predict = input_data_fe.drop(columns=['nameOrig', 'nameDest', 'isFlaggedFraud', 'step'])
-
-            # 4. Prediction
-            prediction = model.predict(X_predict)[0] 
-            risk_score = model.predict_proba(X_predict)[0][1]
-
-            # --- 5. LOGGING THE PREDICTION ---
-            try:
-                db_generator = get_db()
-                db: Session = next(db_generator)
-                
-                new_log = PredictionLog(
-                    transaction_type=transaction_type, amount=amount, oldbalanceOrg=oldbalanceOrg, 
-                    newbalanceOrig=newbalanceOrig, risk_score=risk_score, predicted_class=int(prediction)
-                )
-                db.add(new_log)
-                db.commit()
-                st.info("✅ Prediction logged successfully to database.")
-            except Exception as e:
-                st.warning(f"⚠️ Could not log prediction to DB. Error: {e}")
-            finally:
-                if 'db' in locals() and db:
-                    db.close()
+            # 2-4. Feature Engineering + single-pass Prediction (class comes from the threshold policy)
+            result = engine.score(input_record)
+            prediction, risk_score = result.predicted_class, result.risk_score
+
+            # --- 5. LOGGING THE PREDICTION (write-behind: queued here, bulk-inserted in the background) ---
+            # The full raw row plus the velocity count the model saw, so the prediction can be rescored
+            scored_record = dict(input_record, Orig_Count_1step=result.orig_count)
+            queued = get_log_writer().submit(prediction_log_row(
+                scored_record, risk_score, prediction,
+                result.model_version,  # The registry version that actually scored it
+            ))
+            if queued:
+                st.info("✅ Prediction queued for logging to database.")
+            else:
+                st.warning("⚠️ Prediction log queue is full; this prediction was not logged.")
 
 
             # 6. Display Results
@@ -94,4 +71,42 @@ def prediction_page(model):
             if prediction == 1:
                 st.error(f"🚨 FLAG: High Risk. Probability: {risk_score:.4f} (Precision: 89%)")
             else:
-                st.success(f"✅ APPROVED. Risk Score: {risk_score:.4f}")
\ No newline at end of file
+                st.success(f"✅ APPROVED. Risk Score: {risk_score:.4f}")
+
+            # 7. Explanation (after scoring and logging, so it never delays either)
+            if prediction == 1 or explain:
+                show_explanation(scored_record, result.model_version)
+
+
+# --- EXPLANATION ---
+def show_explanation(record: dict, model_version: str):
+    """Per-feature contributions behind one score, as a chart and the top three reasons.
+
+    `record` carries the Orig_Count_1step the model was given (ScoreResult.orig_count).
+    """
+    try:
+        from app_modules.explanations import get_explainer, top_reasons
+
+        features = engineer_frame(pd.DataFrame([record]))
+        explanation = get_explainer(model_version).explain(features)
+    except Exception as e:
+        st.warning(f"⚠️ Explanation unavailable for model {model_version}: {e}")
+        return
+
+    contributions = explanation.contributions.iloc[0]
+    chart_data = pd.DataFrame({"Feature": contributions.index, "Contribution": contributions.to_numpy(),
+                               "Value": [str(features[f].iloc[0]) for f in contributions.index]})
+    chart = alt.Chart(chart_data).mark_bar().encode(
+        x=alt.X("Contribution", title="Contribution to fraud log-odds"),
+        y=alt.Y("Feature", sort=alt.EncodingSortField("Contribution", op="sum", order="descending")),
+        color=alt.condition(alt.datum.Contribution > 0, alt.value("red"), alt.value("seagreen")),
+        tooltip=["Feature", "Value", alt.Tooltip("Contribution", format="+.3f")],
+    )
+
+    st.subheader("Why this score?")
+    reasons = [f"**{feature}** ({'raises' if value > 0 else 'lowers'} risk, {value:+.2f})"
+               for feature, value in top_reasons(explanation)]
+    st.markdown("Top drivers: " + "; ".join(reasons))
+    st.altair_chart(chart, use_container_width=True)
+    st.caption(f"Contributions are in log-odds relative to a base value of {explanation.base_value[0]:+.2f} "
+               f"(model {model_version}).")
\ No newline at end of file
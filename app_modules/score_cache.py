@@ -0,0 +1,133 @@
+# app_modules/score_cache.py (Memoized Single-Transaction Scores)
+"""LRU + TTL cache of fraud probabilities in front of the model.
+
+Streamlit reruns and analysts resubmitting a transaction would otherwise run the
+whole pipeline again for a feature vector it has just scored. Keys are a
+canonical hash of the model version, the transaction type and the engineered
+numeric features (NUMERIC_FEATURES order, so the record and DataFrame paths
+agree). With a velocity store the sender and step stand in for the velocity
+count, which is only recorded on a miss: a resubmission hits and is not counted
+again. Values are the probability and the velocity count it was scored with, not
+the class, so threshold changes still apply.
+
+The cache is bounded by entry count and by (approximate) bytes, entries expire
+after a TTL, and HotSwapEngine clears it when it swaps model versions.
+
+Configuration (environment):
+    FRAUDPULSE_SCORE_CACHE_ENTRIES   max entries (default 10000; 0 disables the cache)
+    FRAUDPULSE_SCORE_CACHE_MB        max memory in MB (default 4)
+    FRAUDPULSE_SCORE_CACHE_TTL       seconds an entry stays valid (default 900)
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# --- CONFIGURATION ---
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_MB = 4.0
+DEFAULT_TTL_SECONDS = 900.0
+ENTRIES_ENV_VAR = "FRAUDPULSE_SCORE_CACHE_ENTRIES"
+MAX_MB_ENV_VAR = "FRAUDPULSE_SCORE_CACHE_MB"
+TTL_ENV_VAR = "FRAUDPULSE_SCORE_CACHE_TTL"
+
+_KEY_BYTES = 16
+# Key bytes object + (score, count, expiry) tuple and its values + the OrderedDict's per-entry node
+_ENTRY_BYTES = (sys.getsizeof(b"\0" * _KEY_BYTES) + sys.getsizeof((0.0, 0, 0.0)) + 2 * sys.getsizeof(0.0)
+                + sys.getsizeof(0) + 104)
+
+
+def feature_key(model_version: str | None, transaction_type: str, numeric: np.ndarray,
+                sender: tuple[str, int] | None = None) -> bytes:
+    """Canonical hash of one engineered feature vector for a model version.
+
+    `sender` is (nameOrig, step) when the velocity count is not part of `numeric` yet.
+    """
+    values = np.asarray(numeric, dtype=np.float64) + 0.0  # Folds -0.0 into 0.0
+    values[np.isnan(values)] = np.nan                     # One NaN bit pattern
+    digest = hashlib.blake2b(digest_size=_KEY_BYTES)
+    digest.update(str(model_version).encode())
+    digest.update(b"\0")
+    digest.update(str(transaction_type).encode())
+    digest.update(b"\0")
+    digest.update(values.tobytes())
+    if sender is not None:
+        digest.update(b"\0")
+        digest.update(f"{sender[0]}\0{int(sender[1])}".encode())
+    return digest.digest()
+
+
+class ScoreCache:
+    """Thread-safe LRU cache of (risk score, velocity count) pairs with a TTL, an entry limit and a byte limit."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = int(DEFAULT_MAX_MB * 2**20),
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = min(max_entries, max(1, max_bytes // _ENTRY_BYTES))
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, tuple[float, int, float]] = OrderedDict()  # key -> (score, count, expires_at)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: bytes) -> tuple[float, int] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0], entry[1]
+
+    def put(self, key: bytes, risk_score: float, orig_count: int = 0):
+        with self._lock:
+            self._entries[key] = (float(risk_score), int(orig_count), time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        """Drops every entry (e.g. after a model swap)."""
+        with self._lock:
+            self._entries.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return dict(self._counters, entries=len(self._entries), bytes=len(self._entries) * _ENTRY_BYTES,
+                        max_entries=self.max_entries, max_bytes=self.max_bytes, ttl_seconds=self.ttl_seconds,
+                        hit_rate=self._counters["hits"] / lookups if lookups else 0.0)
+
+
+# --- PROCESS-WIDE CACHE ---
+_shared_cache: ScoreCache | None = None
+_shared_initialized = False
+_shared_lock = threading.Lock()
+
+
+def get_score_cache() -> ScoreCache | None:
+    """The configured process-wide cache used by the Streamlit app, or None when disabled."""
+    global _shared_cache, _shared_initialized
+    with _shared_lock:
+        if not _shared_initialized:
+            _shared_initialized = True
+            max_entries = int(os.environ.get(ENTRIES_ENV_VAR, DEFAULT_MAX_ENTRIES))
+            if max_entries > 0:
+                _shared_cache = ScoreCache(
+                    max_entries,
+                    int(float(os.environ.get(MAX_MB_ENV_VAR, DEFAULT_MAX_MB)) * 2**20),
+                    float(os.environ.get(TTL_ENV_VAR, DEFAULT_TTL_SECONDS)),
+                )
+        return _shared_cache
@@ -0,0 +1,231 @@
+# app_modules/scoring_engine.py (Single-Pass Scoring Engine)
+"""One entry point for scoring raw transactions with the deployment pipeline.
+
+`ScoringEngine.score()` runs feature engineering and a single predict_proba
+pass, then derives the class from a `ThresholdPolicy` instead of calling
+`predict()` (which would run the whole model a second time). With a shadow
+scorer attached, the engineered rows are also handed (non-blocking) to a
+challenger model (app_modules/shadow_scoring.py).
+
+A single dict scored by the compiled evaluator (FRAUDPULSE_COMPILED_SCORER=1)
+takes the record path of app_modules/features.py and never builds a DataFrame.
+With a score cache attached, single dicts whose engineered features were scored
+recently by the same model version skip the model, and a resubmitted transaction
+is not counted towards its sender again (app_modules/score_cache.py).
+With a drift monitor attached, every scored row updates its constant-size
+sketches (app_modules/drift_monitor.py).
+"""
+
+import json
+import os
+import time
+from collections.abc import Mapping
+from functools import partial
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from app_modules.features import NUMERIC_FEATURES, engineer_frame, engineer_record, features_frame
+from app_modules.score_cache import ScoreCache, feature_key
+from app_modules.velocity_store import VelocityStore
+
+
+# --- CONFIGURATION ---
+DEFAULT_THRESHOLD = 0.5  # Matches XGBClassifier.predict (flag when probability > 0.5)
+THRESHOLD_ENV_VAR = "FRAUDPULSE_DECISION_THRESHOLD"
+TYPE_THRESHOLDS_ENV_VAR = "FRAUDPULSE_TYPE_THRESHOLDS"  # JSON, e.g. '{"TRANSFER": 0.4}'
+
+_COUNT_INDEX = NUMERIC_FEATURES.index("Orig_Count_1step")
+
+# Representative raw transaction used only for warm-up predictions
+WARM_UP_RECORD = {
+    "type": "TRANSFER", "amount": 181.0, "oldbalanceOrg": 181.0, "newbalanceOrig": 0.0,
+    "oldbalanceDest": 0.0, "newbalanceDest": 0.0, "step": 1,
+    "nameOrig": "C0000000000", "nameDest": "C0000000001",
+}
+
+
+class ThresholdPolicy:
+    """Decision thresholds: one global value with optional per-transaction-type overrides."""
+
+    def __init__(self, default: float = DEFAULT_THRESHOLD, per_type: dict[str, float] | None = None):
+        self.default = float(default)
+        self.per_type = {str(k): float(v) for k, v in (per_type or {}).items()}
+
+    @classmethod
+    def from_env(cls) -> "ThresholdPolicy":
+        """Builds a policy from FRAUDPULSE_DECISION_THRESHOLD / FRAUDPULSE_TYPE_THRESHOLDS."""
+        default = float(os.environ.get(THRESHOLD_ENV_VAR, DEFAULT_THRESHOLD))
+        per_type = json.loads(os.environ.get(TYPE_THRESHOLDS_ENV_VAR, "{}") or "{}")
+        return cls(default, per_type)
+
+    def threshold_for(self, transaction_type: str) -> float:
+        return self.per_type.get(transaction_type, self.default)
+
+    def thresholds_for(self, transaction_types) -> np.ndarray:
+        thresholds = np.full(len(transaction_types), self.default)
+        if self.per_type:
+            types = np.asarray(transaction_types, dtype=object)
+            for transaction_type, threshold in self.per_type.items():
+                thresholds[types == transaction_type] = threshold
+        return thresholds
+
+    def __repr__(self):
+        return f"ThresholdPolicy(default={self.default}, per_type={self.per_type})"
+
+
+class ScoreResult(NamedTuple):
+    """Scalars for a single record, NumPy arrays for a batch."""
+    risk_score: float | np.ndarray
+    predicted_class: int | np.ndarray
+    threshold: float | np.ndarray
+    model_version: str | None = None  # Registry version of the pipeline that produced the scores
+    orig_count: int | np.ndarray | None = None  # Orig_Count_1step the model was given
+
+
+class ScoringEngine:
+    """Wraps a fitted pipeline with feature engineering and a threshold policy."""
+
+    def __init__(self, pipeline, threshold_policy: ThresholdPolicy | None = None,
+                 velocity_store: VelocityStore | None = None, model_version: str | None = None,
+                 shadow=None, score_cache: ScoreCache | None = None, drift_monitor=None):
+        self.pipeline = pipeline
+        self.threshold_policy = threshold_policy or ThresholdPolicy.from_env()
+        self.velocity_store = velocity_store
+        self.model_version = model_version
+        self.shadow = shadow  # ShadowScorer or None
+        self.score_cache = score_cache  # Single-dict scores only; batches always run the model
+        self.drift_monitor = drift_monitor  # DriftMonitor or None
+        self.feature_names = list(pipeline.feature_names_in_)
+        self._record_path = getattr(pipeline, "supports_numeric_path", False)
+
+    def prepare(self, records) -> pd.DataFrame:
+        """Turns a dict, a list of dicts or a DataFrame of raw transactions into engineered features."""
+        if isinstance(records, Mapping):
+            frame = pd.DataFrame([records])
+        elif isinstance(records, pd.DataFrame):
+            frame = records
+        else:
+            frame = pd.DataFrame(list(records))
+        return engineer_frame(frame, velocity_store=self.velocity_store)
+
+    def predict_proba(self, features: pd.DataFrame) -> np.ndarray:
+        """Fraud probability for already-engineered features (one pipeline pass)."""
+        return self.pipeline.predict_proba(features[self.feature_names])[:, 1]
+
+    def _predict_frame(self, features: pd.DataFrame) -> np.ndarray:
+        """predict_proba for rows whose velocity was just recorded; only scored rows keep their count."""
+        try:
+            return self.predict_proba(features)
+        except Exception:
+            if "nameOrig" in features:
+                self._forget_velocity(features["nameOrig"].to_numpy(), features["step"].to_numpy())
+            raise
+
+    def warm_up(self, batch_sizes=(1, 64)) -> float:
+        """Runs throwaway predictions so the first real one skips one-time costs; returns seconds.
+
+        Bypasses the velocity store so warm-up rows never count towards a sender.
+        """
+        started = time.perf_counter()
+        for size in batch_sizes:
+            features = engineer_frame(pd.DataFrame([WARM_UP_RECORD] * size))
+            risk_scores = self.predict_proba(features)
+            self.threshold_policy.thresholds_for(features["type"].to_numpy()) < risk_scores
+        if self._record_path:
+            self.pipeline.predict_proba_numeric(WARM_UP_RECORD["type"], engineer_record(WARM_UP_RECORD))
+        return time.perf_counter() - started
+
+    def _cache_key(self, record: Mapping, numeric: np.ndarray) -> bytes:
+        """Score-cache key of a record whose velocity count has not been recorded yet."""
+        if self.velocity_store is None:
+            return feature_key(self.model_version, record["type"], numeric)
+        numeric = numeric.copy()
+        numeric[_COUNT_INDEX] = 0.0  # Keyed by sender and step instead
+        return feature_key(self.model_version, record["type"], numeric, sender=(record["nameOrig"], record["step"]))
+
+    def _record_velocity(self, record: Mapping, default: float) -> float:
+        if self.velocity_store is None:
+            return default
+        return self.velocity_store.record(record["nameOrig"], record["step"])
+
+    def _forget_velocity(self, names_orig, steps):
+        """Takes back velocity counts recorded for rows whose scoring then failed."""
+        if self.velocity_store is not None:
+            self.velocity_store.forget_batch(names_orig, steps)
+
+    def _predict_numeric(self, record: Mapping, numeric: np.ndarray) -> float:
+        try:
+            return self.pipeline.predict_proba_numeric(record["type"], numeric)
+        except Exception:
+            self._forget_velocity([record["nameOrig"]], [record["step"]])
+            raise
+
+    def score_record(self, record: Mapping) -> ScoreResult:
+        """Single-transaction fast path: dict -> feature array -> compiled model, no DataFrame."""
+        started = time.perf_counter()
+        transaction_type = record["type"]
+        if self.score_cache is None:
+            numeric = engineer_record(record, velocity_store=self.velocity_store)
+            risk_score = self._predict_numeric(record, numeric)
+        else:
+            # Look up before recording velocity, so a resubmission neither misses nor counts twice
+            numeric = engineer_record(record)
+            key = self._cache_key(record, numeric)
+            cached = self.score_cache.get(key)
+            if cached is not None:
+                risk_score, numeric[_COUNT_INDEX] = cached
+            else:
+                numeric[_COUNT_INDEX] = self._record_velocity(record, numeric[_COUNT_INDEX])
+                risk_score = self._predict_numeric(record, numeric)
+                self.score_cache.put(key, risk_score, int(numeric[_COUNT_INDEX]))
+        threshold = self.threshold_policy.threshold_for(transaction_type)
+        predicted = int(risk_score > threshold)
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(transaction_type, numeric, risk_score)
+
+        if self.shadow is not None:  # The shadow worker builds the frame, off the request path
+            self.shadow.submit(partial(features_frame, [transaction_type], numeric), np.array([risk_score]),
+                               np.array([predicted], dtype=np.int8), np.array([threshold]), self.model_version,
+                               time.perf_counter() - started)
+        return ScoreResult(risk_score, predicted, threshold, self.model_version, int(numeric[_COUNT_INDEX]))
+
+    def _cached_score_frame(self, record: Mapping) -> tuple[pd.DataFrame, np.ndarray]:
+        """Engineered one-row frame and its risk score for a dict, through the score cache."""
+        features = engineer_frame(pd.DataFrame([record]))
+        key = self._cache_key(record, features[NUMERIC_FEATURES].to_numpy(dtype=np.float64)[0])
+        cached = self.score_cache.get(key)
+        if cached is not None:
+            features["Orig_Count_1step"] = cached[1]
+            return features, np.array([cached[0]])
+        features["Orig_Count_1step"] = self._record_velocity(record, features["Orig_Count_1step"].iat[0])
+        risk_scores = self._predict_frame(features)
+        self.score_cache.put(key, risk_scores[0], int(features["Orig_Count_1step"].iat[0]))
+        return features, risk_scores
+
+    def score(self, records) -> ScoreResult:
+        """Scores one record (dict) or many (list of dicts / DataFrame) in a single pass."""
+        if self._record_path and isinstance(records, Mapping):
+            return self.score_record(records)
+        started = time.perf_counter()
+        if self.score_cache is not None and isinstance(records, Mapping):
+            features, risk_scores = self._cached_score_frame(records)
+        else:
+            features = self.prepare(records)
+            risk_scores = self._predict_frame(features)
+        thresholds = self.threshold_policy.thresholds_for(features["type"].to_numpy())
+        predicted = (risk_scores > thresholds).astype(np.int8)
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe_batch(features["type"].to_numpy(),
+                                             features[NUMERIC_FEATURES].to_numpy(dtype=np.float64), risk_scores)
+
+        if self.shadow is not None:
+            self.shadow.submit(features, risk_scores, predicted, thresholds, self.model_version,
+                               time.perf_counter() - started)
+
+        orig_counts = features["Orig_Count_1step"].to_numpy()
+        if isinstance(records, Mapping):
+            return ScoreResult(float(risk_scores[0]), int(predicted[0]), float(thresholds[0]), self.model_version,
+                               int(orig_counts[0]))
+        return ScoreResult(risk_scores, predicted, thresholds, self.model_version, orig_counts)
@@ -0,0 +1,388 @@
+# app_modules/scoring_service.py (Micro-Batching HTTP Scoring Service)
+"""Local HTTP scoring endpoint that runs alongside the Streamlit UI.
+
+Usage (from the project root):
+    python -m app_modules.scoring_service [--port 8600] [--max-batch-size 64] [--max-wait-ms 5]
+                                          [--log-predictions]
+
+Endpoints:
+    POST /predict  JSON object or list of objects with the raw transaction fields
+    GET  /stats    queue-depth and batch-size statistics
+    GET  /health   liveness probe
+
+Concurrent requests that arrive within `max_wait_ms` of each other are stacked
+into a single DataFrame and scored with one predict_proba call. Bodies are
+validated and coerced before they are queued, and if a stacked batch still
+fails its requests are retried one by one, so only the failing one errors. With
+--log-predictions every scored row is also queued on the write-behind
+PredictionLog writer, like predictions made in the UI. The same
+`MicroBatcher` is exposed as an ASGI app (`create_asgi_app`) for uvicorn users;
+the default server is the standard-library ThreadingHTTPServer.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# --- Add project root to path so 'database' and 'app_modules' resolve when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.drift_monitor import get_drift_monitor
+from app_modules.features import RAW_NUMERIC, TRANSACTION_TYPES
+from app_modules.model_loader import RAW_INPUT_FIELDS
+from app_modules.model_registry import HotSwapEngine, get_registry
+from app_modules.scoring_engine import ThresholdPolicy
+from app_modules.shadow_scoring import get_shadow_scorer
+from app_modules.velocity_store import get_velocity_store
+
+
+# --- CONFIGURATION ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+
+
+class InvalidRequest(ValueError):
+    """Raised when a request body cannot be turned into transaction records."""
+
+
+def _number(record: dict, field: str) -> float:
+    value = record[field]
+    if isinstance(value, bool):
+        raise InvalidRequest(f"Field '{field}' must be a number.")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise InvalidRequest(f"Field '{field}' must be a number.") from None
+    if not math.isfinite(number):
+        raise InvalidRequest(f"Field '{field}' must be finite.")
+    return number
+
+
+def parse_records(payload) -> list[dict]:
+    """Validates a decoded JSON body (one object or a list of objects) and coerces its fields.
+
+    Anything the model could not score is rejected here, before it is queued
+    next to other requests.
+    """
+    records = payload if isinstance(payload, list) else [payload]
+    if not records:
+        raise InvalidRequest("Request contains no transactions.")
+    parsed = []
+    for record in records:
+        if not isinstance(record, dict):
+            raise InvalidRequest("Each transaction must be a JSON object.")
+        missing = [field for field in RAW_INPUT_FIELDS if field not in record]
+        if missing:
+            raise InvalidRequest(f"Missing fields: {', '.join(missing)}")
+        if record["type"] not in TRANSACTION_TYPES:
+            raise InvalidRequest(f"Field 'type' must be one of: {', '.join(TRANSACTION_TYPES)}")
+        for field in ("nameOrig", "nameDest"):
+            if not isinstance(record[field], str):
+                raise InvalidRequest(f"Field '{field}' must be a string.")
+        step = _number(record, "step")
+        if not step.is_integer():
+            raise InvalidRequest("Field 'step' must be an integer.")
+        parsed.append(dict(record, step=int(step), **{field: _number(record, field) for field in RAW_NUMERIC}))
+    return parsed
+
+
+def build_engine(model_path: str | None = None) -> HotSwapEngine:
+    """Scoring engine over the active registry version (or the version registered for `model_path`).
+
+    The engine follows later activations in the registry without a restart.
+    """
+    registry = get_registry()
+    version = None
+    if model_path is not None:
+        version = registry.version_for_file(model_path) or registry.register(model_path).version
+    engine = HotSwapEngine(registry, ThresholdPolicy.from_env(), velocity_store=get_velocity_store(),
+                           version=version, shadow=get_shadow_scorer(), drift_monitor=get_drift_monitor("scoring_service"))
+    return engine if model_path is not None else engine.start_watching()
+
+
+# --- MICRO-BATCHER ---
+
+class MicroBatcher:
+    """Collects concurrent scoring requests and scores them with one predict_proba call.
+
+    A background thread takes the first pending request, then keeps collecting
+    until `max_batch_size` rows are gathered or `max_wait_ms` has elapsed.
+    """
+
+    def __init__(self, engine: HotSwapEngine, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, log_writer=None):
+        self.engine = engine
+        self.log_writer = log_writer  # PredictionLogWriter, or None to skip prediction_logs
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._rows = 0
+        self._peak_queue_depth = 0
+        self._busy_seconds = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, records: list[dict]) -> Future:
+        """Queues records for scoring; the future resolves to a list of result dicts."""
+        future = Future()
+        self._queue.put((records, future))
+        with self._stats_lock:
+            self._requests += 1
+            self._peak_queue_depth = max(self._peak_queue_depth, self._queue.qsize())
+        return future
+
+    def score(self, records: list[dict], timeout: float | None = None) -> list[dict]:
+        return self.submit(records).result(timeout)
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the size or time limit."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, rows = [first], len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped.set()
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if batch is None:
+                break
+            self._score_batch(batch)
+
+    def _score_stacked(self, batch):
+        """Scores every request of `batch` in one pass and resolves their futures."""
+        stacked = pd.DataFrame([record for records, _ in batch for record in records])
+        result = self.engine.score(stacked)
+
+        offset = 0
+        for records, future in batch:
+            end = offset + len(records)
+            future.set_result([
+                {"risk_score": float(score), "predicted_class": int(predicted), "model_version": result.model_version}
+                for score, predicted in zip(result.risk_score[offset:end], result.predicted_class[offset:end])
+            ])
+            offset = end
+        return stacked, result
+
+    def _score_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            scored = [self._score_stacked(batch)]
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # One failing request must not fail the others: score each on its own
+            scored = []
+            for item in batch:
+                try:
+                    scored.append(self._score_stacked([item]))
+                except Exception as item_exc:
+                    item[1].set_exception(item_exc)
+
+        for stacked, result in scored:
+            if self.log_writer is not None:
+                self._log(stacked, result)
+        with self._stats_lock:
+            for stacked, _ in scored:
+                self._batch_sizes[len(stacked)] += 1
+                self._rows += len(stacked)
+            self._busy_seconds += time.perf_counter() - started
+
+    def _log(self, stacked: pd.DataFrame, result):
+        # `stacked` was engineered in place, so it carries the Orig_Count_1step the model saw
+        from database.log_writer import prediction_log_rows
+
+        for row in prediction_log_rows(stacked, result.risk_score, result.predicted_class, result.model_version):
+            self.log_writer.submit(row)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "peak_queue_depth": self._peak_queue_depth,
+                "requests": self._requests,
+                "rows_scored": self._rows,
+                "batches": batches,
+                "mean_batch_size": self._rows / batches if batches else 0.0,
+                "max_batch_size_seen": max(self._batch_sizes, default=0),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "scoring_seconds": self._busy_seconds,
+                "config": {"max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000.0},
+                "model_version": self.engine.model_version,
+                "shadow": self.engine.shadow.summary() if self.engine.shadow is not None else None,
+                "log_writer": self.log_writer.stats() if self.log_writer is not None else None,
+            }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+# --- STANDARD-LIBRARY HTTP SERVER ---
+
+class _ScoringHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Default listen backlog (5) resets bursts of concurrent clients
+
+
+def _make_handler(batcher: MicroBatcher):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send_json(200, batcher.stats())
+            elif self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._send_json(400, {"error": "Invalid Content-Length header."})
+                return
+            try:
+                records = parse_records(json.loads(self.rfile.read(length) or b"null"))
+            except (InvalidRequest, ValueError) as exc:  # Also JSON and UTF-8 decoding errors
+                self._send_json(400, {"error": str(exc)})
+                return
+            try:
+                self._send_json(200, {"predictions": batcher.score(records)})
+            except Exception as exc:
+                self._send_json(500, {"error": str(exc)})
+
+        def log_message(self, format, *args):
+            pass  # Keep the request path quiet; use /stats for observability
+
+    return ScoringHandler
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, model_path: str | None = None,
+          max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+          log_predictions: bool = False):
+    log_writer = None
+    if log_predictions:
+        from database.log_writer import get_log_writer
+        log_writer = get_log_writer()
+    batcher = MicroBatcher(build_engine(model_path), max_batch_size, max_wait_ms, log_writer)
+    server = _ScoringHTTPServer((host, port), _make_handler(batcher))
+    print(f"✅ FraudPulse scoring service listening on http://{host}:{port} "
+          f"(max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+# --- ASGI APPLICATION (optional, e.g. `uvicorn --factory app_modules.scoring_service:create_asgi_app`) ---
+
+def create_asgi_app(batcher: MicroBatcher | None = None):
+    """Returns an ASGI callable serving the same endpoints as the threaded server."""
+    batcher = batcher or MicroBatcher(build_engine())
+
+    async def _send_json(send, status: int, body):
+        data = json.dumps(body).encode("utf-8")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": data})
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        method, path = scope["method"], scope["path"]
+
+        if method == "GET" and path == "/stats":
+            await _send_json(send, 200, batcher.stats())
+        elif method == "GET" and path == "/health":
+            await _send_json(send, 200, {"status": "ok"})
+        elif method == "POST" and path == "/predict":
+            body, more_body = b"", True
+            while more_body:
+                message = await receive()
+                body += message.get("body", b"")
+                more_body = message.get("more_body", False)
+            try:
+                records = parse_records(json.loads(body or b"null"))
+            except (InvalidRequest, ValueError) as exc:  # Also JSON and UTF-8 decoding errors
+                await _send_json(send, 400, {"error": str(exc)})
+                return
+            try:
+                predictions = await asyncio.wrap_future(batcher.submit(records))
+                await _send_json(send, 200, {"predictions": predictions})
+            except Exception as exc:
+                await _send_json(send, 500, {"error": str(exc)})
+        else:
+            await _send_json(send, 404, {"error": "Not found"})
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse micro-batching scoring service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--model-path", default=None,
+                        help="Pin this pipeline file (default: follow the registry's active version)")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--log-predictions", action="store_true", help="Write every scored row to prediction_logs")
+    args = parser.parse_args(argv)
+
+    serve(args.host, args.port, args.model_path, args.max_batch_size, args.max_wait_ms, args.log_predictions)
+
+
+if __name__ == "__main__":
+    main()
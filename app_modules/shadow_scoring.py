@@ -0,0 +1,243 @@
+# app_modules/shadow_scoring.py (Champion / Challenger Shadow Scoring)
+"""Scores live traffic with a challenger pipeline without touching request latency.
+
+After the champion has scored a batch, `ScoringEngine.score` hands the
+engineered feature rows to `ShadowScorer.submit`, which only does a
+`put_nowait` on a bounded queue. Worker threads run the challenger on those
+rows, update running agreement / score-delta statistics and queue one
+`shadow_scores` row per transaction on a write-behind writer. When the queue
+is full the batch is shed (counted, never waited for), so a slow challenger
+can fall behind but cannot slow down the live prediction.
+
+Configuration:
+    FRAUDPULSE_SHADOW_MODEL        challenger pickle path or registry version
+                                   (default models/fraud_detection_pipeline.pkl; "" disables)
+    FRAUDPULSE_SHADOW_WORKERS      challenger threads (default 1)
+    FRAUDPULSE_SHADOW_MAX_QUEUE    pending batches before shedding (default 256)
+"""
+
+import atexit
+import math
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from app_modules.model_loader import PROJECT_ROOT, load_pipeline, serving_mmap_mode
+
+
+# --- CONFIGURATION ---
+SHADOW_MODEL_ENV_VAR = "FRAUDPULSE_SHADOW_MODEL"
+SHADOW_WORKERS_ENV_VAR = "FRAUDPULSE_SHADOW_WORKERS"
+SHADOW_MAX_QUEUE_ENV_VAR = "FRAUDPULSE_SHADOW_MAX_QUEUE"
+DEFAULT_SHADOW_MODEL = os.path.join(PROJECT_ROOT, "models", "fraud_detection_pipeline.pkl")
+DEFAULT_SHADOW_WORKERS = 1
+DEFAULT_SHADOW_MAX_QUEUE = 256
+
+
+class ShadowStats:
+    """Running champion/challenger comparison, updated one batch at a time (O(1) memory).
+
+    Score deltas (challenger - champion) use the parallel form of Welford's
+    algorithm so each batch is folded in with vectorized sums.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.agreements = 0
+        self.confusion = np.zeros((2, 2), dtype=np.int64)  # [champion class, challenger class]
+        self._delta_mean = 0.0
+        self._delta_m2 = 0.0
+        self._abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self._champion_ms_sum = 0.0
+        self._challenger_ms_sum = 0.0
+        self.batches = 0
+
+    def update(self, champion_scores, challenger_scores, champion_classes, challenger_classes,
+               champion_ms: float, challenger_ms: float):
+        delta = np.asarray(challenger_scores, dtype=np.float64) - np.asarray(champion_scores, dtype=np.float64)
+        n = len(delta)
+        if n == 0:
+            return
+        batch_mean = float(delta.mean())
+        batch_m2 = float(((delta - batch_mean) ** 2).sum())
+        pairs = np.asarray(champion_classes, dtype=np.int64) * 2 + np.asarray(challenger_classes, dtype=np.int64)
+        counts = np.bincount(pairs, minlength=4).reshape(2, 2)
+
+        with self._lock:
+            total = self.rows + n
+            shift = batch_mean - self._delta_mean
+            self._delta_mean += shift * n / total
+            self._delta_m2 += batch_m2 + shift * shift * self.rows * n / total
+            self.rows = total
+            self.confusion += counts
+            self.agreements += int(counts[0, 0] + counts[1, 1])
+            self._abs_delta_sum += float(np.abs(delta).sum())
+            self.max_abs_delta = max(self.max_abs_delta, float(np.abs(delta).max()))
+            self._champion_ms_sum += champion_ms
+            self._challenger_ms_sum += challenger_ms
+            self.batches += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            rows, batches = self.rows, self.batches
+            return {
+                "rows": rows,
+                "agreement_rate": self.agreements / rows if rows else None,
+                "confusion": self.confusion.tolist(),
+                "mean_score_delta": self._delta_mean if rows else None,
+                "std_score_delta": math.sqrt(self._delta_m2 / (rows - 1)) if rows > 1 else None,
+                "mean_abs_score_delta": self._abs_delta_sum / rows if rows else None,
+                "max_abs_score_delta": self.max_abs_delta,
+                "mean_champion_batch_ms": self._champion_ms_sum / batches if batches else None,
+                "mean_challenger_batch_ms": self._challenger_ms_sum / batches if batches else None,
+            }
+
+
+class ShadowScorer:
+    """Bounded, load-shedding background scoring of a challenger pipeline."""
+
+    def __init__(self, pipeline, version: str, workers: int = DEFAULT_SHADOW_WORKERS,
+                 max_queue: int = DEFAULT_SHADOW_MAX_QUEUE, writer=None):
+        self.pipeline = pipeline
+        self.version = version
+        self.feature_names = list(pipeline.feature_names_in_)
+        self.stats = ShadowStats()
+        self._writer = writer
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._counters_lock = threading.Lock()
+        self._counters = {"submitted": 0, "shed": 0, "failed": 0}
+        self._threads = [threading.Thread(target=self._run, name=f"shadow-scorer-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._counters_lock:
+            self._counters[counter] += amount
+
+    def submit(self, features, champion_scores, champion_classes, thresholds, champion_version: str | None,
+               champion_seconds: float) -> bool:
+        """Request path: enqueue or shed, never block. `features` must not be mutated afterwards.
+
+        `features` may also be a zero-argument callable returning the frame, so
+        the single-record fast path defers building it to the worker thread.
+        """
+        try:
+            self._queue.put_nowait((features, champion_scores, champion_classes, thresholds,
+                                    champion_version, champion_seconds))
+        except queue.Full:
+            self._count("shed", len(champion_scores))
+            return False
+        self._count("submitted", len(champion_scores))
+        return True
+
+    # --- Background threads ---
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            try:
+                self._score(*item)
+            except Exception as e:
+                self._count("failed", len(item[1]))
+                print(f"⚠️ Shadow scoring failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, features, champion_scores, champion_classes, thresholds, champion_version, champion_seconds):
+        if callable(features):
+            features = features()
+        started = time.perf_counter()
+        challenger_scores = self.pipeline.predict_proba(features[self.feature_names])[:, 1]
+        challenger_seconds = time.perf_counter() - started
+        challenger_classes = (challenger_scores > thresholds).astype(np.int8)
+
+        champion_ms, challenger_ms = champion_seconds * 1000.0, challenger_seconds * 1000.0
+        self.stats.update(champion_scores, challenger_scores, champion_classes, challenger_classes,
+                          champion_ms, challenger_ms)
+
+        if self._writer is not None:
+            types = features["type"].to_numpy()
+            for i in range(len(challenger_scores)):
+                self._writer.submit({
+                    "transaction_type": str(types[i]),
+                    "champion_version": champion_version,
+                    "champion_score": float(champion_scores[i]),
+                    "champion_class": int(champion_classes[i]),
+                    "champion_latency_ms": champion_ms,
+                    "challenger_version": self.version,
+                    "challenger_score": float(challenger_scores[i]),
+                    "challenger_class": int(challenger_classes[i]),
+                    "challenger_latency_ms": challenger_ms,
+                    "batch_size": len(challenger_scores),
+                })
+
+    # --- Lifecycle / observability ---
+
+    def flush(self):
+        """Blocks until every queued batch has been scored (and handed to the writer)."""
+        self._queue.join()
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self._writer is not None:
+            self._writer.close()
+
+    def summary(self) -> dict:
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return dict(self.stats.summary(), challenger_version=self.version, queued_batches=self._queue.qsize(),
+                    **counters, writer=self._writer.stats() if self._writer is not None else None)
+
+
+def _load_challenger(spec: str):
+    """(pipeline, version) for a pickle path or a registry version name."""
+    from app_modules.model_registry import get_registry
+    registry = get_registry()
+    if os.path.exists(spec):
+        return load_pipeline(spec, mmap_mode=serving_mmap_mode()), registry.version_for_file(spec) or os.path.basename(spec)
+    return registry.load(spec), spec
+
+
+# --- PROCESS-WIDE SHADOW SCORER ---
+_shared_scorer: ShadowScorer | None = None
+_shared_lock = threading.Lock()
+_shared_initialized = False
+
+
+def get_shadow_scorer() -> ShadowScorer | None:
+    """The configured process-wide shadow scorer, or None when shadow mode is off/unavailable."""
+    global _shared_scorer, _shared_initialized
+    with _shared_lock:
+        if not _shared_initialized:
+            _shared_initialized = True
+            spec = os.environ.get(SHADOW_MODEL_ENV_VAR, DEFAULT_SHADOW_MODEL)
+            if spec:
+                try:
+                    from database.log_writer import PredictionLogWriter
+                    from database.models import ShadowScore
+                    pipeline, version = _load_challenger(spec)
+                    writer = PredictionLogWriter(table=ShadowScore, after_flush=None)
+                    _shared_scorer = ShadowScorer(
+                        pipeline, version,
+                        workers=int(os.environ.get(SHADOW_WORKERS_ENV_VAR, DEFAULT_SHADOW_WORKERS)),
+                        max_queue=int(os.environ.get(SHADOW_MAX_QUEUE_ENV_VAR, DEFAULT_SHADOW_MAX_QUEUE)),
+                        writer=writer,
+                    )
+                    atexit.register(_shared_scorer.close)
+                except Exception as e:
+                    print(f"⚠️ Shadow scoring disabled, challenger {spec!r} could not be loaded: {e}")
+        return _shared_scorer
@@ -0,0 +1,396 @@
+# app_modules/stream_worker.py (Continuous JSONL Stream Scorer)
+"""Tails an append-only JSONL file of PaySim transactions and scores it continuously.
+
+Usage (from the project root):
+    python -m app_modules.stream_worker INPUT.jsonl [--name NAME] [--batch-size N] [--once]
+                                         [--state-dir DIR] [--dead-letter PATH]
+
+Each line is one raw transaction (the /predict fields). Complete lines are read
+in micro-batches, get their velocity feature from the worker's own VelocityStore,
+are scored by the registry's active version (hot-swapped like the scoring
+service) and inserted into prediction_logs.
+
+Exactly-once: a batch's log rows and the stream's new byte offset
+(stream_checkpoints) are committed in one transaction, so a crash either keeps
+both or neither. The velocity window is snapshotted periodically together with
+the offset it reflects; on start the worker loads the snapshot and replays the
+lines between the snapshot and the committed checkpoint into the store (without
+scoring or logging them) before it resumes. Malformed lines are skipped, counted
+and optionally appended to a dead-letter file.
+
+Memory stays bounded: at most one batch of lines is held, and the velocity store
+only keeps its window of steps.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import insert, update
+
+# --- Add project root to path so 'database' and 'app_modules' resolve when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.drift_monitor import get_drift_monitor
+from app_modules.model_loader import RAW_INPUT_FIELDS
+from app_modules.model_registry import HotSwapEngine, get_registry
+from app_modules.scoring_engine import ThresholdPolicy
+from app_modules.shadow_scoring import get_shadow_scorer
+from app_modules.velocity_store import DEFAULT_WINDOW_STEPS, VelocityStore
+from database.database_connector import SessionLocal
+from database.log_writer import prediction_log_rows
+from database.models import PredictionLog, StreamCheckpoint
+from database.rollups import refresh_rollups
+from database.schema import ensure_schema
+
+
+# --- CONFIGURATION ---
+DEFAULT_STATE_DIR = os.path.join(PROJECT_ROOT, ".stream_state")
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_POLL_INTERVAL = 0.5       # Seconds to wait at the end of the file
+DEFAULT_SNAPSHOT_INTERVAL = 60.0  # Seconds between velocity snapshots (bounds the replay on restart)
+REPORT_INTERVAL = 10.0
+MAX_LINE_BYTES = 1 << 20          # Longer lines are rejected without being held in memory
+MAX_CONSECUTIVE_FAILURES = 5
+
+NUMERIC_FIELDS = ["amount", "oldbalanceOrg", "newbalanceOrig", "oldbalanceDest", "newbalanceDest"]
+STRING_FIELDS = ["type", "nameOrig", "nameDest"]
+
+
+class CheckpointConflict(RuntimeError):
+    """The stored checkpoint moved under us: another worker is consuming the same stream."""
+
+
+# --- INPUT ---
+
+class JsonlTail:
+    """Reads complete lines from an append-only file, tracking the byte offset after the last one."""
+
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self.offset = offset
+        self._handle = None
+
+    def _open(self) -> bool:
+        if self._handle is None:
+            if not os.path.exists(self.path):
+                return False
+            self._handle = open(self.path, "rb")
+        size = os.fstat(self._handle.fileno()).st_size
+        if size < self.offset:
+            raise RuntimeError(f"{self.path} is shorter ({size:,} bytes) than the checkpoint "
+                               f"({self.offset:,} bytes); the stream was truncated or replaced.")
+        return True
+
+    def size(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def read_lines(self, max_lines: int, stop_at: int | None = None) -> list[bytes | None]:
+        """Up to `max_lines` complete lines (None for an oversized line); a partial last line is left unread."""
+        lines = []
+        if not self._open():
+            return lines
+        self._handle.seek(self.offset)
+        while len(lines) < max_lines and (stop_at is None or self.offset < stop_at):
+            line = self._handle.readline(MAX_LINE_BYTES + 1)
+            if line.endswith(b"\n"):
+                self.offset += len(line)
+                lines.append(line)
+            elif len(line) > MAX_LINE_BYTES:
+                end = self._skip_past_newline()
+                if end is None:
+                    break  # The rest of the line has not been written yet
+                self.offset = end
+                lines.append(None)
+            else:
+                break  # End of file, possibly mid-line while the producer writes
+        return lines
+
+    def _skip_past_newline(self) -> int | None:
+        while True:
+            chunk = self._handle.readline(MAX_LINE_BYTES)
+            if not chunk:
+                return None
+            if chunk.endswith(b"\n"):
+                return self._handle.tell()
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def parse_line(line: bytes | None) -> dict:
+    """One raw transaction from a JSONL line; raises ValueError when it is unusable."""
+    if line is None:
+        raise ValueError(f"line longer than {MAX_LINE_BYTES:,} bytes")
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("line is not a JSON object")
+    missing = [field for field in RAW_INPUT_FIELDS if field not in record]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    parsed = {field: str(record[field]) for field in STRING_FIELDS}
+    parsed.update({field: float(record[field]) for field in NUMERIC_FIELDS})
+    parsed["step"] = int(record["step"])
+    return parsed
+
+
+# --- WORKER ---
+
+class StreamWorker:
+    """Scores one JSONL stream in micro-batches with checkpointed, exactly-once logging."""
+
+    def __init__(self, input_path: str, stream_name: str | None = None, state_dir: str = DEFAULT_STATE_DIR,
+                 model_path: str | None = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+                 window_steps: int = DEFAULT_WINDOW_STEPS, dead_letter_path: str | None = None,
+                 session_factory=SessionLocal):
+        self.input_path = os.path.abspath(input_path)
+        self.stream_name = stream_name or os.path.basename(input_path)
+        self.snapshot_path = os.path.join(state_dir, f"{self.stream_name}.velocity.npz")
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.snapshot_interval = snapshot_interval
+        self.window_steps = window_steps
+        self.dead_letter_path = dead_letter_path
+        self.session_factory = session_factory
+        ensure_schema(session_factory.kw["bind"])
+
+        self.engine = self._build_engine(model_path, self.stream_name)
+        self.counters = {"scored": 0, "rejected": 0, "batches": 0, "recoveries": 0, "replayed": 0}
+        self._stop = threading.Event()
+        self.recover()
+
+    @staticmethod
+    def _build_engine(model_path: str | None, stream_name: str) -> HotSwapEngine:
+        # No velocity store on the engine: the worker fills Orig_Count_1step from its own checkpointed store
+        registry = get_registry()
+        version = None
+        if model_path is not None:
+            version = registry.version_for_file(model_path) or registry.register(model_path).version
+        engine = HotSwapEngine(registry, ThresholdPolicy.from_env(), version=version, shadow=get_shadow_scorer(),
+                               drift_monitor=get_drift_monitor(f"stream:{stream_name}"))
+        return engine if model_path is not None else engine.start_watching()
+
+    # --- Checkpoint / recovery ---
+
+    def recover(self):
+        """Loads the committed checkpoint and rebuilds the velocity window up to it."""
+        with self.session_factory() as db:
+            checkpoint = db.get(StreamCheckpoint, self.stream_name)
+            if checkpoint is None:
+                checkpoint = StreamCheckpoint(stream_name=self.stream_name, source_path=self.input_path,
+                                              byte_offset=0, line_number=0, rows_scored=0, rows_rejected=0)
+                db.add(checkpoint)
+                db.commit()
+            self.offset, self.line_number = int(checkpoint.byte_offset), int(checkpoint.line_number)
+
+        store = VelocityStore.load(self.snapshot_path, self.window_steps)
+        replay_from = int(store.metadata.get("byte_offset", 0))
+        if store.metadata.get("stream") != self.stream_name or replay_from > self.offset:
+            if store.metadata:
+                print(f"⚠️ Velocity snapshot {self.snapshot_path} does not match checkpoint "
+                      f"{self.offset:,}; rebuilding from the start of the stream.")
+            store, replay_from = VelocityStore(self.window_steps, snapshot_path=self.snapshot_path), 0
+
+        replayed = 0
+        tail = JsonlTail(self.input_path, replay_from)
+        try:
+            while tail.offset < self.offset:
+                lines = tail.read_lines(self.batch_size, stop_at=self.offset)
+                if not lines:
+                    raise RuntimeError(f"{self.input_path} ends before the checkpoint at byte {self.offset:,}.")
+                records = self._parse(lines, 0)[0]
+                if records:
+                    store.record_batch([r["nameOrig"] for r in records], [r["step"] for r in records])
+                replayed += len(lines)
+        finally:
+            tail.close()
+
+        self.velocity_store = store
+        self._uncommitted = False  # True while the store holds counts from a batch not yet committed
+        self.tail = JsonlTail(self.input_path, self.offset)
+        self._last_snapshot = time.monotonic()
+        self.counters["replayed"] += replayed
+        print(f"✅ Stream '{self.stream_name}' resumes at byte {self.offset:,} (line {self.line_number:,}); "
+              f"replayed {replayed:,} lines into the velocity window.")
+
+    def snapshot(self):
+        """Persists the velocity window tagged with the committed offset it reflects."""
+        self.velocity_store.snapshot(self.snapshot_path, metadata={
+            "stream": self.stream_name, "byte_offset": self.offset, "line_number": self.line_number,
+        })
+        self._last_snapshot = time.monotonic()
+
+    # --- Batch processing ---
+
+    def _parse(self, lines: list[bytes | None], first_line_number: int) -> tuple[list[dict], list[dict]]:
+        records, rejected = [], []
+        for i, line in enumerate(lines):
+            if line is not None and not line.strip():
+                continue  # Blank lines are not transactions
+            try:
+                records.append(parse_line(line))
+            except (ValueError, TypeError) as e:
+                rejected.append({"line": first_line_number + i, "error": str(e),
+                                 "raw": None if line is None else line[:1000].decode("utf-8", "replace")})
+        return records, rejected
+
+    def process_batch(self, lines: list[bytes | None]) -> int:
+        """Scores, logs and checkpoints one batch of lines read up to `self.tail.offset`; returns rows scored."""
+        new_offset = self.tail.offset
+        records, rejected = self._parse(lines, self.line_number + 1)
+
+        rows = []
+        if records:
+            frame = pd.DataFrame.from_records(records)
+            self._uncommitted = True
+            frame["Orig_Count_1step"] = self.velocity_store.record_batch(frame["nameOrig"].to_numpy(),
+                                                                         frame["step"].to_numpy())
+            result = self.engine.score(frame)
+            rows = prediction_log_rows(frame, result.risk_score, result.predicted_class, result.model_version,
+                                       timestamp=datetime.datetime.utcnow())
+
+        with self.session_factory() as db:
+            try:
+                if rows:
+                    db.execute(insert(PredictionLog), rows)
+                moved = db.execute(
+                    update(StreamCheckpoint)
+                    .where(StreamCheckpoint.stream_name == self.stream_name,
+                           StreamCheckpoint.byte_offset == self.offset)  # Compare-and-set
+                    .values(byte_offset=new_offset, line_number=self.line_number + len(lines),
+                            rows_scored=StreamCheckpoint.rows_scored + len(rows),
+                            rows_rejected=StreamCheckpoint.rows_rejected + len(rejected),
+                            source_path=self.input_path, updated_at=datetime.datetime.utcnow())
+                ).rowcount
+                if moved != 1:
+                    raise CheckpointConflict(f"Checkpoint for stream '{self.stream_name}' is no longer at byte "
+                                             f"{self.offset:,}; is another worker running?")
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+
+            try:
+                # Separate transaction, as in the log writer: the next refresh catches up on failure
+                refresh_rollups(db)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Rollup refresh failed: {e}")
+
+        self.offset, self.line_number = new_offset, self.line_number + len(lines)
+        self._uncommitted = False
+        self.counters["scored"] += len(rows)
+        self.counters["rejected"] += len(rejected)
+        self.counters["batches"] += 1
+        if rejected:
+            self._dead_letter(rejected)
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+        return len(rows)
+
+    def _dead_letter(self, rejected: list[dict]):
+        # After the commit, so a crash can repeat (never lose) a dead letter
+        print(f"⚠️ Skipped {len(rejected)} malformed line(s), first at line {rejected[0]['line']:,}: "
+              f"{rejected[0]['error']}")
+        if self.dead_letter_path:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for item in rejected:
+                    f.write(json.dumps(dict(item, stream=self.stream_name)) + "\n")
+
+    # --- Main loop ---
+
+    def run(self, follow: bool = True, max_rows: int | None = None):
+        """Scores until stopped (or, without `follow`, until the end of the file)."""
+        started = last_report = time.monotonic()
+        failures = 0
+        while not self._stop.is_set():
+            if max_rows is not None and self.counters["scored"] >= max_rows:
+                break
+            try:
+                lines = self.tail.read_lines(self.batch_size)
+                if not lines:
+                    if not follow:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self.process_batch(lines)
+                failures = 0
+            except CheckpointConflict:
+                raise
+            except Exception as e:
+                # State may be ahead of the checkpoint (velocity counts, tail offset): rebuild it
+                failures += 1
+                if failures >= MAX_CONSECUTIVE_FAILURES:
+                    raise
+                print(f"⚠️ Batch at byte {self.offset:,} failed ({e}); recovering from the checkpoint.")
+                self._stop.wait(min(2 ** failures, 30))
+                self.tail.close()
+                self.recover()
+                self.counters["recoveries"] += 1
+
+            now = time.monotonic()
+            if now - last_report >= REPORT_INTERVAL:
+                last_report = now
+                print(f"  scored {self.counters['scored']:,} rows "
+                      f"({self.counters['scored'] / (now - started):,.0f} rows/s), "
+                      f"lag {max(self.tail.size() - self.offset, 0):,} bytes")
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return dict(self.counters, stream=self.stream_name, byte_offset=self.offset, line_number=self.line_number,
+                    lag_bytes=max(self.tail.size() - self.offset, 0), model_version=self.engine.model_version,
+                    velocity=self.velocity_store.stats())
+
+    def close(self):
+        """Snapshots the velocity window at the committed offset so the next start replays nothing."""
+        if not self._uncommitted:  # Otherwise keep the older snapshot; the next start replays from it
+            self.snapshot()
+        self.tail.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse continuous JSONL stream scorer")
+    parser.add_argument("input_path", help="Append-only JSONL file of raw transactions")
+    parser.add_argument("--name", default=None, help="Checkpoint name (default: the file name)")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR, help="Where velocity snapshots are kept")
+    parser.add_argument("--model-path", default=None,
+                        help="Pipeline file to use (default: the registry's active version, hot-swapped)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--snapshot-interval", type=float, default=DEFAULT_SNAPSHOT_INTERVAL)
+    parser.add_argument("--window-steps", type=int, default=DEFAULT_WINDOW_STEPS)
+    parser.add_argument("--dead-letter", default=None, help="Append malformed lines (as JSON) to this file")
+    parser.add_argument("--once", action="store_true", help="Exit at the end of the file instead of tailing it")
+    args = parser.parse_args(argv)
+
+    worker = StreamWorker(args.input_path, args.name, args.state_dir, args.model_path, args.batch_size,
+                          args.poll_interval, args.snapshot_interval, args.window_steps, args.dead_letter)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run(follow=not args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+    stats = worker.stats()
+    print(f"✅ Stream '{stats['stream']}' at byte {stats['byte_offset']:,} (line {stats['line_number']:,}): "
+          f"{stats['scored']:,} scored, {stats['rejected']:,} rejected this run, "
+          f"{stats['velocity']['senders']:,} senders in the velocity window")
+
+
+if __name__ == "__main__":
+    main()
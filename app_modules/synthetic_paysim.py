@@ -0,0 +1,102 @@
+# app_modules/synthetic_paysim.py (Deterministic Synthetic PaySim Data)
+"""Generates PaySim-shaped transactions for benchmarks and load tests.
+
+Usage (from the project root):
+    python -m app_modules.synthetic_paysim OUTPUT_FILE [--rows N] [--seed S] [--fraud-rate R]
+
+The same (rows, seed, ...) arguments always produce the same rows, so benchmark
+runs on different machines or commits score identical inputs. The shape follows
+the public PaySim data: the type mix, log-normal amounts, merchant ('M')
+destinations for PAYMENT, fraud only in TRANSFER/CASH_OUT (usually emptying
+the sender's account), repeat senders within a step and rows ordered by step.
+OUTPUT_FILE may be CSV, Parquet or JSONL (one transaction per line, the
+stream worker's input format).
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# --- Add project root to path so 'app_modules' resolves when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.features import TRANSACTION_TYPES
+
+
+# --- CONFIGURATION ---
+# Approximate PaySim type mix, in TRANSACTION_TYPES order (CASH_IN, CASH_OUT, DEBIT, PAYMENT, TRANSFER)
+TYPE_PROBABILITIES = [0.22, 0.352, 0.0065, 0.338, 0.0835]
+DEFAULT_FRAUD_RATE = 0.0013
+DEFAULT_SEED = 2024
+MAX_STEP = 743
+
+
+def generate_transactions(n_rows: int, seed: int = DEFAULT_SEED, fraud_rate: float = DEFAULT_FRAUD_RATE,
+                          n_senders: int | None = None, first_step: int = 1, steps: int = MAX_STEP) -> pd.DataFrame:
+    """`n_rows` raw transactions (dataset columns, including isFraud), sorted by step."""
+    rng = np.random.default_rng(seed)
+    n_senders = n_senders or max(1, n_rows // 2)  # About two transactions per sender
+
+    types = np.asarray(TRANSACTION_TYPES, dtype=object)[rng.choice(len(TRANSACTION_TYPES), n_rows, p=TYPE_PROBABILITIES)]
+    amount = np.round(rng.lognormal(11, 1.3, n_rows), 2)
+    old_orig = np.round(rng.lognormal(10, 2.5, n_rows) * (rng.random(n_rows) > 0.33), 2)
+    old_dest = np.round(rng.lognormal(11, 2.5, n_rows) * (rng.random(n_rows) > 0.42), 2)
+
+    fraud_eligible = (types == "TRANSFER") | (types == "CASH_OUT")
+    eligible_share = max(float(fraud_eligible.mean()), 1e-12)
+    is_fraud = fraud_eligible & (rng.random(n_rows) < min(1.0, fraud_rate / eligible_share))
+    amount = np.where(is_fraud & (rng.random(n_rows) < 0.9), np.maximum(old_orig, 1.0), amount)
+
+    outgoing = types != "CASH_IN"
+    new_orig = np.where(outgoing, np.maximum(old_orig - amount, 0.0), old_orig + amount)
+    has_dest_balance = types != "PAYMENT"  # Merchants report no balances in PaySim
+    new_dest = np.where(has_dest_balance & ~is_fraud, old_dest + amount, old_dest)
+    old_dest = np.where(has_dest_balance, old_dest, 0.0)
+    new_dest = np.where(has_dest_balance, new_dest, 0.0)
+
+    sender_ids = rng.integers(0, n_senders, n_rows)
+    dest_ids = rng.integers(0, max(1, n_rows), n_rows)
+    frame = pd.DataFrame({
+        "step": np.sort(rng.integers(first_step, first_step + steps, n_rows)).astype(np.int32),
+        "type": types,
+        "amount": amount,
+        "nameOrig": np.char.add("C", (1_000_000_000 + sender_ids).astype(str)).astype(object),
+        "oldbalanceOrg": old_orig,
+        "newbalanceOrig": np.round(new_orig, 2),
+        "nameDest": np.char.add(np.where(types == "PAYMENT", "M", "C"),
+                                (1_000_000_000 + dest_ids).astype(str)).astype(object),
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": np.round(new_dest, 2),
+        "isFraud": is_fraud.astype(np.int8),
+        "isFlaggedFraud": (is_fraud & (types == "TRANSFER") & (amount > 200_000)).astype(np.int8),
+    })
+    return frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate deterministic PaySim-like transactions")
+    parser.add_argument("output_path", help="CSV, Parquet (.parquet) or JSONL (.jsonl) destination")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--fraud-rate", type=float, default=DEFAULT_FRAUD_RATE)
+    parser.add_argument("--steps", type=int, default=MAX_STEP, help="Number of distinct steps (hours) to spread over")
+    args = parser.parse_args(argv)
+
+    frame = generate_transactions(args.rows, args.seed, args.fraud_rate, steps=args.steps)
+    if args.output_path.lower().endswith((".parquet", ".pq")):
+        frame.to_parquet(args.output_path, index=False)
+    elif args.output_path.lower().endswith(".jsonl"):
+        frame.to_json(args.output_path, orient="records", lines=True)
+    else:
+        frame.to_csv(args.output_path, index=False)
+    print(f"✅ Wrote {len(frame):,} synthetic transactions ({int(frame['isFraud'].sum()):,} fraud) "
+          f"to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
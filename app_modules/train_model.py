@@ -0,0 +1,430 @@
+# app_modules/train_model.py (Scripted Training Pipeline)
+"""Retrains the deployment pipeline from a PaySim extract without the notebooks.
+
+Usage (from the project root):
+    python -m app_modules.train_model AIML_Sample_Stratified.csv [--model xgb|stack]
+                                      [--candidates 27] [--folds 3] [--threads N] [--jobs N]
+                                      [--output models/fraud_detection_retrained.pkl] [--register [--activate]]
+
+Compared with code/xg.ipynb and code/ensemble.ipynb:
+    * The ColumnTransformer is fitted once per CV fold and its output is cached on
+      disk (`.train_cache/<data hash>/`, memory-mapped on reuse), instead of being
+      refitted for every candidate x fold. The last fold set doubles as the stacking CV.
+    * Hyper-parameters are chosen by successive halving: every candidate is tried on
+      a small stratified slice of each fold, and only the best 1/factor move on to
+      larger slices. XGBoost uses early stopping on the fold's validation split, so
+      n_estimators is learned rather than searched.
+    * Thread use is explicit: `--jobs` candidate fits run concurrently (threads, so
+      the cached arrays are shared), each XGBoost/RandomForest gets
+      `--threads // --jobs` threads, and BLAS/OpenMP pools are capped to the same.
+    * Every stage is timed and written, with the chosen parameters and test metrics,
+      to `<output>.training.json`.
+
+A `sample_weight` column (written by code/SampleData.py) is honoured in fitting
+and in the reported metrics, so a stratified sample is scored as the population.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# --- Add project root to path so 'database' and 'app_modules' resolve when run as a script ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from scipy.stats import randint, uniform
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier, StackingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (average_precision_score, confusion_matrix, f1_score, precision_score,
+                             recall_score, roc_auc_score)
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
+from xgboost import XGBClassifier
+
+from app_modules.batch_scoring import RAW_DTYPES
+from app_modules.features import CATEGORICAL_FEATURES, NUMERIC_FEATURES, engineer_frame, prior_sender_counts
+
+
+# --- CONFIGURATION ---
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, "models", "fraud_detection_retrained.pkl")
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".train_cache")
+RANDOM_STATE = 42
+TARGET = "isFraud"
+WEIGHT_COLUMN = "sample_weight"
+
+# Search space from code/ensemble.ipynb; n_estimators is replaced by early stopping
+PARAM_DISTRIBUTIONS = {
+    "learning_rate": uniform(0.01, 0.19),
+    "max_depth": randint(3, 8),
+    "colsample_bytree": uniform(0.6, 0.4),
+    "subsample": uniform(0.6, 0.4),
+    "min_child_weight": randint(1, 10),
+}
+MAX_BOOSTING_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 30
+HALVING_FACTOR = 3
+
+SCORERS = {
+    "average_precision": lambda y, proba, w: average_precision_score(y, proba, sample_weight=w),
+    "roc_auc": lambda y, proba, w: roc_auc_score(y, proba, sample_weight=w),
+    "recall": lambda y, proba, w: recall_score(y, proba > 0.5, sample_weight=w, zero_division=0),
+    "f1": lambda y, proba, w: f1_score(y, proba > 0.5, sample_weight=w, zero_division=0),
+}
+
+
+class StageTimer:
+    """Wall-clock seconds per named stage, printed as they finish."""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+            print(f"⏱️ {name}: {elapsed:.2f}s")
+
+
+# --- DATA ---
+
+def load_training_frame(path: str) -> pd.DataFrame:
+    """Reads a PaySim CSV/Parquet extract and applies the serving feature engineering.
+
+    Orig_Count_1step is the number of *earlier* transactions by the same sender
+    in the same step (file order), which is what the online VelocityStore sees.
+    """
+    if path.lower().endswith((".parquet", ".pq")):
+        frame = pd.read_parquet(path)
+    else:
+        dtypes = dict(RAW_DTYPES, **{TARGET: "int8", "isFlaggedFraud": "int8"})
+        frame = pd.read_csv(path, dtype=dtypes)
+    frame["Orig_Count_1step"] = prior_sender_counts(frame["nameOrig"].to_numpy(), frame["step"].to_numpy())
+    return engineer_frame(frame)
+
+
+def build_preprocessor() -> ColumnTransformer:
+    """Same preprocessing as the deployed XGBoost pipeline (code/xg.ipynb)."""
+    return ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), NUMERIC_FEATURES),
+            ("cat", OneHotEncoder(handle_unknown="ignore", drop="first"), CATEGORICAL_FEATURES),
+        ],
+        remainder="drop",
+        sparse_threshold=0.0,  # Dense float output; XGBoost and the cache both want arrays
+    )
+
+
+def _dataset_key(features: pd.DataFrame, y: np.ndarray, folds: int, seed: int) -> str:
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(features, index=False).to_numpy().tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(f"{folds}:{seed}:{NUMERIC_FEATURES}:{CATEGORICAL_FEATURES}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class FoldCache:
+    """Preprocessed CV folds (and the full training set) stored as .npy files.
+
+    Each fold directory holds the transformed train/validation matrices plus the
+    row indices; they are written once (staged, then renamed) and memory-mapped
+    read-only afterwards, so every candidate reuses the same preprocessing.
+    """
+
+    def __init__(self, root: str, key: str):
+        self.path = os.path.join(root, key)
+
+    def _build(self, name: str, X: pd.DataFrame, train_idx: np.ndarray, val_idx: np.ndarray | None):
+        staging = tempfile.mkdtemp(dir=os.path.dirname(self.path), prefix=f".{name}-")
+        try:
+            preprocessor = build_preprocessor().fit(X.iloc[train_idx])
+            np.save(os.path.join(staging, "train_idx.npy"), train_idx)
+            np.save(os.path.join(staging, "X_train.npy"),
+                    preprocessor.transform(X.iloc[train_idx]).astype(np.float32))
+            if val_idx is not None:
+                np.save(os.path.join(staging, "val_idx.npy"), val_idx)
+                np.save(os.path.join(staging, "X_val.npy"),
+                        preprocessor.transform(X.iloc[val_idx]).astype(np.float32))
+            joblib.dump(preprocessor, os.path.join(staging, "preprocessor.joblib"))
+            os.replace(staging, os.path.join(self.path, name))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.exists(os.path.join(self.path, name)):  # Not just a lost race
+                raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def load(self, name: str, X: pd.DataFrame, train_idx: np.ndarray, val_idx: np.ndarray | None = None) -> dict:
+        """The cached fold `name`, building it first if needed (returns hit=True on reuse)."""
+        fold_dir = os.path.join(self.path, name)
+        hit = os.path.isdir(fold_dir)
+        if not hit:
+            os.makedirs(self.path, exist_ok=True)
+            self._build(name, X, train_idx, val_idx)
+        fold = {"hit": hit, "preprocessor": joblib.load(os.path.join(fold_dir, "preprocessor.joblib"))}
+        for array in ("train_idx", "X_train", "val_idx", "X_val"):
+            array_path = os.path.join(fold_dir, f"{array}.npy")
+            if os.path.exists(array_path):
+                fold[array] = np.load(array_path, mmap_mode="r")
+        return fold
+
+
+# --- SEARCH ---
+
+def _scale_pos_weight(y: np.ndarray, weights: np.ndarray | None) -> float:
+    weights = np.ones(len(y)) if weights is None else weights
+    positives = float(weights[y == 1].sum())
+    return float(weights[y == 0].sum()) / positives if positives else 1.0
+
+
+def _xgb(params: dict, scale_pos_weight: float, threads: int, n_estimators: int = MAX_BOOSTING_ROUNDS,
+         early_stopping: bool = True) -> XGBClassifier:
+    return XGBClassifier(
+        objective="binary:logistic",
+        eval_metric="aucpr",
+        tree_method="hist",
+        n_estimators=n_estimators,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS if early_stopping else None,
+        scale_pos_weight=scale_pos_weight,
+        n_jobs=threads,
+        random_state=RANDOM_STATE,
+        **params,
+    )
+
+
+def _stratified_slice(y: np.ndarray, fraction: float, seed: int) -> np.ndarray:
+    """Sorted positions of a class-stratified random `fraction` of `y` (at least one row per class)."""
+    if fraction >= 1.0:
+        return np.arange(len(y))
+    rng = np.random.default_rng(seed)
+    picked = []
+    for label in np.unique(y):
+        positions = np.flatnonzero(y == label)
+        picked.append(rng.permutation(positions)[:max(1, math.ceil(fraction * len(positions)))])
+    return np.sort(np.concatenate(picked))
+
+
+def _evaluate(params, folds, y, weights, fraction, scorer, threads, seed) -> dict:
+    """Mean CV score and early-stopped round count of one candidate on `fraction` of each fold's train rows."""
+    scores, rounds = [], []
+    for fold_number, fold in enumerate(folds):
+        y_train, y_val = y[fold["train_idx"]], y[fold["val_idx"]]
+        w_train = None if weights is None else weights[fold["train_idx"]]
+        w_val = None if weights is None else weights[fold["val_idx"]]
+        rows = _stratified_slice(y_train, fraction, seed + fold_number)
+        model = _xgb(params, _scale_pos_weight(y_train[rows], None if w_train is None else w_train[rows]), threads)
+        model.fit(fold["X_train"][rows], y_train[rows],
+                  sample_weight=None if w_train is None else w_train[rows],
+                  eval_set=[(fold["X_val"], y_val)],
+                  sample_weight_eval_set=None if w_val is None else [w_val],
+                  verbose=False)
+        scores.append(scorer(y_val, model.predict_proba(fold["X_val"])[:, 1], w_val))
+        rounds.append(model.best_iteration + 1)
+    return {"params": params, "score": float(np.mean(scores)), "rounds": int(np.median(rounds))}
+
+
+def successive_halving(folds, y, weights, n_candidates: int, scorer, jobs: int, threads: int,
+                       seed: int = RANDOM_STATE, factor: int = HALVING_FACTOR) -> list[dict]:
+    """Runs the halving rungs; returns one summary per rung (the last rung's best is the winner)."""
+    candidates = list(ParameterSampler(PARAM_DISTRIBUTIONS, n_iter=n_candidates, random_state=seed))
+    candidates = [{k: (float(v) if isinstance(v, float) else int(v)) for k, v in c.items()} for c in candidates]
+    n_rungs, survivors = 1, len(candidates)  # Last rung keeps fewer than `factor * factor` candidates
+    while survivors // factor >= factor:
+        n_rungs, survivors = n_rungs + 1, survivors // factor
+    rungs = []
+
+    for rung in range(n_rungs):
+        fraction = min(1.0, factor ** (rung - n_rungs + 1))
+        started = time.perf_counter()
+        results = joblib.Parallel(n_jobs=jobs, backend="threading")(
+            joblib.delayed(_evaluate)(params, folds, y, weights, fraction, scorer, threads, seed)
+            for params in candidates
+        )
+        results.sort(key=lambda result: result["score"], reverse=True)
+        rungs.append({"rung": rung, "candidates": len(candidates), "train_fraction": fraction,
+                      "seconds": time.perf_counter() - started, "results": results})
+        print(f"   rung {rung}: {len(candidates)} candidates on {fraction:.0%} of each fold, "
+              f"best score {results[0]['score']:.4f}")
+        candidates = [result["params"] for result in results[:max(1, len(candidates) // factor)]]
+    return rungs
+
+
+# --- FINAL MODEL ---
+
+def build_stacking(xgb_model: XGBClassifier, cv_splits, jobs: int, threads: int) -> StackingClassifier:
+    """The notebook's XGB/RF/LR stack, reusing the cached CV splits for its out-of-fold predictions."""
+    return StackingClassifier(
+        estimators=[
+            ("xgb", xgb_model),
+            ("rf", RandomForestClassifier(random_state=RANDOM_STATE, class_weight="balanced",
+                                          n_estimators=100, max_depth=5, n_jobs=threads)),
+            ("lr", LogisticRegression(random_state=RANDOM_STATE, class_weight="balanced",
+                                      solver="saga", max_iter=500)),
+        ],
+        final_estimator=LogisticRegression(solver="saga", max_iter=500),
+        cv=cv_splits,
+        n_jobs=jobs,
+    )
+
+
+def evaluate_model(pipeline, X_test: pd.DataFrame, y_test: np.ndarray, weights: np.ndarray | None) -> dict:
+    proba = pipeline.predict_proba(X_test)[:, 1]
+    predicted = (proba > 0.5).astype(int)
+    return {
+        "average_precision": float(average_precision_score(y_test, proba, sample_weight=weights)),
+        "roc_auc": float(roc_auc_score(y_test, proba, sample_weight=weights)),
+        "precision": float(precision_score(y_test, predicted, sample_weight=weights, zero_division=0)),
+        "recall": float(recall_score(y_test, predicted, sample_weight=weights, zero_division=0)),
+        "f1": float(f1_score(y_test, predicted, sample_weight=weights, zero_division=0)),
+        "confusion_matrix": confusion_matrix(y_test, predicted).tolist(),  # Unweighted row counts
+        "test_rows": int(len(y_test)),
+    }
+
+
+def _atomic_dump(obj, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def train(data_path: str, output_path: str = DEFAULT_OUTPUT, model_type: str = "xgb", n_candidates: int = 27,
+          folds: int = 3, test_size: float = 0.3, scoring: str = "average_precision",
+          threads: int | None = None, jobs: int = 1, cache_dir: str = DEFAULT_CACHE_DIR,
+          seed: int = RANDOM_STATE) -> dict:
+    """Runs the full training pipeline and writes the model plus `<output>.training.json`; returns the report."""
+    timer = StageTimer()
+    threads = max(1, threads or os.cpu_count() or 1)
+    jobs = max(1, min(jobs, threads))
+    threads_per_fit = max(1, threads // jobs)
+
+    with threadpool_limits(limits=threads_per_fit):
+        with timer.stage("load_and_engineer"):
+            frame = load_training_frame(data_path)
+            y_all = frame[TARGET].to_numpy(dtype=np.int8)
+            w_all = frame[WEIGHT_COLUMN].to_numpy(dtype=np.float64) if WEIGHT_COLUMN in frame else None
+            X_all = frame[CATEGORICAL_FEATURES + NUMERIC_FEATURES]
+
+        with timer.stage("split"):
+            train_idx, test_idx = train_test_split(np.arange(len(frame)), test_size=test_size,
+                                                   stratify=y_all, random_state=seed)
+            X_train, y_train = X_all.iloc[train_idx].reset_index(drop=True), y_all[train_idx]
+            w_train = None if w_all is None else w_all[train_idx]
+            cache = FoldCache(cache_dir, _dataset_key(X_train, y_train, folds, seed))
+
+        with timer.stage("preprocess_folds"):
+            splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+            cv_folds = [cache.load(f"fold{i}", X_train, fold_train, fold_val)
+                        for i, (fold_train, fold_val) in enumerate(splitter.split(X_train, y_train))]
+            full = cache.load("full", X_train, np.arange(len(X_train)))
+            cache_hits = sum(fold["hit"] for fold in cv_folds + [full])
+
+        with timer.stage("search"):
+            rungs = successive_halving(cv_folds, y_train, w_train, n_candidates, SCORERS[scoring],
+                                       jobs, threads_per_fit, seed)
+            best = rungs[-1]["results"][0]
+
+        with timer.stage("fit_final"):
+            xgb_model = _xgb(best["params"], _scale_pos_weight(y_train, w_train), threads_per_fit,
+                             n_estimators=best["rounds"], early_stopping=False)
+            if model_type == "stack":
+                cv_splits = [(np.asarray(fold["train_idx"]), np.asarray(fold["val_idx"])) for fold in cv_folds]
+                classifier = build_stacking(xgb_model, cv_splits, jobs, threads_per_fit)
+            else:
+                classifier = xgb_model
+            classifier.fit(full["X_train"], y_train, sample_weight=w_train)
+            # The preprocessor was already fitted on the full training set (and cached)
+            pipeline = Pipeline(steps=[("preprocessor", full["preprocessor"]), ("classifier", classifier)])
+
+        with timer.stage("evaluate"):
+            metrics = evaluate_model(pipeline, X_all.iloc[test_idx], y_all[test_idx],
+                                     None if w_all is None else w_all[test_idx])
+
+        with timer.stage("save"):
+            _atomic_dump(pipeline, output_path)
+
+    report = {
+        "data": os.path.abspath(data_path),
+        "model": model_type,
+        "rows": int(len(frame)),
+        "weighted": w_all is not None,
+        "folds": folds,
+        "scoring": scoring,
+        "threads": threads,
+        "jobs": jobs,
+        "threads_per_fit": threads_per_fit,
+        "fold_cache": {"path": cache.path, "hits": cache_hits, "folds": folds + 1},
+        "best_params": dict(best["params"], n_estimators=best["rounds"]),
+        "cv_score": best["score"],
+        "rungs": [{k: v for k, v in rung.items() if k != "results"} for rung in rungs],
+        "metrics": metrics,
+        "stage_seconds": timer.seconds,
+        "total_seconds": sum(timer.seconds.values()),
+    }
+    with open(output_path + ".training.json", "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the FraudPulse fraud-detection pipeline")
+    parser.add_argument("data_path", help="PaySim CSV/Parquet extract (e.g. the output of code/SampleData.py)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--model", choices=["xgb", "stack"], default="xgb",
+                        help="Tuned XGBoost (deployment) or the XGB/RF/LR stacking ensemble")
+    parser.add_argument("--candidates", type=int, default=27, help="Hyper-parameter candidates in the first rung")
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--test-size", type=float, default=0.3)
+    parser.add_argument("--scoring", choices=sorted(SCORERS), default="average_precision")
+    parser.add_argument("--threads", type=int, default=None, help="Total cores to use (default: all)")
+    parser.add_argument("--jobs", type=int, default=1, help="Candidate fits run concurrently")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--register", action="store_true", help="Add the trained pipeline to the model registry")
+    parser.add_argument("--activate", action="store_true", help="With --register: make it the serving version")
+    args = parser.parse_args(argv)
+
+    report = train(args.data_path, args.output, args.model, args.candidates, args.folds, args.test_size,
+                   args.scoring, args.threads, args.jobs, args.cache_dir, args.seed)
+
+    metrics = report["metrics"]
+    print(f"✅ Trained {args.model} in {report['total_seconds']:.1f}s -> {args.output}")
+    print(f"   Test AP {metrics['average_precision']:.4f} | recall {metrics['recall']:.4f} | "
+          f"precision {metrics['precision']:.4f}; best params {report['best_params']}")
+    print(f"   Stage timings and search summary: {args.output}.training.json")
+
+    if args.register:
+        from app_modules.model_registry import get_registry
+        manifest = get_registry().register(
+            args.output, metrics={k: v for k, v in metrics.items() if k != "confusion_matrix"},
+            notes=f"train_model --model {args.model} on {os.path.basename(args.data_path)}",
+            activate=args.activate)
+        print(f"✅ Registered {manifest.version}{' (active)' if args.activate else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# app_modules/velocity_store.py (Online Velocity Feature Store)
+"""In-process store backing the `Orig_Count_1step` velocity feature.
+
+Training counts transactions per (nameOrig, step); at serving time we keep the
+same counts online. Each step owns a compact open-addressing hash table of
+64-bit sender hashes -> uint32 counts (~24 bytes per sender at the maximum load
+factor), steps older than the window are dropped, and the whole store can be
+snapshotted to disk so a restart starts warm.
+
+Online the store can only see transactions that already happened, so the value
+returned for a transaction is the number of *earlier* transactions by the same
+sender in the same step; app_modules/train_model.py computes the same prior
+count offline (`features.prior_sender_counts`) so training matches serving.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# --- CONFIGURATION ---
+DEFAULT_WINDOW_STEPS = 24  # Steps (simulated hours) retained for late/out-of-order arrivals
+SNAPSHOT_ENV_VAR = "FRAUDPULSE_VELOCITY_SNAPSHOT"
+
+_INITIAL_CAPACITY = 1024  # Must be a power of two
+_MAX_LOAD_FACTOR = 0.5
+_EMPTY_KEY = np.uint64(0)
+
+
+def hash_sender_ids(names) -> np.ndarray:
+    """Maps sender IDs to stable 64-bit keys (0 is reserved for empty slots)."""
+    names = np.asarray(names, dtype=object)
+    # Factorizing first only pays off for batches; the hashes are identical either way
+    keys = pd.util.hash_array(names, categorize=len(names) > 1)
+    keys[keys == _EMPTY_KEY] = 1
+    return keys
+
+
+# --- PER-STEP HASH TABLE ---
+
+class _StepCounts:
+    """Open-addressing (linear probing) uint64 -> uint32 table stored in two NumPy arrays."""
+
+    __slots__ = ("keys", "counts", "size")
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.counts = np.zeros(capacity, dtype=np.uint32)
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.counts.nbytes
+
+    def _slot(self, key: int) -> int:
+        """Returns the slot holding `key`, or the empty slot where it would be inserted."""
+        mask = len(self.keys) - 1
+        slot = key & mask
+        while True:
+            current = int(self.keys[slot])
+            if current == key or current == 0:
+                return slot
+            slot = (slot + 1) & mask
+
+    def get(self, key: int) -> int:
+        slot = self._slot(key)
+        return int(self.counts[slot]) if int(self.keys[slot]) == key else 0
+
+    def increment(self, key: int) -> int:
+        """Adds one to `key` and returns the count before the increment."""
+        if (self.size + 1) > len(self.keys) * _MAX_LOAD_FACTOR:
+            self._grow()
+        slot = self._slot(key)
+        if int(self.keys[slot]) != key:
+            self.keys[slot] = key
+            self.size += 1
+        previous = int(self.counts[slot])
+        self.counts[slot] = previous + 1
+        return previous
+
+    def _find_slots(self, keys: np.ndarray, claim: bool) -> np.ndarray:
+        """Vectorized probe. Returns slot per key (-1 if absent and `claim` is False).
+
+        With `claim=True`, absent keys take the first empty slot on their probe
+        path; `keys` must then be unique.
+        """
+        mask = np.uint64(len(self.keys) - 1)
+        result = np.full(len(keys), -1, dtype=np.intp)
+        pending = np.arange(len(keys))
+        slots = (keys & mask).astype(np.intp)
+
+        while pending.size:
+            occupant = self.keys[slots]
+            found = occupant == keys[pending]
+            empty = occupant == _EMPTY_KEY
+            result[pending[found]] = slots[found]
+            resolved = found.copy()
+
+            if claim and empty.any():
+                # Several keys may probe the same empty slot; the first one wins
+                candidates = np.flatnonzero(empty)
+                _, first = np.unique(slots[candidates], return_index=True)
+                winners = candidates[first]
+                self.keys[slots[winners]] = keys[pending[winners]]
+                result[pending[winners]] = slots[winners]
+                self.size += len(winners)
+                resolved[winners] = True
+            elif not claim:
+                resolved |= empty
+
+            # Keys that lost a claim retry the same (now occupied) slot; others move on
+            advance = ~resolved & ~empty
+            slots = np.where(advance, (slots + 1) & int(mask), slots)
+            pending, slots = pending[~resolved], slots[~resolved]
+
+        return result
+
+    def get_many(self, keys: np.ndarray) -> np.ndarray:
+        slots = self._find_slots(keys, claim=False)
+        counts = np.zeros(len(keys), dtype=np.int64)
+        present = slots >= 0
+        counts[present] = self.counts[slots[present]]
+        return counts
+
+    def add_many(self, unique_keys: np.ndarray, increments: np.ndarray):
+        while (self.size + len(unique_keys)) > len(self.keys) * _MAX_LOAD_FACTOR:
+            self._grow()
+        slots = self._find_slots(unique_keys, claim=True)
+        self.counts[slots] += increments.astype(np.uint32)
+
+    def remove_many(self, unique_keys: np.ndarray, decrements: np.ndarray):
+        slots = self._find_slots(unique_keys, claim=False)
+        present = slots >= 0
+        slots, decrements = slots[present], decrements[present].astype(np.uint32)
+        self.counts[slots] -= np.minimum(self.counts[slots], decrements)
+
+    def items(self):
+        occupied = self.keys != _EMPTY_KEY
+        return self.keys[occupied], self.counts[occupied]
+
+    def _grow(self):
+        keys, counts = self.items()
+        self.keys = np.zeros(len(self.keys) * 2, dtype=np.uint64)
+        self.counts = np.zeros(len(self.counts) * 2, dtype=np.uint32)
+        self.size = 0
+        if len(keys):
+            self.add_many(keys, counts)
+
+    @classmethod
+    def from_items(cls, keys: np.ndarray, counts: np.ndarray) -> "_StepCounts":
+        capacity = _INITIAL_CAPACITY
+        while len(keys) > capacity * _MAX_LOAD_FACTOR:
+            capacity *= 2
+        table = cls(capacity)
+        if len(keys):
+            table.add_many(keys, counts)
+        return table
+
+
+# --- PUBLIC STORE ---
+
+class VelocityStore:
+    """Thread-safe (nameOrig, step) transaction counter with step-window expiry."""
+
+    def __init__(self, window_steps: int = DEFAULT_WINDOW_STEPS, snapshot_path: str | None = None):
+        self.window_steps = window_steps
+        self.snapshot_path = snapshot_path
+        self._steps: dict[int, _StepCounts] = {}
+        self._latest_step: int | None = None
+        self._lock = threading.Lock()
+        self.metadata: dict = {}  # Caller state saved with the last snapshot (e.g. a stream offset)
+
+    # --- Single-transaction path (Streamlit page) ---
+
+    def count(self, name_orig: str, step: int) -> int:
+        """Returns how many transactions `name_orig` has made in `step` so far."""
+        table = self._steps.get(int(step))
+        return table.get(int(hash_sender_ids([name_orig])[0])) if table else 0
+
+    def record(self, name_orig: str, step: int) -> int:
+        """Records one transaction and returns the sender's prior count in that step."""
+        key = int(hash_sender_ids([name_orig])[0])
+        with self._lock:
+            previous = self._table_for(int(step)).increment(key)
+            self._expire()
+        return previous
+
+    # --- Columnar path (batch scoring, stream worker) ---
+
+    def record_batch(self, names_orig, steps) -> np.ndarray:
+        """Records a batch in order and returns each row's prior (nameOrig, step) count."""
+        keys = hash_sender_ids(names_orig)
+        steps = np.asarray(steps, dtype=np.int64)
+        prior = np.zeros(len(keys), dtype=np.int64)
+
+        with self._lock:
+            for step in np.unique(steps):
+                rows = np.flatnonzero(steps == step)
+                unique_keys, inverse, group_sizes = np.unique(
+                    keys[rows], return_inverse=True, return_counts=True
+                )
+                table = self._table_for(int(step))
+
+                # Earlier occurrences inside this batch (a vectorized groupby cumcount)
+                order = np.argsort(inverse, kind="stable")
+                group_start = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+                within_batch = np.empty(len(rows), dtype=np.int64)
+                within_batch[order] = np.arange(len(rows)) - group_start[inverse[order]]
+
+                prior[rows] = table.get_many(unique_keys)[inverse] + within_batch
+                table.add_many(unique_keys, group_sizes)
+            self._expire()
+        return prior
+
+    def forget_batch(self, names_orig, steps):
+        """Undoes `record`/`record_batch` for rows that were recorded but never scored."""
+        keys = hash_sender_ids(names_orig)
+        steps = np.asarray(steps, dtype=np.int64)
+        with self._lock:
+            for step in np.unique(steps):
+                table = self._steps.get(int(step))
+                if table is not None:  # Steps that expired meanwhile have nothing to undo
+                    unique_keys, group_sizes = np.unique(keys[steps == step], return_counts=True)
+                    table.remove_many(unique_keys, group_sizes)
+
+    # --- Window management ---
+
+    def _table_for(self, step: int) -> _StepCounts:
+        table = self._steps.get(step)
+        if table is None:
+            table = self._steps[step] = _StepCounts()
+        if self._latest_step is None or step > self._latest_step:
+            self._latest_step = step
+        return table
+
+    def _expire(self):
+        cutoff = self._latest_step - self.window_steps
+        for step in [s for s in self._steps if s <= cutoff]:
+            del self._steps[step]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "steps": len(self._steps),
+                "senders": sum(table.size for table in self._steps.values()),
+                "bytes": sum(table.nbytes for table in self._steps.values()),
+                "latest_step": self._latest_step,
+            }
+
+    # --- Persistence ---
+
+    def snapshot(self, path: str | None = None, metadata: dict | None = None):
+        """Atomically writes the current window to `path` (a .npz file).
+
+        `metadata` (JSON-serialisable) is stored in the same file, so state such
+        as the input offset the counts correspond to is replaced atomically with them.
+        """
+        path = path or self.snapshot_path
+        if metadata is not None:
+            self.metadata = dict(metadata)
+        if not path:
+            return
+        with self._lock:
+            steps = sorted(self._steps)
+            items = [self._steps[step].items() for step in steps]
+
+        keys = np.concatenate([k for k, _ in items]) if items else np.empty(0, np.uint64)
+        counts = np.concatenate([c for _, c in items]) if items else np.empty(0, np.uint32)
+        offsets = np.cumsum([0] + [len(k) for k, _ in items])
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.savez(handle, steps=np.asarray(steps, dtype=np.int64), offsets=offsets,
+                         keys=keys, counts=counts, window_steps=self.window_steps,
+                         metadata=np.asarray(json.dumps(self.metadata)))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, window_steps: int | None = None) -> "VelocityStore":
+        """Restores a store written by `snapshot()`; a missing file yields an empty store."""
+        if not os.path.exists(path):
+            return cls(window_steps or DEFAULT_WINDOW_STEPS, snapshot_path=path)
+
+        with np.load(path) as data:
+            store = cls(window_steps or int(data["window_steps"]), snapshot_path=path)
+            offsets = data["offsets"]
+            for i, step in enumerate(data["steps"]):
+                start, end = offsets[i], offsets[i + 1]
+                store._steps[int(step)] = _StepCounts.from_items(data["keys"][start:end],
+                                                                 data["counts"][start:end])
+            if len(data["steps"]):
+                store._latest_step = int(data["steps"].max())
+            if "metadata" in data:  # Snapshots written before metadata existed have none
+                store.metadata = json.loads(str(data["metadata"]))
+        return store
+
+
+# --- PROCESS-WIDE SHARED STORE ---
+_shared_store: VelocityStore | None = None
+_shared_lock = threading.Lock()
+
+
+def get_velocity_store() -> VelocityStore:
+    """Returns the process-wide store used by the Streamlit page.
+
+    If FRAUDPULSE_VELOCITY_SNAPSHOT is set, the store is restored from that file
+    on first use and snapshotted back to it at interpreter exit.
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            snapshot_path = os.environ.get(SNAPSHOT_ENV_VAR)
+            if snapshot_path:
+                _shared_store = VelocityStore.load(snapshot_path)
+                atexit.register(_shared_store.snapshot)
+            else:
+                _shared_store = VelocityStore()
+        return _shared_store
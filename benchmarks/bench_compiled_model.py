@@ -0,0 +1,79 @@
+# benchmarks/bench_compiled_model.py
+"""Single-row latency: sklearn pipeline vs. the compiled NumPy evaluator.
+
+Usage (from the project root):
+    python benchmarks/bench_compiled_model.py [--iterations 2000]
+
+Reports p50/p99 latency in microseconds for one engineered transaction scored
+through (a) the pickled sklearn pipeline, (b) CompiledPipeline.predict_proba on
+a one-row DataFrame and (c) CompiledPipeline.predict_proba_record on a dict.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.compiled_model import PARITY_TOLERANCE, check_parity, load_compiled, parity_sample
+from app_modules.model_loader import MODEL_PATH, load_pipeline
+
+
+def _latencies_us(fn, inputs, iterations: int) -> np.ndarray:
+    for item in inputs[:50]:  # Warm-up (caches, lazy imports)
+        fn(item)
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(item)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def run(iterations: int = 2000, model_path: str = MODEL_PATH) -> dict:
+    pipeline = load_pipeline(model_path)
+    compiled = load_compiled(model_path)
+    max_error = check_parity(pipeline, compiled)
+
+    sample = parity_sample(200, seed=11)[list(pipeline.feature_names_in_)]
+    frames = [sample.iloc[[i]] for i in range(len(sample))]
+    records = sample.to_dict(orient="records")
+
+    cases = {
+        "sklearn_pipeline": _latencies_us(pipeline.predict_proba, frames, iterations),
+        "compiled_dataframe": _latencies_us(compiled.predict_proba, frames, iterations),
+        "compiled_record": _latencies_us(compiled.predict_proba_record, records, iterations),
+    }
+    results = {
+        name: {"p50_us": float(np.percentile(t, 50)), "p99_us": float(np.percentile(t, 99))}
+        for name, t in cases.items()
+    }
+    results["max_parity_error"] = max_error
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, args.model_path)
+    baseline = results["sklearn_pipeline"]
+    print(f"{'path':<22}{'p50 (us)':>12}{'p99 (us)':>12}{'p50 speedup':>14}")
+    for name in ("sklearn_pipeline", "compiled_dataframe", "compiled_record"):
+        row = results[name]
+        print(f"{name:<22}{row['p50_us']:>12.1f}{row['p99_us']:>12.1f}"
+              f"{baseline['p50_us'] / row['p50_us']:>13.1f}x")
+    print(f"max |p_sklearn - p_compiled| = {results['max_parity_error']:.2e} "
+          f"(tolerance {PARITY_TOLERANCE:g})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_startup.py
+"""Startup cost of the Streamlit app: imports, model load and first prediction.
+
+Usage (from the project root):
+    python benchmarks/bench_startup.py [--repeats 3] [--output startup.json]
+
+Every measurement runs in a fresh interpreter so import and load caches do not
+carry over. Reported (median seconds over the repeats):
+    import_login_path   modules needed to render the login page
+    import_all_pages    the eager imports app.py used to do (pages, pandas, altair)
+    load_pickle         joblib.load of the pipeline as shipped
+    load_mmap           joblib.load of the memory-mappable copy (mmap_mode="r")
+    first_predict       first ScoringEngine.score() without warm-up
+    warm_up             ScoringEngine.warm_up()
+    predict_after_warm_up  first real score() after warm-up
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.model_loader import MODEL_PATH, export_mmap_artifact, mmap_path_for
+
+# Each snippet prints a JSON dict of {name: seconds}
+_PRELUDE = "import json, sys, time; sys.path.insert(0, {root!r}); t = time.perf_counter()\n"
+
+SNIPPETS = {
+    "imports": """
+import app_modules.auth_session
+login = time.perf_counter() - t; t = time.perf_counter()
+import pandas, altair, app_modules.dashboard_reports, app_modules.prediction_utility, app_modules.admin_management, app_modules.log_explorer
+print(json.dumps({{"import_login_path": login, "import_all_pages": time.perf_counter() - t}}))
+""",
+    "load_pickle": """
+from app_modules.model_loader import load_pipeline
+load_pipeline({model_path!r})
+print(json.dumps({{"load_pickle": time.perf_counter() - t}}))
+""",
+    "load_mmap": """
+from app_modules.model_loader import load_pipeline
+load_pipeline({model_path!r}, mmap_mode="r")
+print(json.dumps({{"load_mmap": time.perf_counter() - t}}))
+""",
+    "predict": """
+from app_modules.model_loader import load_pipeline
+from app_modules.scoring_engine import ScoringEngine, WARM_UP_RECORD
+cold = ScoringEngine(load_pipeline({model_path!r}, mmap_mode="r"))
+t = time.perf_counter(); cold.score(dict(WARM_UP_RECORD)); first = time.perf_counter() - t
+print(json.dumps({{"first_predict": first}}))
+""",
+    "warm_predict": """
+from app_modules.model_loader import load_pipeline
+from app_modules.scoring_engine import ScoringEngine, WARM_UP_RECORD
+engine = ScoringEngine(load_pipeline({model_path!r}, mmap_mode="r"))
+warm_up = engine.warm_up()
+t = time.perf_counter(); engine.score(dict(WARM_UP_RECORD))
+print(json.dumps({{"warm_up": warm_up, "predict_after_warm_up": time.perf_counter() - t}}))
+""",
+}
+
+
+def _measure(snippet: str, model_path: str) -> dict:
+    code = _PRELUDE.format(root=PROJECT_ROOT) + snippet.format(model_path=model_path)
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                               cwd=PROJECT_ROOT, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(repeats: int = 3, model_path: str = MODEL_PATH) -> dict:
+    if not os.path.exists(mmap_path_for(model_path)):
+        export_mmap_artifact(model_path)  # Keep the one-off export out of the timings
+
+    samples: dict[str, list[float]] = {}
+    for _ in range(repeats):
+        for snippet in SNIPPETS.values():
+            for name, seconds in _measure(snippet, model_path).items():
+                samples.setdefault(name, []).append(seconds)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FraudPulse startup benchmark")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeats, args.model_path)
+    for name, seconds in results.items():
+        print(f"{name:>24}: {seconds * 1000:9.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
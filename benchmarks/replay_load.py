@@ -0,0 +1,398 @@
+# benchmarks/replay_load.py
+"""Replays PaySim transactions against the serve path and finds its saturation point.
+
+Usage (from the project root):
+    python benchmarks/replay_load.py replay [--input FILE | --synthetic N] (--rate TPS | --speedup X)
+                                            [--clients 8] [--url http://127.0.0.1:8600] [--output run.json]
+    python benchmarks/replay_load.py ramp   [--input FILE | --synthetic N] [--start-rate 50] [--factor 1.5]
+                                            [--stage-seconds 10] [--slo-p99-ms 250] [--clients 8] [--output ramp.json]
+
+The driver is open-loop: a scheduler releases each transaction at its due time
+(a fixed `--rate`, or `--speedup` times the simulated step clock, where one step
+is one hour and a step's transactions are spread evenly over it) into a queue
+that `--clients` threads drain. Latency is measured from the due time, so time
+spent waiting behind a saturated server is counted rather than hidden.
+
+Targets:
+    in-process (default)  MicroBatcher over the registry engine, feature engineering,
+                          scoring and write-behind logging to prediction_logs (a scratch
+                          SQLite file unless --database-url is given)
+    --url                 a running `python -m app_modules.scoring_service` (start it
+                          with --log-predictions to include logging)
+
+Reports throughput, a latency histogram and a per-interval timeline (offered,
+completed, backlog, p50/p99). `ramp` raises the offered rate by `--factor` per
+stage until a stage misses the rate (<90% completed), its p99 exceeds the SLO or
+its backlog keeps growing, and reports the last sustainable rate.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app_modules.synthetic_paysim import generate_transactions
+
+# Serving modules are imported by the in-process target, after main() has chosen the database.
+
+
+# --- CONFIGURATION ---
+STEP_SECONDS = 3600.0  # One PaySim step is one simulated hour
+DEFAULT_CLIENTS = 8
+DEFAULT_INTERVAL = 1.0  # Seconds per timeline sample
+SUSTAINED_FRACTION = 0.9
+# Histogram bucket upper bounds in milliseconds (log-spaced, last bucket is open-ended)
+HISTOGRAM_BOUNDS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+RECORD_FIELDS = ["step", "type", "amount", "nameOrig", "oldbalanceOrg", "newbalanceOrig",
+                 "nameDest", "oldbalanceDest", "newbalanceDest"]
+
+
+# --- WORKLOAD ---
+
+def load_records(input_path: str | None, synthetic_rows: int, seed: int) -> list[dict]:
+    """Raw transactions in file (step) order."""
+    if input_path:
+        from app_modules.batch_scoring import iter_chunks
+        records = []
+        for chunk in iter_chunks(input_path):
+            records.extend(chunk[RECORD_FIELDS].to_dict("records"))
+        return records
+    return generate_transactions(synthetic_rows, seed=seed)[RECORD_FIELDS].to_dict("records")
+
+
+def fixed_rate_offsets(n: int, rate: float) -> np.ndarray:
+    return np.arange(n, dtype=np.float64) / rate
+
+
+def step_clock_offsets(records: list[dict], speedup: float) -> np.ndarray:
+    """Due times at `speedup` x the simulated clock, spreading each step's rows over its hour."""
+    steps = np.fromiter((record["step"] for record in records), dtype=np.int64, count=len(records))
+    offsets = np.empty(len(records), dtype=np.float64)
+    unique_steps, starts, counts = np.unique(steps, return_index=True, return_counts=True)
+    if np.any(np.diff(steps) < 0):
+        raise ValueError("Input is not ordered by step; sort it (PaySim files already are).")
+    for step, start, count in zip(unique_steps, starts, counts):
+        offsets[start:start + count] = (step - unique_steps[0] + np.arange(count) / count) * STEP_SECONDS
+    return offsets / speedup
+
+
+# --- TARGETS ---
+
+class InProcessTarget:
+    """The service's serve path without HTTP: micro-batching, scoring and prediction_logs writes."""
+
+    def __init__(self, model_path: str | None = None, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 log_predictions: bool = True):
+        from app_modules.scoring_service import MicroBatcher, build_engine
+        from database.log_writer import PredictionLogWriter
+
+        self.writer = PredictionLogWriter() if log_predictions else None
+        engine = build_engine(model_path)
+        self.batcher = MicroBatcher(engine, max_batch_size, max_wait_ms, log_writer=self.writer)
+
+    def score(self, record: dict):
+        self.batcher.score([record])
+
+    def stats(self) -> dict:
+        return self.batcher.stats()
+
+    def close(self):
+        self.batcher.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class HttpTarget:
+    """POSTs each transaction to a running scoring service (one keep-alive connection per client)."""
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if getattr(self._local, "connection", None) is None:
+            self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return self._local.connection
+
+    def score(self, record: dict):
+        body = json.dumps(record, default=float)
+        try:
+            connection = self._connection()
+            connection.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._local.connection = None  # Reconnect on the next request
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+
+    def stats(self) -> dict:
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=5)
+        connection.request("GET", "/stats")
+        return json.loads(connection.getresponse().read())
+
+    def close(self):
+        pass
+
+
+# --- DRIVER ---
+
+class Timeline:
+    """Per-interval counters and latencies, plus a run-wide latency histogram."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.histogram = np.zeros(len(HISTOGRAM_BOUNDS_MS) + 1, dtype=np.int64)
+        self.samples: list[dict] = []
+        self._latencies: list[float] = []
+        self._completed = self._errors = self._offered = 0
+
+    def offered(self):
+        with self._lock:
+            self._offered += 1
+
+    def completed(self, latency_ms: float, ok: bool):
+        with self._lock:
+            if ok:
+                self._completed += 1
+                self._latencies.append(latency_ms)
+                self.histogram[np.searchsorted(HISTOGRAM_BOUNDS_MS, latency_ms)] += 1
+            else:
+                self._errors += 1
+
+    def sample(self, elapsed: float, backlog: int):
+        with self._lock:
+            latencies = np.asarray(self._latencies)
+            self.samples.append({
+                "t": round(elapsed, 3),
+                "offered": self._offered,
+                "completed": self._completed,
+                "errors": self._errors,
+                "backlog": backlog,
+                "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            })
+            self._latencies, self._completed, self._errors, self._offered = [], 0, 0, 0
+
+
+def drive(target, records: list[dict], offsets: np.ndarray, clients: int = DEFAULT_CLIENTS,
+          interval: float = DEFAULT_INTERVAL, duration: float | None = None) -> dict:
+    """Releases records at `offsets` (seconds from start) to `clients` threads; returns the run summary.
+
+    Records are reused cyclically when `duration` outlasts the offsets.
+    """
+    work: queue.Queue = queue.Queue()
+    timeline = Timeline(interval)
+    all_latencies: list[np.ndarray] = []
+    latencies_lock = threading.Lock()
+    started = time.perf_counter()
+    span = float(offsets[-1]) + (offsets[-1] - offsets[-2] if len(offsets) > 1 else 1.0)
+
+    def client():
+        local = []
+        while True:
+            item = work.get()
+            if item is None:
+                break
+            due, record = item
+            try:
+                target.score(record)
+                ok = True
+            except Exception:
+                ok = False
+            latency_ms = (time.perf_counter() - due) * 1000.0
+            timeline.completed(latency_ms, ok)
+            if ok:
+                local.append(latency_ms)
+        with latencies_lock:
+            all_latencies.append(np.asarray(local))
+
+    threads = [threading.Thread(target=client, name=f"replay-client-{i}", daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+
+    stop_sampling = threading.Event()
+
+    def sampler():
+        while not stop_sampling.wait(interval):
+            timeline.sample(time.perf_counter() - started, work.qsize())
+
+    sampler_thread = threading.Thread(target=sampler, name="replay-sampler", daemon=True)
+    sampler_thread.start()
+
+    # Scheduler: open loop, never waits for responses
+    released, cycle = 0, 0
+    while True:
+        index = released % len(records)
+        cycle = released // len(records)
+        due_offset = offsets[index] + cycle * span
+        if duration is not None and due_offset >= duration:
+            break
+        if duration is None and cycle > 0:
+            break
+        due = started + due_offset
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        work.put((due, records[index]))
+        timeline.offered()
+        released += 1
+    release_seconds = time.perf_counter() - started
+
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+    stop_sampling.set()
+    sampler_thread.join()
+    total_seconds = time.perf_counter() - started
+    timeline.sample(total_seconds, 0)
+
+    latencies = np.concatenate(all_latencies) if all_latencies else np.empty(0)
+    completed = int(len(latencies))
+    errors = sum(sample["errors"] for sample in timeline.samples)
+    return {
+        "offered": released,
+        "completed": completed,
+        "errors": errors,
+        "offered_rate": released / release_seconds if release_seconds else 0.0,
+        "throughput": completed / total_seconds if total_seconds else 0.0,
+        "release_seconds": release_seconds,
+        "total_seconds": total_seconds,
+        "drain_seconds": total_seconds - release_seconds,
+        "latency_ms": {f"p{p}": float(np.percentile(latencies, p)) for p in (50, 90, 95, 99)} if completed else {},
+        "latency_histogram": {
+            (f"<={bound:g}ms" if i < len(HISTOGRAM_BOUNDS_MS) else f">{HISTOGRAM_BOUNDS_MS[-1]:g}ms"): int(count)
+            for i, (bound, count) in enumerate(zip(HISTOGRAM_BOUNDS_MS + [None], timeline.histogram))
+        },
+        "max_backlog": max((sample["backlog"] for sample in timeline.samples), default=0),
+        "timeline": timeline.samples,
+    }
+
+
+def ramp(target, records: list[dict], start_rate: float, factor: float, stage_seconds: float,
+         slo_p99_ms: float, clients: int, max_stages: int = 20, interval: float = DEFAULT_INTERVAL) -> dict:
+    """Raises the offered rate stage by stage until the target saturates; returns every stage and the verdict."""
+    stages, sustainable = [], None
+    rate = start_rate
+    for _ in range(max_stages):
+        print(f"▶ stage at {rate:,.1f} tx/s for {stage_seconds:g}s")
+        result = drive(target, records, fixed_rate_offsets(len(records), rate), clients, interval, stage_seconds)
+        backlog_tail = [sample["backlog"] for sample in result["timeline"][:-1]][-3:]
+        reasons = []
+        if result["completed"] < SUSTAINED_FRACTION * result["offered"] or \
+                result["throughput"] < SUSTAINED_FRACTION * rate * result["release_seconds"] / result["total_seconds"]:
+            reasons.append("throughput below offered rate")
+        if result["latency_ms"] and result["latency_ms"]["p99"] > slo_p99_ms:
+            reasons.append(f"p99 {result['latency_ms']['p99']:.0f} ms > SLO {slo_p99_ms:g} ms")
+        if len(backlog_tail) >= 3 and backlog_tail[0] < backlog_tail[1] < backlog_tail[2]:
+            reasons.append("backlog growing")
+        if result["errors"]:
+            reasons.append(f"{result['errors']} errors")
+
+        stage = {"offered_rate": rate, "saturated": bool(reasons), "reasons": reasons,
+                 **{k: v for k, v in result.items() if k != "timeline"}, "timeline": result["timeline"]}
+        stages.append(stage)
+        print(f"   throughput {result['throughput']:,.1f} tx/s, p99 {result['latency_ms'].get('p99', float('nan')):.1f} ms, "
+              f"max backlog {result['max_backlog']:,}{'  -> saturated: ' + '; '.join(reasons) if reasons else ''}")
+        if reasons:
+            break
+        sustainable = result["throughput"]
+        rate *= factor
+
+    return {"stages": stages, "sustainable_rate": sustainable,
+            "saturated_at_offered_rate": stages[-1]["offered_rate"] if stages[-1]["saturated"] else None}
+
+
+def _print_summary(result: dict):
+    latency = result["latency_ms"]
+    print(f"✅ {result['completed']:,}/{result['offered']:,} transactions in {result['total_seconds']:.1f}s: "
+          f"{result['throughput']:,.1f} tx/s (offered {result['offered_rate']:,.1f} tx/s), "
+          f"{result['errors']} errors, max backlog {result['max_backlog']:,}")
+    if latency:
+        print(f"   latency p50 {latency['p50']:.1f} ms | p95 {latency['p95']:.1f} ms | p99 {latency['p99']:.1f} ms")
+    for bucket, count in result["latency_histogram"].items():
+        if count:
+            print(f"   {bucket:>10} {count:>9,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Replay at a fixed rate or step-clock speed-up")
+    pacing = replay_parser.add_mutually_exclusive_group(required=True)
+    pacing.add_argument("--rate", type=float, help="Transactions per second")
+    pacing.add_argument("--speedup", type=float, help="Multiple of the simulated step clock (1 step = 1 hour)")
+    replay_parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds (default: one pass)")
+    ramp_parser = subparsers.add_parser("ramp", help="Ramp the offered rate until saturation")
+    ramp_parser.add_argument("--start-rate", type=float, default=50.0)
+    ramp_parser.add_argument("--factor", type=float, default=1.5)
+    ramp_parser.add_argument("--stage-seconds", type=float, default=10.0)
+    ramp_parser.add_argument("--slo-p99-ms", type=float, default=250.0)
+    ramp_parser.add_argument("--max-stages", type=int, default=20)
+    for sub in (replay_parser, ramp_parser):
+        source = sub.add_mutually_exclusive_group()
+        source.add_argument("--input", default=None, help="PaySim CSV/Parquet file, ordered by step")
+        source.add_argument("--synthetic", type=int, default=20_000, help="Rows of synthetic PaySim data")
+        sub.add_argument("--seed", type=int, default=7)
+        sub.add_argument("--clients", type=int, default=DEFAULT_CLIENTS)
+        sub.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Timeline sample interval (s)")
+        sub.add_argument("--url", default=None, help="Drive a running scoring service instead of the in-process path")
+        sub.add_argument("--model-path", default=None)
+        sub.add_argument("--max-batch-size", type=int, default=64)
+        sub.add_argument("--max-wait-ms", type=float, default=5.0)
+        sub.add_argument("--no-log", action="store_true", help="In-process: skip prediction_logs writes")
+        sub.add_argument("--database-url", default=None, help="In-process: log here (default: scratch SQLite)")
+        sub.add_argument("--output", default=None, help="Write the full result (incl. timeline) as JSON")
+    args = parser.parse_args(argv)
+
+    if args.url is None:
+        os.environ["FRAUDPULSE_DATABASE_URL"] = args.database_url or \
+            f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='fraudpulse-replay-'), 'replay.db')}"
+    records = load_records(args.input, args.synthetic, args.seed)
+    target = HttpTarget(args.url) if args.url else InProcessTarget(
+        args.model_path, args.max_batch_size, args.max_wait_ms, log_predictions=not args.no_log)
+
+    try:
+        if args.command == "replay":
+            offsets = fixed_rate_offsets(len(records), args.rate) if args.rate else \
+                step_clock_offsets(records, args.speedup)
+            result = drive(target, records, offsets, args.clients, args.interval, args.duration)
+            _print_summary(result)
+        else:
+            result = ramp(target, records, args.start_rate, args.factor, args.stage_seconds, args.slo_p99_ms,
+                          args.clients, args.max_stages, args.interval)
+            if result["sustainable_rate"] is None:
+                print(f"❌ Saturated at the first stage ({args.start_rate:g} tx/s); lower --start-rate.")
+            else:
+                print(f"✅ Sustainable throughput ≈ {result['sustainable_rate']:,.1f} tx/s"
+                      + (f"; saturated at {result['saturated_at_offered_rate']:,.1f} tx/s offered"
+                         if result["saturated_at_offered_rate"] else " (never saturated; raise --max-stages)"))
+        result["target"] = {"url": args.url} if args.url else {"in_process": True, "logging": not args.no_log}
+        result["server_stats"] = target.stats()
+    finally:
+        target.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,145 @@
+"""Streaming, stratified sampler for the PaySim dataset ("AIML Dataset.csv").
+
+Reads the CSV in chunks with explicit dtypes (`type` as category, int16 step,
+int8 flags; amounts and balances stay float64 so the sample keeps the cents the
+balance-difference features are built from), so memory is bounded by the chunk
+size rather than the 6.3M-row file. In one pass it keeps every fraud row
+(`--positive-fraction 1.0`) plus a random fraction of the negatives, streams
+the kept rows to the output, and records the sampling design:
+
+    * a `sample_weight` column (1 / inclusion probability of the row's stratum),
+      so downstream metrics and training can be reweighted to the population;
+    * `<output>.sampling.json` with per-stratum population and sample counts.
+
+Rows are drawn with one seeded random stream, so the sample does not depend
+on the chunk size.
+
+Usage (from the project root):
+    python code/SampleData.py "AIML Dataset.csv" AIML_Sample_Stratified.csv --negative-fraction 0.1
+    python code/SampleData.py "AIML Dataset.csv" AIML_Sample_10Pct.csv --uniform 0.1   # old behaviour
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
+# Make the project root importable so the shared chunk writer can be used from code/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_modules.batch_scoring import ResultWriter
+
+
 # The file name you used in your notebook
 INPUT_FILE_NAME = "AIML Dataset.csv"
 
 # The name for your new, smaller sample file
-OUTPUT_FILE_NAME = "AIML_Sample_10Pct.csv"
+OUTPUT_FILE_NAME = "AIML_Sample_Stratified.csv"
+
+DEFAULT_CHUNKSIZE = 500_000
+DEFAULT_NEGATIVE_FRACTION = 0.1
+RANDOM_STATE = 42
+
+TRANSACTION_TYPES = pd.CategoricalDtype(["CASH_IN", "CASH_OUT", "DEBIT", "PAYMENT", "TRANSFER"])
+PAYSIM_DTYPES = {
+    "step": "int16",            # 1..743
+    "type": TRANSACTION_TYPES,
+    "amount": "float64",        # float32 would round 9839.64 to 9839.6396484375
+    "nameOrig": "object",       # ~6.3M distinct ids: a category would not save memory
+    "oldbalanceOrg": "float64",
+    "newbalanceOrig": "float64",
+    "nameDest": "object",
+    "oldbalanceDest": "float64",
+    "newbalanceDest": "float64",
+    "isFraud": "int8",
+    "isFlaggedFraud": "int8",
+}
+
+
+def stratified_sample(input_path: str, output_path: str, positive_fraction: float = 1.0,
+                      negative_fraction: float = DEFAULT_NEGATIVE_FRACTION,
+                      chunksize: int = DEFAULT_CHUNKSIZE, seed: int = RANDOM_STATE) -> dict:
+    """Streams `input_path` into a fraud-stratified sample at `output_path`; returns the design summary."""
+    for name, fraction in (("positive_fraction", positive_fraction), ("negative_fraction", negative_fraction)):
+        if not 0.0 < fraction <= 1.0:
+            raise ValueError(f"{name} must be in (0, 1], got {fraction}")
+
+    rng = np.random.default_rng(seed)
+    fractions = np.array([negative_fraction, positive_fraction])  # Indexed by isFraud
+    weights = (1.0 / fractions).astype(np.float32)
+    population = np.zeros(2, dtype=np.int64)
+    sampled = np.zeros(2, dtype=np.int64)
+    writer = ResultWriter(output_path)
+
+    try:
+        for chunk in pd.read_csv(input_path, dtype=PAYSIM_DTYPES, chunksize=chunksize):
+            labels = chunk["isFraud"].to_numpy(dtype=np.int64)
+            keep = rng.random(len(chunk)) < fractions[labels]  # Bernoulli draw per row, per stratum
+
+            population += np.bincount(labels, minlength=2)
+            sampled += np.bincount(labels[keep], minlength=2)
+
+            kept = chunk[keep]
+            if len(kept):
+                writer.write(kept.assign(sample_weight=weights[labels[keep]]))
+    finally:
+        writer.close()
+
+    design = {
+        "input": os.path.abspath(input_path),
+        "seed": seed,
+        "strata": {
+            label: {
+                "inclusion_probability": float(fractions[index]),
+                "design_weight": float(weights[index]),
+                "population_rows": int(population[index]),
+                "sampled_rows": int(sampled[index]),
+                # Realised weight (population / sample) corrects for Bernoulli sampling noise
+                "realised_weight": float(population[index] / sampled[index]) if sampled[index] else None,
+            }
+            for index, label in enumerate(["isFraud=0", "isFraud=1"])
+        },
+    }
+    with open(output_path + ".sampling.json", "w") as f:
+        json.dump(design, f, indent=2)
+    return design
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming stratified sampler for the PaySim dataset")
+    parser.add_argument("input_path", nargs="?", default=INPUT_FILE_NAME)
+    parser.add_argument("output_path", nargs="?", default=OUTPUT_FILE_NAME,
+                        help="CSV or Parquet (.parquet) destination")
+    parser.add_argument("--negative-fraction", type=float, default=DEFAULT_NEGATIVE_FRACTION,
+                        help="Share of isFraud==0 rows to keep (default 0.1)")
+    parser.add_argument("--positive-fraction", type=float, default=1.0,
+                        help="Share of isFraud==1 rows to keep (default: all of them)")
+    parser.add_argument("--uniform", type=float, default=None, metavar="FRACTION",
+                        help="Plain random sample: the same fraction for both classes")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    args = parser.parse_args(argv)
 
-try:
-    # 1. Load the entire large dataset (this must be run locally)
-    df_large = pd.read_csv("E:\FraudPulse\Data\AIML Dataset.csv", low_memory=False)
+    positive, negative = (args.uniform, args.uniform) if args.uniform is not None else \
+        (args.positive_fraction, args.negative_fraction)
+    try:
+        design = stratified_sample(args.input_path, args.output_path, positive, negative,
+                                   args.chunksize, args.seed)
+    except FileNotFoundError:
+        print(f"Error: Make sure '{args.input_path}' exists (pass the dataset path as the first argument).")
+        return
 
-    # 2. Sample 10% of the rows randomly for our analysis
-    # We use random_state=42 for reproducibility.
-    df_sample = df_large.sample(frac=0.1, random_state=42)
+    strata = design["strata"]
+    total = sum(stratum["sampled_rows"] for stratum in strata.values())
+    print(f"✅ Success! Created sample file: {args.output_path}")
+    for label, stratum in strata.items():
+        print(f"   {label}: kept {stratum['sampled_rows']:,} of {stratum['population_rows']:,} "
+              f"(weight {stratum['design_weight']:g})")
+    print(f"The sample has {total:,} rows; sampling weights are in 'sample_weight' and "
+          f"{args.output_path}.sampling.json")
 
-    # 3. Save the sampled data to a new CSV file
-    df_sample.to_csv(OUTPUT_FILE_NAME, index=False)
 
-    print(f"✅ Success! Created sample file: {OUTPUT_FILE_NAME}")
-    print(f"The sample has {len(df_sample):,} rows (10% of the original).")
-    
-except FileNotFoundError:
-    print(f"Error: Make sure '{INPUT_FILE_NAME}' is in the same directory as this script.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import streamlit as st
-import pandas as pd
 import joblib
 import os
+import sys
 from datetime import datetime
 
+# Make the project root importable so the shared ScoringEngine can be used from code/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_modules.scoring_engine import ScoringEngine
+
 # --- 1. CONFIGURATION & MODEL LOADING PATH ---
 
 # 🛑 CHANGE 1: Use the final MLOps deployment path for the saved pipeline.
@@ -12,7 +16,7 @@ MODEL_PATH = r"E:\FraudPulse\models\fraud_detection_deployment_pipeline.pkl"
 # Use a try-except block for robust loading
 try:
     # 🛑 CHANGE 2: Use the correct path variable and handle loading errors.
-    model = joblib.load(MODEL_PATH)
+    model = ScoringEngine(joblib.load(MODEL_PATH))
     st.sidebar.success("✅ Model Pipeline Loaded")
 except FileNotFoundError:
     st.error(f"❌ ERROR: Model file not found at {MODEL_PATH}. Check file path.")
@@ -46,8 +50,8 @@ nameDest = st.text_input("Receiver ID (nameDest)", value="C_TEST_RECEIVER")
 
 # --- 3. PREDICTION LOGIC & FEATURE ENGINEERING ---
 if st.button("PREDICT RISK"):
-    # 1. Create Raw Data Frame
-    input_data = pd.DataFrame([{
+    # 1. Create Raw Transaction Record
+    input_data = {
         "type": transaction_type,
         "amount": amount,
         "oldbalanceOrg": oldbalanceOrg,
@@ -58,28 +62,13 @@ if st.button("PREDICT RISK"):
         "nameOrig": nameOrig,
         "nameDest": nameDest,
         "isFlaggedFraud": 0 # Placeholder for consistent column count (optional but safer)
-    }])
-
-    # 🛑 CHANGE 5: Perform Feature Engineering in Real-Time (MUST match training logic)
-    
-    # a. Core Predictor (Balance Difference)
-    input_data["balanceDiffOrig"] = input_data["oldbalanceOrg"] - input_data["newbalanceOrig"]
-    input_data["balanceDiffDest"] = input_data["newbalanceDest"] - input_data["oldbalanceDest"]
-    
-    # b. Behavioral Flag (is_merchant)
-    input_data["is_merchant"] = input_data["nameDest"].str.startswith('M').astype(int)
-    
-    # c. Velocity Feature Proxy (MUST be added, but hardcoded for MVP demo)
-    # In a production API, this would query a database; here we assume low velocity (0).
-    input_data['Orig_Count_1step'] = 0 
-    
-    # 2. Final Feature Selection
-    # 🛑 CHANGE 6: Drop raw columns not expected by the ColumnTransformer/Model
-    X_predict = input_data.drop(columns=['nameOrig', 'nameDest', 'isFlaggedFraud', 'step'])
+    }
 
-    # 3. Prediction
-    prediction = model.predict(X_predict)[0]
-    risk_score = model.predict_proba(X_predict)[0][1] # Get confidence score
+    # 🛑 CHANGE 5: Feature Engineering (shared with training/serving), feature selection and a
+    # single predict_proba pass all happen inside ScoringEngine.score()
+    # (No velocity store here, so Orig_Count_1step stays 0 as in the MVP demo.)
+    result = model.score(input_data)
+    prediction, risk_score = result.predicted_class, result.risk_score
 
     # 4. Display Results (Enhanced)
     st.subheader(f"RISK ASSESSMENT: {'FRAUD (1)' if prediction == 1 else 'SAFE (0)'}")
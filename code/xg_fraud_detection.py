@@ -1,9 +1,13 @@
 import streamlit as st
-import pandas as pd
 import joblib
 import os
+import sys
 from datetime import datetime
 
+# Make the project root importable so the shared ScoringEngine can be used from code/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_modules.scoring_engine import ScoringEngine
+
 # --- Configuration ---
 MODEL_PATH = r"E:\FraudPulse\models\fraud_detection_deployment_pipeline.pkl"
 
@@ -15,7 +19,7 @@ try:
         st.error(f"❌ Model file not found at the specified path: {MODEL_PATH}")
         st.stop()
         
-    xgb_pipeline = joblib.load(MODEL_PATH)
+    xgb_pipeline = ScoringEngine(joblib.load(MODEL_PATH))
     st.sidebar.success("✅ Model Pipeline Loaded")
 except Exception as e:
     st.error(f"❌ Error loading pipeline: {e}")
@@ -47,8 +51,8 @@ nameDest = st.text_input("Receiver ID (C or M)", value="C987654321")
 
 # --- Prediction Logic ---
 if st.button("PREDICT RISK"):
-    # 1. Create a DataFrame from the raw inputs
-    input_data = pd.DataFrame([{
+    # 1. Create a record from the raw inputs
+    input_data = {
         "type": transaction_type,
         "amount": amount,
         "oldbalanceOrg": oldbalanceOrg,
@@ -59,32 +63,14 @@ if st.button("PREDICT RISK"):
         "nameOrig": nameOrig, # Needed for Orig_Count_1step (FE)
         "nameDest": nameDest, # Needed for is_merchant (FE)
         "isFlaggedFraud": 0 # Placeholder, as the model was trained with this column's index
-    }])
-    
-    # 2. FEATURE ENGINEERING (MUST be done before prediction, matching training data)
-    
-    # a. Difference Features (Core Predictors)
-    input_data["balanceDiffOrig"] = input_data["oldbalanceOrg"] - input_data["newbalanceOrig"]
-    input_data["balanceDiffDest"] = input_data["newbalanceDest"] - input_data["oldbalanceDest"]
-    
-    # b. Behavioral Flag
-    input_data["is_merchant"] = input_data["nameDest"].str.startswith('M').astype(int)
-    
-    # c. Velocity Feature Proxy (Based on our simplified training feature)
-    # In a real API, this would require querying a database for 'nameOrig' activity in the last hour.
-    # For the MVP demo, we assume no recent history (0) unless specified.
-    # We will assume a fixed value for demonstration purposes:
-    input_data['Orig_Count_1step'] = 0 
-    
-    # 3. Data Cleaning / Feature Selection
-    # Drop all columns the pipeline expects to NOT see (IDs, time, etc.)
-    X_predict = input_data.drop(columns=[
-        'nameOrig', 'nameDest', 'isFlaggedFraud', 'step'
-    ])
+    }
     
-    # 4. Prediction
-    prediction = xgb_pipeline.predict(X_predict)[0]
-    risk_score = xgb_pipeline.predict_proba(X_predict)[0][1]
+    # 2-4. FEATURE ENGINEERING, FEATURE SELECTION and PREDICTION
+    # ScoringEngine applies the shared training feature logic and runs predict_proba once;
+    # the class is derived from the configured threshold policy.
+    # (No velocity store here, so Orig_Count_1step stays 0 as in the MVP demo.)
+    result = xgb_pipeline.score(input_data)
+    prediction, risk_score = result.predicted_class, result.risk_score
     
     # --- 5. Display Results ---
     st.subheader(f"RISK ASSESSMENT: {'FRAUD (1)' if prediction == 1 else 'SAFE (0)'}")
@@ -1,21 +1,48 @@
 # database/auth_manager.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import NamedTuple
 from bcrypt import hashpw, checkpw, gensalt
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from .models import Employee # Import the Employee table model
 import streamlit as st # Used for accessing session state in the delete function (security check)
 
+# --- Password Hashing Configuration ---
+# bcrypt work factor (log2 rounds). Each +1 doubles login CPU time; existing hashes
+# are upgraded/downgraded transparently on the next successful login.
+BCRYPT_ROUNDS_ENV_VAR = "FRAUDPULSE_BCRYPT_ROUNDS"
+DEFAULT_BCRYPT_ROUNDS = 12
+
+def get_bcrypt_rounds() -> int:
+    """Configured bcrypt cost, clamped to the range bcrypt accepts (4-31)."""
+    return min(max(int(os.environ.get(BCRYPT_ROUNDS_ENV_VAR, DEFAULT_BCRYPT_ROUNDS)), 4), 31)
+
 # --- Password Hashing and Verification ---
 
-def get_password_hash(password: str) -> str:
-    """Hashes a plaintext password securely using bcrypt."""
-    return hashpw(password.encode('utf-8'), gensalt()).decode('utf-8')
+def get_password_hash(password: str, rounds: int | None = None) -> str:
+    """Hashes a plaintext password securely using bcrypt at the configured cost."""
+    return hashpw(password.encode('utf-8'), gensalt(rounds or get_bcrypt_rounds())).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Checks if a plaintext password matches a stored hashed password."""
     return checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def password_needs_rehash(hashed_password: str, rounds: int | None = None) -> bool:
+    """True when a stored hash ("$2b$<cost>$...") was made with a different cost."""
+    try:
+        stored_rounds = int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return stored_rounds != (rounds or get_bcrypt_rounds())
+
 def authenticate_user(db: Session, username: str, password: str) -> Employee | None:
-    """R: Reads a user from the database and verifies the password."""
+    """R: Reads a user from the database and verifies the password.
+
+    On success the hash is re-computed at the configured cost if it was stored
+    with a different one (the plaintext is only available at this point).
+    """
     user = db.query(Employee).filter(Employee.username == username).first()
     
     if not user:
@@ -23,6 +50,15 @@ def authenticate_user(db: Session, username: str, password: str) -> Employee | N
 
     if not verify_password(password, user.hashed_password):
         return None # Password incorrect
+
+    if password_needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = get_password_hash(password)
+            db.commit()
+            db.refresh(user)
+        except Exception as e:
+            db.rollback() # Keep the login; the old hash still verifies
+            print(f"⚠️ Password rehash failed for '{username}': {e}")
         
     return user # Authentication successful
 
@@ -83,4 +119,80 @@ def delete_employee(db: Session, user_id: int, current_user_session_username: st
 
 def get_all_employees(db: Session):
     """R: Reads all employee records for the administrative display."""
-    return db.query(Employee).all()
\ No newline at end of file
+    return db.query(Employee).all()
+
+def search_employees(db: Session, search: str = "", after_id: int = 0, page_size: int = 50) -> tuple[list[Employee], int | None]:
+    """R: One page of employees ordered by id, optionally filtered by a username substring.
+
+    Keyset paging (id > after_id) keeps deep pages as cheap as the first.
+    Returns (employees, next_after_id) where next_after_id is None on the last page.
+    """
+    query = db.query(Employee).filter(Employee.id > after_id)
+    if search:
+        # Escape LIKE wildcards so '%' and '_' in the search match themselves
+        pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Employee.username.ilike(f"%{pattern}%", escape="\\"))
+    employees = query.order_by(Employee.id).limit(page_size + 1).all()
+    if len(employees) > page_size:
+        return employees[:page_size], employees[page_size - 1].id
+    return employees, None
+
+# --- Bulk Provisioning ---
+
+BULK_LOOKUP_CHUNK = 500 # Usernames per IN (...) query, well under SQLite's variable limit
+BULK_PARALLEL_MIN = 8   # Below this many passwords a process pool costs more than it saves
+
+class BulkImportResult(NamedTuple):
+    created: list[str]
+    existing: list[str]   # Already in the database
+    duplicates: list[str] # Repeated within the import itself (first occurrence kept)
+    invalid: list[int]    # Row numbers (0-based) missing a username or password
+
+def _hash_passwords(passwords: list[str], rounds: int, workers: int | None) -> list[str]:
+    """bcrypt is CPU-bound, so large imports fan out across processes."""
+    workers = workers or os.cpu_count() or 1
+    if len(passwords) < BULK_PARALLEL_MIN or workers == 1:
+        return [get_password_hash(password, rounds) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(get_password_hash, passwords, repeat(rounds), chunksize=chunksize))
+
+def bulk_add_employees(db: Session, rows: list[dict], workers: int | None = None) -> BulkImportResult:
+    """C: Creates many users at once from dicts with username, password and optional is_admin.
+
+    Uniqueness is checked with set-based IN queries, passwords are hashed in a
+    process pool, and all new rows are inserted in one transaction (all or nothing).
+    """
+    candidates, seen, duplicates, invalid = [], set(), [], []
+    for index, row in enumerate(rows):
+        username = str(row.get("username") or "").strip()
+        password = str(row.get("password") or "")
+        if not username or not password:
+            invalid.append(index)
+        elif username in seen:
+            duplicates.append(username)
+        else:
+            seen.add(username)
+            candidates.append((username, password, bool(row.get("is_admin", False))))
+
+    names = [username for username, _, _ in candidates]
+    existing = set()
+    for start in range(0, len(names), BULK_LOOKUP_CHUNK):
+        chunk = names[start:start + BULK_LOOKUP_CHUNK]
+        existing.update(name for (name,) in db.query(Employee.username).filter(Employee.username.in_(chunk)))
+    candidates = [candidate for candidate in candidates if candidate[0] not in existing]
+
+    if candidates:
+        hashes = _hash_passwords([password for _, password, _ in candidates], get_bcrypt_rounds(), workers)
+        try:
+            db.execute(insert(Employee), [
+                {"username": username, "hashed_password": hashed, "is_admin": is_admin}
+                for (username, _, is_admin), hashed in zip(candidates, hashes)
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return BulkImportResult([username for username, _, _ in candidates],
+                            sorted(existing), duplicates, invalid)
\ No newline at end of file
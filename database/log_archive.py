@@ -0,0 +1,243 @@
+# database/log_archive.py
+"""Retention for prediction_logs: a day-partitioned Parquet archive and a hot+cold reader.
+
+Usage (from the project root):
+    python -m database.log_archive compact [--retention-days 30] [--batch-size 50000] [--vacuum]
+    python -m database.log_archive status
+    python -m database.log_archive export OUTPUT_FILE [--start ISO_TIME] [--end ISO_TIME] [--types T ...]
+
+`compact_logs()` moves rows older than the retention window out of SQLite into
+zstd-compressed Parquet files under ARCHIVE_DIR/date=YYYY-MM-DD/ (one file per
+batch and day, named by id range), one bounded transaction per batch. Each
+batch's files are written (tmp file + rename) before its rows are deleted, so
+a crash in between leaves the rows in both places; readers de-duplicate by id
+and the next run rewrites the same files. Only rows already folded into the
+hourly rollups are moved (KPIs keep counting them), and the newest row always
+stays in SQLite so its ids are never reused.
+
+`read_logs()` answers the same LogFilters as the log explorer from SQLite and
+the archive together (partition pruning by day), for reports and exports.
+
+Configuration (environment):
+    FRAUDPULSE_ARCHIVE_DIR            archive root (default archive/prediction_logs)
+    FRAUDPULSE_LOG_RETENTION_DAYS     days kept in SQLite (default 30)
+"""
+
+import argparse
+import datetime
+import glob
+import os
+
+import pandas as pd
+from sqlalchemy import BigInteger, DateTime, Float, Integer, String, delete, func, select
+from sqlalchemy.orm import Session
+
+from .database_connector import PROJECT_ROOT, engine, session_scope
+from .log_queries import LogFilters
+from .models import PredictionLog
+from .rollups import get_high_water_mark, refresh_rollups
+from .schema import ensure_schema
+
+
+# --- CONFIGURATION ---
+DEFAULT_ARCHIVE_DIR = os.path.join(PROJECT_ROOT, "archive", "prediction_logs")
+ARCHIVE_DIR = os.environ.get("FRAUDPULSE_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR)
+DEFAULT_RETENTION_DAYS = float(os.environ.get("FRAUDPULSE_LOG_RETENTION_DAYS", 30))
+DEFAULT_BATCH_SIZE = 50_000
+COMPRESSION = "zstd"
+
+ARCHIVE_COLUMNS = [column.name for column in PredictionLog.__table__.columns]
+
+
+def archive_schema():
+    """Arrow schema of the archive files, derived from the PredictionLog columns."""
+    import pyarrow as pa  # Imported lazily: only needed once logs are archived
+
+    arrow_types = {Integer: pa.int64(), BigInteger: pa.int64(), Float: pa.float64(), String: pa.string(),
+                   DateTime: pa.timestamp("us")}
+    return pa.schema([(column.name, arrow_types[type(column.type)]) for column in PredictionLog.__table__.columns])
+
+
+# --- COMPACTION ---
+
+def _write_partition(rows: list, archive_dir: str, day: datetime.date) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = os.path.join(archive_dir, f"date={day.isoformat()}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{rows[0].id:012d}-{rows[-1].id:012d}.parquet")
+    table = pa.Table.from_pydict(dict(zip(ARCHIVE_COLUMNS, map(list, zip(*rows)))), schema=archive_schema())
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+    return path
+
+
+def compact_logs(retention_days: float = DEFAULT_RETENTION_DAYS, archive_dir: str = ARCHIVE_DIR,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_batches: int | None = None,
+                 session_factory=None, now: datetime.datetime | None = None) -> dict:
+    """Archives and deletes prediction_logs rows older than `retention_days`; returns counters."""
+    session_factory = session_factory or (lambda: session_scope(commit=True))
+    cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(days=retention_days)
+    with session_factory() as db:
+        refresh_rollups(db)  # Archived rows must already be reflected in the KPIs
+        db.commit()
+        upper = min(get_high_water_mark(db), (db.scalar(select(func.max(PredictionLog.id))) or 0) - 1)
+
+    stats = {"cutoff": cutoff, "rows": 0, "batches": 0, "files": 0}
+    table = PredictionLog.__table__
+    after = 0
+    while max_batches is None or stats["batches"] < max_batches:
+        eligible = (PredictionLog.id > after, PredictionLog.id <= upper, PredictionLog.timestamp < cutoff)
+        with session_factory() as db:
+            rows = db.execute(select(*table.columns).where(*eligible)
+                              .order_by(PredictionLog.id).limit(batch_size)).all()
+            if not rows:
+                break
+            by_day: dict[datetime.date, list] = {}
+            for row in rows:
+                by_day.setdefault(row.timestamp.date(), []).append(row)
+            for day, day_rows in by_day.items():
+                _write_partition(day_rows, archive_dir, day)
+            # Every eligible row up to the batch's last id is in the batch (ordered by id, limited)
+            after = rows[-1].id
+            db.execute(delete(PredictionLog).where(*eligible[1:], PredictionLog.id <= after))
+            db.commit()
+        stats["rows"] += len(rows)
+        stats["batches"] += 1
+        stats["files"] += len(by_day)
+    return stats
+
+
+def vacuum(bind=engine):
+    """Returns SQLite pages freed by compaction to the filesystem (rewrites the file)."""
+    if bind.dialect.name == "sqlite":
+        with bind.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+
+
+# --- HOT + COLD READER ---
+
+def archive_files(archive_dir: str = ARCHIVE_DIR) -> list[str]:
+    return sorted(glob.glob(os.path.join(archive_dir, "date=*", "part-*.parquet")))
+
+
+def _archive_expression(filters: LogFilters):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    expression = ds.field("timestamp").is_valid()
+    if filters.transaction_types:
+        expression &= ds.field("transaction_type").isin(list(filters.transaction_types))
+    if filters.predicted_class is not None:
+        expression &= ds.field("predicted_class") == filters.predicted_class
+    if filters.min_risk_score is not None:
+        expression &= ds.field("risk_score") >= filters.min_risk_score
+    if filters.max_risk_score is not None:
+        expression &= ds.field("risk_score") <= filters.max_risk_score
+    # The day partition prunes whole directories; the timestamp filter trims the boundary days
+    if filters.start_time is not None:
+        expression &= ds.field("date") >= filters.start_time.date().isoformat()
+        expression &= ds.field("timestamp") >= pa.scalar(filters.start_time, pa.timestamp("us"))
+    if filters.end_time is not None:
+        expression &= ds.field("date") <= filters.end_time.date().isoformat()
+        expression &= ds.field("timestamp") < pa.scalar(filters.end_time, pa.timestamp("us"))
+    return expression
+
+
+def read_archive(filters: LogFilters | None = None, columns: list[str] | None = None,
+                 archive_dir: str = ARCHIVE_DIR) -> pd.DataFrame:
+    """Archived rows matching `filters` (empty frame when nothing is archived)."""
+    columns = columns or ARCHIVE_COLUMNS
+    files = archive_files(archive_dir)
+    if not files:
+        return pd.DataFrame(columns=columns)
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    schema = archive_schema().append(pa.field("date", pa.string()))
+    dataset = ds.dataset(files, schema=schema, format="parquet", partition_base_dir=archive_dir,
+                         partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"))
+    return dataset.to_table(columns=columns, filter=_archive_expression(filters or LogFilters())).to_pandas()
+
+
+def read_logs(db: Session, filters: LogFilters | None = None, columns: list[str] | None = None,
+              archive_dir: str = ARCHIVE_DIR) -> pd.DataFrame:
+    """Rows matching `filters` from SQLite and the archive together, newest first, one per id."""
+    filters = filters or LogFilters()
+    columns = list(dict.fromkeys(["id", "timestamp"] + (columns or ARCHIVE_COLUMNS)))
+    table = PredictionLog.__table__
+    query = filters.apply(select(*[table.c[name] for name in columns]).where(PredictionLog.timestamp.is_not(None)))
+    hot = pd.DataFrame.from_records(db.execute(query).all(), columns=columns)
+    cold = read_archive(filters, columns, archive_dir)
+    frames = [frame for frame in (hot, cold) if not frame.empty]
+    if not frames:
+        return hot
+    # Hot rows win: a row can be in both only between an archive write and its delete
+    combined = pd.concat(frames, ignore_index=True).drop_duplicates("id", keep="first")
+    return combined.sort_values(["timestamp", "id"], ascending=False, ignore_index=True)
+
+
+def archive_summary(archive_dir: str = ARCHIVE_DIR) -> dict:
+    """Row, file and byte counts of the archive (row counts come from the Parquet footers)."""
+    files = archive_files(archive_dir)
+    rows = 0
+    if files:
+        import pyarrow.parquet as pq
+        rows = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+    days = sorted({os.path.basename(os.path.dirname(path))[len("date="):] for path in files})
+    return {"files": len(files), "rows": rows, "bytes": sum(os.path.getsize(path) for path in files),
+            "first_day": days[0] if days else None, "last_day": days[-1] if days else None}
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive old prediction_logs rows to Parquet")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="Move rows past the retention window to the archive")
+    compact_parser.add_argument("--retention-days", type=float, default=DEFAULT_RETENTION_DAYS)
+    compact_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                                help="Rows per archive-and-delete transaction")
+    compact_parser.add_argument("--max-batches", type=int, default=None)
+    compact_parser.add_argument("--vacuum", action="store_true", help="Shrink the SQLite file afterwards")
+    subparsers.add_parser("status", help="Rows in SQLite and in the archive")
+    export_parser = subparsers.add_parser("export", help="Write hot + archived rows to CSV or Parquet")
+    export_parser.add_argument("output_path")
+    export_parser.add_argument("--start", type=datetime.datetime.fromisoformat, default=None)
+    export_parser.add_argument("--end", type=datetime.datetime.fromisoformat, default=None)
+    export_parser.add_argument("--types", nargs="+", default=None, help="Transaction types to include")
+    args = parser.parse_args(argv)
+
+    ensure_schema()
+    if args.command == "compact":
+        stats = compact_logs(args.retention_days, args.archive_dir, args.batch_size, args.max_batches)
+        print(f"✅ Archived {stats['rows']:,} rows older than {stats['cutoff']:%Y-%m-%d %H:%M} "
+              f"in {stats['batches']} batches ({stats['files']} files) to {args.archive_dir}")
+        if args.vacuum:
+            vacuum()
+            print("✅ SQLite file vacuumed.")
+    elif args.command == "status":
+        with session_scope() as db:
+            hot_rows = db.scalar(select(func.count()).select_from(PredictionLog))
+            oldest = db.scalar(select(func.min(PredictionLog.timestamp)))
+        summary = archive_summary(args.archive_dir)
+        print(f"SQLite: {hot_rows:,} rows (oldest {oldest or '—'})")
+        print(f"Archive: {summary['rows']:,} rows in {summary['files']} files, {summary['bytes'] / 2**20:,.1f} MB "
+              f"({summary['first_day'] or '—'} to {summary['last_day'] or '—'})")
+    else:
+        filters = LogFilters(transaction_types=tuple(args.types) if args.types else None,
+                             start_time=args.start, end_time=args.end)
+        with session_scope() as db:
+            frame = read_logs(db, filters, archive_dir=args.archive_dir)
+        if args.output_path.lower().endswith((".parquet", ".pq")):
+            frame.to_parquet(args.output_path, index=False)
+        else:
+            frame.to_csv(args.output_path, index=False)
+        print(f"✅ Exported {len(frame):,} rows to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# database/log_queries.py
+"""Keyset-paginated, filterable reads over prediction_logs.
+
+Pages are ordered newest first by (timestamp, id) and continue from the last
+row of the previous page (`WHERE (timestamp, id) < (:ts, :id)`) instead of
+OFFSET, so page 1,000 costs the same as page 1. Results are built column-wise
+into a DataFrame straight from the row tuples.
+"""
+
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from .models import PredictionLog
+
+
+DEFAULT_PAGE_SIZE = 100
+
+LOG_COLUMNS = [
+    PredictionLog.id, PredictionLog.timestamp, PredictionLog.transaction_type, PredictionLog.amount,
+    PredictionLog.oldbalanceOrg, PredictionLog.newbalanceOrig, PredictionLog.risk_score,
+    PredictionLog.predicted_class, PredictionLog.model_version,
+]
+
+
+@dataclass(frozen=True)
+class LogFilters:
+    """Optional filters; every field left as None is ignored."""
+    transaction_types: tuple[str, ...] | None = None
+    min_risk_score: float | None = None
+    max_risk_score: float | None = None
+    predicted_class: int | None = None
+    start_time: datetime.datetime | None = None
+    end_time: datetime.datetime | None = None
+
+    def apply(self, query):
+        if self.transaction_types:
+            query = query.where(PredictionLog.transaction_type.in_(self.transaction_types))
+        if self.predicted_class is not None:
+            query = query.where(PredictionLog.predicted_class == self.predicted_class)
+        if self.min_risk_score is not None:
+            query = query.where(PredictionLog.risk_score >= self.min_risk_score)
+        if self.max_risk_score is not None:
+            query = query.where(PredictionLog.risk_score <= self.max_risk_score)
+        if self.start_time is not None:
+            query = query.where(PredictionLog.timestamp >= self.start_time)
+        if self.end_time is not None:
+            query = query.where(PredictionLog.timestamp < self.end_time)
+        return query
+
+
+@dataclass(frozen=True)
+class LogPage:
+    rows: pd.DataFrame
+    next_cursor: tuple[datetime.datetime, int] | None  # Pass as `after` to fetch the next page
+
+
+def fetch_log_page(db: Session, filters: LogFilters | None = None,
+                   after: tuple[datetime.datetime, int] | None = None,
+                   page_size: int = DEFAULT_PAGE_SIZE) -> LogPage:
+    """Returns one page of logs (newest first) strictly after the (timestamp, id) cursor."""
+    query = select(*LOG_COLUMNS).where(PredictionLog.timestamp.is_not(None))
+    query = (filters or LogFilters()).apply(query)
+    if after is not None:
+        query = query.where(tuple_(PredictionLog.timestamp, PredictionLog.id) < tuple_(*after))
+    query = query.order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc()).limit(page_size + 1)
+
+    rows = db.execute(query).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    frame = pd.DataFrame.from_records(rows, columns=[column.key for column in LOG_COLUMNS])
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = (last.timestamp, last.id)
+    return LogPage(frame, next_cursor)
+
+
+def format_log_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Display formatting done per column (vectorized), not per row."""
+    return pd.DataFrame({
+        "ID": frame["id"],
+        "Timestamp": pd.to_datetime(frame["timestamp"]).dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "Type": frame["transaction_type"],
+        "Amount": frame["amount"].astype(float).map("{:,.2f}".format),
+        "Risk Score": frame["risk_score"].astype(float).round(4),  # Empty pages come back as object dtype
+        "Predicted": np.where(frame["predicted_class"] == 1, "FRAUD", "SAFE"),
+        "Model Version": frame["model_version"],
+    })
@@ -0,0 +1,203 @@
+# database/log_writer.py
+"""Write-behind logging for PredictionLog rows.
+
+Scoring paths call `get_log_writer().submit(row)` which only enqueues the row;
+a background thread bulk-inserts queued rows when `batch_size` rows are
+waiting or `flush_interval` seconds have passed, so SQLite's commit/fsync is
+never part of the scoring latency. The queue is bounded: when it is full new
+rows are dropped (and counted) rather than blocking the caller. After each
+flush the hourly KPI rollups are brought up to date (database/rollups.py).
+
+The same writer serves other append-only tables (e.g. shadow_scores) via the
+`table` and `after_flush` arguments.
+
+`prediction_log_row()` / `prediction_log_rows()` build PredictionLog rows (the full raw transaction,
+the velocity count the model saw and the score) for every scoring path.
+"""
+
+import atexit
+import datetime
+import queue
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import insert
+
+from .database_connector import SessionLocal
+from .models import PredictionLog
+from .rollups import refresh_rollups
+from .schema import ensure_schema
+
+
+# --- CONFIGURATION ---
+DEFAULT_MAX_QUEUE = 10_000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.5  # Seconds
+
+_STOP = object()
+
+# Raw transaction field (PaySim name) -> prediction_logs column
+LOGGED_INPUT_COLUMNS = {
+    "type": "transaction_type", "amount": "amount", "oldbalanceOrg": "oldbalanceOrg",
+    "newbalanceOrig": "newbalanceOrig", "oldbalanceDest": "oldbalanceDest", "newbalanceDest": "newbalanceDest",
+    "step": "step", "nameOrig": "nameOrig", "nameDest": "nameDest", "Orig_Count_1step": "Orig_Count_1step",
+}
+
+
+def prediction_log_row(record, risk_score: float, predicted_class: int, model_version: str | None) -> dict:
+    """One PredictionLog row for a single scored raw transaction (dict)."""
+    row = {column: record.get(field) for field, column in LOGGED_INPUT_COLUMNS.items()}
+    row.update(risk_score=float(risk_score), predicted_class=int(predicted_class), model_version=model_version)
+    return row
+
+
+def prediction_log_rows(frame, risk_scores, predicted_classes, model_version: str | None,
+                        timestamp: datetime.datetime | None = None) -> list[dict]:
+    """PredictionLog rows for scored transactions, built column-wise from a raw/engineered DataFrame.
+
+    Fields missing from `frame` are logged as NULL. Without `timestamp`, the writer
+    stamps each row when it is submitted.
+    """
+    columns = {column: frame[field].tolist() if field in frame.columns else [None] * len(frame)
+               for field, column in LOGGED_INPUT_COLUMNS.items()}
+    columns["risk_score"] = np.asarray(risk_scores, dtype=np.float64).tolist()
+    columns["predicted_class"] = np.asarray(predicted_classes, dtype=np.int64).tolist()
+    columns["model_version"] = [model_version] * len(frame)
+    if timestamp is not None:
+        columns["timestamp"] = [timestamp] * len(frame)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+class PredictionLogWriter:
+    """Background thread that drains a bounded queue into bulk INSERTs."""
+
+    def __init__(self, session_factory=SessionLocal, max_queue: int = DEFAULT_MAX_QUEUE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 table=PredictionLog, after_flush=refresh_rollups):
+        self.session_factory = session_factory
+        self.table = table
+        self.after_flush = after_flush  # Called with the session after each insert, in its own transaction
+        ensure_schema(session_factory.kw["bind"])
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._counters = {"submitted": 0, "flushed": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._last_flush_seconds = 0.0
+        self._closed = False
+        self._closing_lock = threading.Lock()  # Orders every accepted row before _STOP
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: dict) -> bool:
+        """Queues one PredictionLog row (column -> value). Never blocks; False if dropped."""
+        row = {"timestamp": datetime.datetime.utcnow(), **row}  # Scoring time, not flush time; caller's dict untouched
+        try:
+            with self._closing_lock:
+                if self._closed:
+                    raise queue.Full
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("submitted")
+        return True
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._stats_lock:
+            self._counters[counter] += amount
+
+    # --- Background thread ---
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list[dict]):
+        started = time.perf_counter()
+        with self.session_factory() as db: # Session context manager closes it on every path
+            try:
+                db.execute(insert(self.table), batch)
+                db.commit()
+                self._count("flushed", len(batch))
+                self._count("batches")
+            except Exception as e:
+                db.rollback()
+                self._count("failed", len(batch))
+                print(f"⚠️ {self.table.__tablename__} flush failed ({len(batch)} rows): {e}")
+                return
+
+            try:
+                # Separate transaction: a rollup failure must not lose log rows; the next
+                # refresh catches up from the high-water mark.
+                if self.after_flush is not None:
+                    self.after_flush(db)
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Rollup refresh failed: {e}")
+        with self._stats_lock:
+            self._last_flush_seconds = time.perf_counter() - started
+
+    # --- Lifecycle / observability ---
+
+    def flush(self):
+        """Blocks until everything queued so far has been written (or failed)."""
+        self._queue.join()
+
+    def close(self, timeout: float | None = 10.0):
+        """Stops accepting rows, drains the queue and stops the thread."""
+        with self._closing_lock:
+            if self._closed:
+                return
+            self._closed = True
+        # No submit can enqueue once _closed is set, so _STOP is the last item. It is put
+        # outside the lock so a full queue delays only close(), never a submit.
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._counters, queued=self._queue.qsize(),
+                        last_flush_seconds=self._last_flush_seconds)
+
+
+# --- PROCESS-WIDE WRITER ---
+_shared_writer: PredictionLogWriter | None = None
+_shared_lock = threading.Lock()
+
+
+def get_log_writer() -> PredictionLogWriter:
+    """Returns the process-wide writer, draining it cleanly at interpreter exit."""
+    global _shared_writer
+    with _shared_lock:
+        if _shared_writer is None:
+            _shared_writer = PredictionLogWriter()
+            atexit.register(_shared_writer.close)
+        return _shared_writer
@@ -1,5 +1,5 @@
 # database/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Float, Boolean, Index
 from sqlalchemy.sql import func
 # Note: The relative import below requires the __init__.py file to work correctly
 from .database_connector import Base 
@@ -23,16 +23,97 @@ class PredictionLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     
-    # Raw Transaction Inputs
+    # Raw Transaction Inputs (the full PaySim row, so logged predictions can be rescored)
     transaction_type = Column(String)
     amount = Column(Float)
     oldbalanceOrg = Column(Float)
     newbalanceOrig = Column(Float)
+    oldbalanceDest = Column(Float)
+    newbalanceDest = Column(Float)
+    step = Column(Integer)
+    nameOrig = Column(String)
+    nameDest = Column(String)
+    Orig_Count_1step = Column(Integer)  # Velocity feature as the model saw it (not derivable from one row)
     
     # Model Output
     risk_score = Column(Float)
     predicted_class = Column(Integer)
     
     # MLOps Context
-    model_version = Column(String, default="1.0_Stacking_Ensemble")
-    timestamp = Column(DateTime, default=func.now())
\ No newline at end of file
+    model_version = Column(String, default="1.0_Stacking_Ensemble") # Fallback only; scorers pass the registry version
+    timestamp = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        # Newest-first reads (dashboard log view, time-range KPIs, keyset pagination)
+        Index("ix_prediction_logs_timestamp_id", "timestamp", "id"),
+        # Log explorer filters: equality column first, then the (timestamp, id) keyset order
+        Index("ix_prediction_logs_type_timestamp_id", "transaction_type", "timestamp", "id"),
+        Index("ix_prediction_logs_class_timestamp_id", "predicted_class", "timestamp", "id"),
+    )
+
+# --- 3. Hourly Rollups (Incremental KPI Aggregates) ---
+class PredictionRollupHourly(Base):
+    """Per-hour, per-transaction-type aggregates of prediction_logs, updated as rows land."""
+    __tablename__ = "prediction_rollups_hourly"
+
+    hour_bucket = Column(DateTime, primary_key=True)
+    transaction_type = Column(String, primary_key=True)
+    prediction_count = Column(Integer, nullable=False, default=0)
+    fraud_count = Column(Integer, nullable=False, default=0)
+    risk_score_sum = Column(Float, nullable=False, default=0.0)
+
+# --- 4. Rollup Bookkeeping ---
+class RollupState(Base):
+    """High-water mark (last prediction_logs.id folded into the rollups) per rollup."""
+    __tablename__ = "rollup_state"
+
+    name = Column(String, primary_key=True)
+    last_log_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+# --- 5. Shadow (Champion vs. Challenger) Scores ---
+class ShadowScore(Base):
+    """A challenger model's score for a live prediction, stored next to the champion's."""
+    __tablename__ = "shadow_scores"
+
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    transaction_type = Column(String)
+
+    champion_version = Column(String)
+    champion_score = Column(Float)
+    champion_class = Column(Integer)
+    champion_latency_ms = Column(Float)   # Whole scoring call (per batch) on the request path
+
+    challenger_version = Column(String)
+    challenger_score = Column(Float)
+    challenger_class = Column(Integer)
+    challenger_latency_ms = Column(Float) # predict_proba for the same batch, off the request path
+
+    batch_size = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_shadow_scores_timestamp_id", "timestamp", "id"),
+    )
+
+# --- 6. Stream Worker Checkpoints ---
+class StreamCheckpoint(Base):
+    """How far the stream worker has read a JSONL stream; committed with that batch's log rows."""
+    __tablename__ = "stream_checkpoints"
+
+    stream_name = Column(String, primary_key=True)
+    source_path = Column(String)
+    byte_offset = Column(BigInteger, nullable=False, default=0)  # Start of the first unscored line
+    line_number = Column(BigInteger, nullable=False, default=0)  # Lines consumed (scored or rejected)
+    rows_scored = Column(BigInteger, nullable=False, default=0)
+    rows_rejected = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# --- 7. Drift Monitor Sketches ---
+class DriftSketch(Base):
+    """Latest constant-size drift sketches (JSON) of one serving process; see app_modules/drift_monitor.py."""
+    __tablename__ = "drift_sketches"
+
+    source = Column(String, primary_key=True)  # e.g. "streamlit", "scoring_service", "stream:<name>"
+    row_count = Column(BigInteger, nullable=False, default=0)
+    state = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
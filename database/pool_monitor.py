@@ -0,0 +1,120 @@
+# database/pool_monitor.py
+"""Connection-pool and session instrumentation.
+
+`PoolMonitor` hooks the engine's pool events to count checkouts and measure
+how long each connection is held, and tracks sessions opened through
+`session_scope()` with the file:line that opened them. Anything held longer
+than `leak_after_seconds` is reported by `stats()` as a suspected leak, and a
+session that outlived the threshold logs a warning when it finally closes.
+"""
+
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import event
+
+
+# --- CONFIGURATION ---
+LEAK_AFTER_ENV_VAR = "FRAUDPULSE_DB_LEAK_SECONDS"
+DEFAULT_LEAK_AFTER_SECONDS = 30.0
+
+
+def _caller(depth: int) -> str:
+    """file:line of the frame `depth` levels above the caller (cheap, no full traceback)."""
+    try:
+        frame = sys._getframe(depth + 1)
+    except ValueError:
+        return "<unknown>"
+    return f"{os.path.relpath(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+class PoolMonitor:
+    """Checkout counters, held-time statistics and leak detection for one engine."""
+
+    def __init__(self, engine, leak_after_seconds: float | None = None):
+        self.leak_after_seconds = float(leak_after_seconds if leak_after_seconds is not None
+                                        else os.environ.get(LEAK_AFTER_ENV_VAR, DEFAULT_LEAK_AFTER_SECONDS))
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._checkins = 0
+        self._peak_checked_out = 0
+        self._held_total = 0.0
+        self._held_max = 0.0
+        self._checked_out: dict[int, float] = {}      # id(connection record) -> checkout time
+        self._sessions: dict[int, tuple[float, str]] = {}  # id(session) -> (opened at, origin)
+        self._sessions_opened = 0
+        self._session_held_total = 0.0
+        self._session_held_max = 0.0
+        self._slow_sessions = 0
+
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    # --- Pool events ---
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._checkouts += 1
+            self._checked_out[id(connection_record)] = time.monotonic()
+            self._peak_checked_out = max(self._peak_checked_out, len(self._checked_out))
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            started = self._checked_out.pop(id(connection_record), None)
+            if started is None:
+                return
+            held = time.monotonic() - started
+            self._checkins += 1
+            self._held_total += held
+            self._held_max = max(self._held_max, held)
+
+    # --- Sessions (called by session_scope) ---
+
+    def session_opened(self, session, origin: str):
+        with self._lock:
+            self._sessions_opened += 1
+            self._sessions[id(session)] = (time.monotonic(), origin)
+
+    def session_closed(self, session):
+        with self._lock:
+            opened, origin = self._sessions.pop(id(session), (None, None))
+            if opened is None:
+                return
+            held = time.monotonic() - opened
+            self._session_held_total += held
+            self._session_held_max = max(self._session_held_max, held)
+            slow = held > self.leak_after_seconds
+            self._slow_sessions += slow
+        if slow:
+            print(f"⚠️ Database session opened at {origin} was held for {held:.1f}s "
+                  f"(threshold {self.leak_after_seconds:.0f}s)")
+
+    # --- Reporting ---
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            closed_sessions = self._sessions_opened - len(self._sessions)
+            return {
+                "checkouts": self._checkouts,
+                "checked_out": len(self._checked_out),
+                "peak_checked_out": self._peak_checked_out,
+                "mean_connection_held_ms": 1000.0 * self._held_total / self._checkins if self._checkins else 0.0,
+                "max_connection_held_ms": 1000.0 * self._held_max,
+                "sessions_opened": self._sessions_opened,
+                "sessions_open": len(self._sessions),
+                "mean_session_held_ms": 1000.0 * self._session_held_total / closed_sessions if closed_sessions else 0.0,
+                "max_session_held_ms": 1000.0 * self._session_held_max,
+                "slow_sessions": self._slow_sessions,
+                "suspected_leaks": {
+                    "sessions": [
+                        {"origin": origin, "held_seconds": round(now - opened, 1)}
+                        for opened, origin in self._sessions.values()
+                        if now - opened > self.leak_after_seconds
+                    ],
+                    # Connections checked out by code that bypasses session_scope (no origin available)
+                    "connections": sum(now - started > self.leak_after_seconds for started in self._checked_out.values()),
+                },
+            }
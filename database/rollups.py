@@ -0,0 +1,193 @@
+# database/rollups.py
+"""Incremental hourly rollups over prediction_logs and the KPI reads built on them.
+
+`refresh_rollups(db)` folds every prediction_logs row above the stored
+high-water mark into prediction_rollups_hourly (one upsert per hour/type
+group), so dashboard KPIs are read from a table whose size depends on the
+number of hours, not the number of predictions. The high-water mark doubles as
+the cache key for dashboard reads.
+
+On SQLite (one writer at a time) ids become visible in order, so the id mark is
+exact. On PostgreSQL a lower id can commit after a higher one has been folded
+in, so there the hours from RESCAN_WINDOW ago onwards are recomputed from
+prediction_logs on every refresh instead of being added to incrementally; only
+older rows are folded by id. A row is missed only if it commits more than
+RESCAN_WINDOW after its timestamp.
+
+Configuration (environment):
+    FRAUDPULSE_ROLLUP_RESCAN_MINUTES   PostgreSQL re-scan window (default 15)
+"""
+
+import datetime
+import os
+
+import pandas as pd
+from sqlalchemy import delete, func, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from .models import PredictionLog, PredictionRollupHourly, RollupState
+
+
+ROLLUP_NAME = "prediction_logs_hourly"
+UNKNOWN_TYPE = "UNKNOWN"
+RESCAN_WINDOW = datetime.timedelta(minutes=float(os.environ.get("FRAUDPULSE_ROLLUP_RESCAN_MINUTES", 15)))
+
+_AGGREGATES = ("prediction_count", "fraud_count", "risk_score_sum")
+
+
+# --- DIALECT HELPERS ---
+
+def _dialect_insert(db: Session):
+    """INSERT construct supporting ON CONFLICT for the bound dialect (SQLite or PostgreSQL)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Rollup upserts are not implemented for dialect '{dialect}'")
+    return insert
+
+
+def hour_bucket(column, dialect: str):
+    """SQL expression truncating a timestamp column to the hour."""
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    # A literal, not a bound parameter: with server-side binding the SELECT and GROUP BY
+    # copies would get different placeholders and no longer match
+    return func.date_trunc(literal_column("'hour'"), column)
+
+
+def _as_datetime(value) -> datetime.datetime:
+    return value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(str(value))
+
+
+def rescan_start(db: Session, now: datetime.datetime | None = None) -> datetime.datetime | None:
+    """Start of the hours recomputed on every refresh (None where ids commit in order)."""
+    if db.get_bind().dialect.name == "sqlite":
+        return None
+    start = (now or datetime.datetime.utcnow()) - RESCAN_WINDOW
+    return start.replace(minute=0, second=0, microsecond=0)
+
+
+# --- INCREMENTAL REFRESH ---
+
+def get_high_water_mark(db: Session) -> int:
+    """Last prediction_logs.id reflected in the rollups (0 before the first refresh)."""
+    return db.scalar(select(RollupState.last_log_id).where(RollupState.name == ROLLUP_NAME)) or 0
+
+
+def _hourly_groups(db: Session, *conditions) -> list[dict]:
+    """Rollup rows (one per hour and type) aggregated from the prediction_logs rows matching `conditions`."""
+    bucket = hour_bucket(PredictionLog.timestamp, db.get_bind().dialect.name).label("hour_bucket")
+    transaction_type = func.coalesce(PredictionLog.transaction_type, UNKNOWN_TYPE).label("transaction_type")
+    groups = db.execute(
+        select(
+            bucket,
+            transaction_type,
+            func.count().label("prediction_count"),
+            func.coalesce(func.sum(PredictionLog.predicted_class), 0).label("fraud_count"),
+            func.coalesce(func.sum(PredictionLog.risk_score), 0.0).label("risk_score_sum"),
+        )
+        .where(PredictionLog.timestamp.is_not(None), *conditions)
+        .group_by(bucket, transaction_type)
+    ).all()
+    return [{
+        "hour_bucket": _as_datetime(group.hour_bucket),
+        "transaction_type": group.transaction_type,
+        "prediction_count": int(group.prediction_count),
+        "fraud_count": int(group.fraud_count),
+        "risk_score_sum": float(group.risk_score_sum),
+    } for group in groups]
+
+
+def _upsert(db: Session, insert, rows: list[dict], replace: bool):
+    """Adds `rows` to (or, with `replace`, overwrites) the matching rollup rows."""
+    if not rows:
+        return
+    table = PredictionRollupHourly.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["hour_bucket", "transaction_type"],
+        set_={name: stmt.excluded[name] if replace else table.c[name] + stmt.excluded[name] for name in _AGGREGATES},
+    )
+    db.execute(stmt, rows)
+
+
+def recompute_hours(db: Session, start: datetime.datetime, insert=None):
+    """Rebuilds every rollup row from the hour `start` onwards from prediction_logs."""
+    insert = insert or _dialect_insert(db)
+    db.execute(delete(PredictionRollupHourly).where(PredictionRollupHourly.hour_bucket >= start))
+    _upsert(db, insert, _hourly_groups(db, PredictionLog.timestamp >= start), replace=True)
+
+
+def refresh_rollups(db: Session, now: datetime.datetime | None = None) -> int:
+    """Folds new prediction_logs rows into the hourly rollups; returns how many were added.
+
+    Does not commit. The high-water mark is advanced with a compare-and-set
+    UPDATE, so two concurrent refreshers can never count the same rows twice.
+    """
+    insert = _dialect_insert(db)
+    db.execute(insert(RollupState).values(name=ROLLUP_NAME, last_log_id=0)
+               .on_conflict_do_nothing(index_elements=["name"]))
+
+    rescan_from = rescan_start(db, now)
+    previous_mark = get_high_water_mark(db)
+    new_mark = db.scalar(select(func.max(PredictionLog.id)).where(PredictionLog.id > previous_mark))
+    added = 0
+    if new_mark is not None:
+        claimed = db.execute(
+            update(RollupState)
+            .where(RollupState.name == ROLLUP_NAME, RollupState.last_log_id == previous_mark)
+            .values(last_log_id=new_mark, updated_at=datetime.datetime.utcnow())
+        ).rowcount
+        if not claimed:
+            return 0  # Another refresher advanced the mark first
+
+        new_rows = (PredictionLog.id > previous_mark, PredictionLog.id <= new_mark)
+        if rescan_from is not None:  # Recent hours are recomputed below; count their new rows
+            added = db.scalar(select(func.count()).select_from(PredictionLog)
+                              .where(*new_rows, PredictionLog.timestamp >= rescan_from))
+            new_rows += (PredictionLog.timestamp < rescan_from,)
+        groups = _hourly_groups(db, *new_rows)
+        _upsert(db, insert, groups, replace=False)
+        added += sum(group["prediction_count"] for group in groups)
+
+    if rescan_from is not None:
+        recompute_hours(db, rescan_from, insert)
+    return added
+
+
+# --- KPI READS (all served from the rollup table) ---
+
+def get_kpi_summary(db: Session, since: datetime.datetime | None = None) -> dict:
+    query = select(
+        func.coalesce(func.sum(PredictionRollupHourly.prediction_count), 0),
+        func.coalesce(func.sum(PredictionRollupHourly.fraud_count), 0),
+        func.coalesce(func.sum(PredictionRollupHourly.risk_score_sum), 0.0),
+    )
+    if since is not None:
+        query = query.where(PredictionRollupHourly.hour_bucket >= since)
+    total, frauds, risk_sum = db.execute(query).one()
+    return {
+        "predictions": int(total),
+        "fraud_flags": int(frauds),
+        "fraud_rate": frauds / total if total else 0.0,
+        "mean_risk_score": risk_sum / total if total else 0.0,
+    }
+
+
+def get_type_breakdown(db: Session) -> pd.DataFrame:
+    """Per-transaction-type counts, fraud-flag rate and mean risk score."""
+    rows = db.execute(
+        select(
+            PredictionRollupHourly.transaction_type,
+            func.sum(PredictionRollupHourly.prediction_count),
+            func.sum(PredictionRollupHourly.fraud_count),
+            func.sum(PredictionRollupHourly.risk_score_sum),
+        ).group_by(PredictionRollupHourly.transaction_type)
+    ).all()
+    frame = pd.DataFrame(rows, columns=["Transaction Type", "Predictions", "Fraud Flags", "Risk Sum"])
+    frame["Fraud Flag Rate"] = frame["Fraud Flags"] / frame["Predictions"]
+    frame["Mean Risk Score"] = frame["Risk Sum"] / frame["Predictions"]
+    return frame.drop(columns="Risk Sum").sort_values("Predictions", ascending=False)
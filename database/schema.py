@@ -0,0 +1,44 @@
+# database/schema.py
+"""Idempotent schema setup shared by database_init.py and the running app.
+
+`Base.metadata.create_all` only creates missing tables; indexes added to an
+existing table (e.g. new composite indexes on prediction_logs) are created
+here with checkfirst so older database files pick them up on startup. Columns
+added to an existing table (e.g. the full feature row on prediction_logs) are
+added with ALTER TABLE ... ADD COLUMN; they must be nullable, and older rows
+read them as NULL.
+"""
+
+from sqlalchemy import inspect, text
+
+from .database_connector import Base, engine
+from . import models  # noqa: F401  (registers every table on Base.metadata)
+
+_ensured_engines: set[int] = set()
+
+
+def _add_missing_columns(bind):
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        preparer = bind.dialect.identifier_preparer
+        with bind.begin() as connection:
+            for column in missing:
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} "
+                                        f"ADD COLUMN {preparer.format_column(column)} {column_type}"))
+
+
+def ensure_schema(bind=engine):
+    """Creates any missing tables, columns and indexes; cheap no-op after the first call per engine."""
+    if id(bind) in _ensured_engines:
+        return
+    Base.metadata.create_all(bind=bind)
+    _add_missing_columns(bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    _ensured_engines.add(id(bind))
@@ -0,0 +1,105 @@
+# database/timeseries.py
+"""Bucketed prediction time series aggregated in SQL and capped for charting.
+
+`get_time_series(db, start, end)` picks the finest bucket from BUCKET_LADDER
+that keeps the range within `max_points` buckets and lets the database do the
+GROUP BY, so a chart receives at most `max_points` rows however many
+predictions the range holds:
+    * buckets of whole hours are summed from prediction_rollups_hourly (a few
+      rows per hour, and it still covers rows archived out of prediction_logs)
+    * finer buckets group prediction_logs over its (timestamp, id) index
+Buckets without predictions are not returned. Times are naive UTC, like the logs.
+"""
+
+import datetime
+from dataclasses import dataclass
+
+import pandas as pd
+from sqlalchemy import BigInteger, cast, extract, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from .models import PredictionLog, PredictionRollupHourly
+
+
+# --- CONFIGURATION ---
+DEFAULT_MAX_POINTS = 500
+BUCKET_LADDER = [  # (label, seconds), finest first
+    ("1 minute", 60), ("5 minutes", 300), ("15 minutes", 900),
+    ("1 hour", 3600), ("6 hours", 6 * 3600), ("1 day", 86400), ("7 days", 7 * 86400),
+]
+SERIES_COLUMNS = ["Bucket", "Predictions", "Fraud Flags", "Fraud Flag Rate", "Mean Risk Score"]
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class TimeSeries:
+    frame: pd.DataFrame     # SERIES_COLUMNS, one row per non-empty bucket, oldest first
+    bucket_label: str
+    bucket_seconds: int
+    source: str             # "rollups" or "prediction_logs"
+
+
+def choose_bucket(start: datetime.datetime, end: datetime.datetime,
+                  max_points: int = DEFAULT_MAX_POINTS) -> tuple[str, int]:
+    """Finest (label, seconds) bucket that splits [start, end) into at most `max_points` buckets."""
+    # An unaligned range touches at most floor(span / seconds) + 1 buckets
+    span = max((end - start).total_seconds(), 1.0)
+    for label, seconds in BUCKET_LADDER:
+        if span // seconds + 1 <= max_points:
+            return label, seconds
+    days = int(-(-span // (86400 * (max_points - 1))))  # Longer than the ladder: whole days, rounded up
+    return f"{days} days", days * 86400
+
+
+def align(moment: datetime.datetime, seconds: int) -> datetime.datetime:
+    """Start of the bucket containing `moment` (buckets are aligned to the Unix epoch)."""
+    offset = int((moment - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + datetime.timedelta(seconds=offset)
+
+
+def epoch_bucket(column, seconds: int, dialect: str):
+    """SQL expression: Unix time of the start of the `seconds`-wide bucket containing `column`."""
+    if dialect == "sqlite":
+        epoch = cast(func.strftime("%s", column), BigInteger)
+    else:
+        epoch = cast(func.floor(extract("epoch", column)), BigInteger)
+    # Inlined, not bound: the GROUP BY must repeat the SELECT expression exactly, and with
+    # server-side binding (e.g. psycopg 3) each copy of a parameter gets its own placeholder
+    width = literal_column(str(int(seconds)))
+    return epoch // width * width
+
+
+def _to_frame(rows) -> pd.DataFrame:
+    frame = pd.DataFrame(rows, columns=["Bucket", "Predictions", "Fraud Flags", "Risk Sum"])
+    frame["Bucket"] = pd.to_datetime(frame["Bucket"].astype("int64"), unit="s")
+    frame["Predictions"] = frame["Predictions"].astype("int64")
+    frame["Fraud Flags"] = frame["Fraud Flags"].astype("int64")
+    frame["Fraud Flag Rate"] = frame["Fraud Flags"] / frame["Predictions"]
+    frame["Mean Risk Score"] = frame["Risk Sum"].astype(float) / frame["Predictions"]
+    return frame[SERIES_COLUMNS]
+
+
+def get_time_series(db: Session, start: datetime.datetime, end: datetime.datetime,
+                    transaction_types: tuple[str, ...] | None = None,
+                    max_points: int = DEFAULT_MAX_POINTS) -> TimeSeries:
+    """Per-bucket prediction counts, fraud-flag rate and mean risk score for [start, end)."""
+    label, seconds = choose_bucket(start, end, max_points)
+    start = align(start, seconds)
+    dialect = db.get_bind().dialect.name
+
+    if seconds % 3600 == 0:
+        source, table = "rollups", PredictionRollupHourly
+        timestamp, count, flags, risk = (table.hour_bucket, func.sum(table.prediction_count),
+                                         func.sum(table.fraud_count), func.sum(table.risk_score_sum))
+    else:
+        source, table = "prediction_logs", PredictionLog
+        timestamp, count, flags, risk = (table.timestamp, func.count(),
+                                         func.coalesce(func.sum(table.predicted_class), 0),
+                                         func.coalesce(func.sum(table.risk_score), 0.0))
+    bucket = epoch_bucket(timestamp, seconds, dialect).label("bucket")
+    query = select(bucket, count, flags, risk).where(timestamp >= start, timestamp < end)
+    if transaction_types is not None:
+        query = query.where(table.transaction_type.in_(transaction_types))
+    rows = db.execute(query.group_by(bucket).order_by(bucket)).all()
+    return TimeSeries(_to_frame(rows), label, seconds, source)
@@ -1,38 +1,34 @@
 # database_init.py
 
-from database.database_connector import Base, engine, SessionLocal
+from database.database_connector import engine, session_scope
 from database.models import Employee # Imports the Employee table definition
-from bcrypt import hashpw, gensalt 
-from sqlalchemy.orm import Session
+from database.schema import ensure_schema
+from database.auth_manager import get_password_hash
 
-# --- 1. Create all tables defined in models.py ---
-# This looks at the database connection and creates all tables defined using Base.
-Base.metadata.create_all(bind=engine)
-print("✅ Database tables (employees, prediction_logs) created successfully.")
+# --- 1. Create all tables (and any indexes missing from older database files) ---
+ensure_schema(engine)
+print("✅ Database tables (employees, prediction_logs, rollups) and indexes created successfully.")
 
 # --- 2. Add a Test Employee for Login ---
-db = SessionLocal()
 try:
-    # Hash a default password securely for storage
-    password_to_hash = "admin123"
-    hashed_password = hashpw(password_to_hash.encode('utf-8'), gensalt()).decode('utf-8')
+    with session_scope() as db:
+        # Hash a default password securely for storage
+        password_to_hash = "admin123"
+        hashed_password = get_password_hash(password_to_hash) # Uses FRAUDPULSE_BCRYPT_ROUNDS
 
-    # Check if a default user already exists
-    if db.query(Employee).filter(Employee.username == "admin").first() is None:
+        # Check if a default user already exists
+        if db.query(Employee).filter(Employee.username == "admin").first() is None:
         
-        # Create a new employee record
-        default_user = Employee(
-            username="admin", 
-            hashed_password=hashed_password,
-            is_admin=True
-        )
-        db.add(default_user)
-        db.commit()
-        print(f"✅ Default admin user created. Username: admin. Password: {password_to_hash} (hashed and stored).")
-    else:
-        print("ℹ️ Default admin user already exists.")
+            # Create a new employee record
+            default_user = Employee(
+                username="admin", 
+                hashed_password=hashed_password,
+                is_admin=True
+            )
+            db.add(default_user)
+            db.commit()
+            print(f"✅ Default admin user created. Username: admin. Password: {password_to_hash} (hashed and stored).")
+        else:
+            print("ℹ️ Default admin user already exists.")
 except Exception as e:
-    db.rollback()
-    print(f"❌ Error setting up default user: {e}")
-finally:
-    db.close()
\ No newline at end of file
+    print(f"❌ Error setting up default user: {e}") # session_scope already rolled back
\ No newline at end of file
@@ -0,0 +1,54 @@
+# tests/test_log_writer.py
+"""Write-behind PredictionLog writer: submissions and shutdown."""
+
+import os
+import sys
+import threading
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.log_writer import PredictionLogWriter
+from database.models import PredictionLog
+
+
+def make_writer(tmp_path, **kwargs):
+    session_factory = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'logs.db'}"))
+    return PredictionLogWriter(session_factory, after_flush=None, **kwargs), session_factory
+
+
+def logged_rows(session_factory) -> int:
+    with session_factory() as db:
+        return db.scalar(select(func.count()).select_from(PredictionLog))
+
+
+def test_submit_does_not_mutate_the_callers_row(tmp_path):
+    writer, session_factory = make_writer(tmp_path)
+    row = {"transaction_type": "TRANSFER", "risk_score": 0.5, "predicted_class": 0}
+    assert writer.submit(row)
+    writer.close()
+    assert "timestamp" not in row
+    assert logged_rows(session_factory) == 1
+
+
+def test_submissions_racing_close_are_written_or_rejected(tmp_path):
+    writer, session_factory = make_writer(tmp_path, flush_interval=0.01)
+    accepted = []
+
+    def submit_many():
+        accepted.extend(writer.submit({"transaction_type": "CASH_OUT", "risk_score": 0.1, "predicted_class": 0})
+                        for _ in range(200))
+
+    threads = [threading.Thread(target=submit_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    writer.close()
+    for thread in threads:
+        thread.join()
+
+    # A row queued behind the stop marker would stay unfinished (and make flush() block forever)
+    assert writer._queue.unfinished_tasks == 0
+    assert logged_rows(session_factory) == sum(accepted)
+    assert not writer.submit({"transaction_type": "CASH_OUT", "risk_score": 0.1, "predicted_class": 0})
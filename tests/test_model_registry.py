@@ -0,0 +1,37 @@
+# tests/test_model_registry.py
+"""Registry listing and version validation."""
+
+import json
+import os
+import sys
+from dataclasses import asdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_modules.model_registry import MANIFEST_FILE, ModelManifest, ModelRegistry, RegistryError
+
+
+def write_manifest(directory, version):
+    os.makedirs(directory)
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(asdict(ModelManifest(version=version, sha256="0" * 64, created_at="2026-10-17T00:00:00")), f)
+
+
+def test_versions_skips_staging_directories(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    write_manifest(tmp_path / "v1", "v1")
+    # Left behind by a registration that is in flight, or that crashed before its rename
+    write_manifest(tmp_path / ".staging-abc123", "v2")
+
+    assert [manifest.version for manifest in registry.versions()] == ["v1"]
+
+
+@pytest.mark.parametrize("version", ["../x", "a/b", ".staging-x", "a..b"])
+def test_register_rejects_unsafe_versions(tmp_path, version):
+    artifact = tmp_path / "pipeline.pkl"
+    artifact.write_bytes(b"not loaded")
+    with pytest.raises(RegistryError):
+        ModelRegistry(str(tmp_path / "registry")).register(str(artifact), version=version)
+    assert not (tmp_path / "x").exists()
@@ -0,0 +1,58 @@
+# tests/test_rollups.py
+"""Hourly rollups: incremental folding by id, and the re-scan that catches out-of-order commits."""
+
+import datetime
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import rollups
+from database.models import PredictionLog
+from database.rollups import get_kpi_summary, refresh_rollups
+from database.schema import ensure_schema
+
+NOW = datetime.datetime(2026, 10, 17, 12, 30)
+
+
+@pytest.fixture
+def db():
+    bind = create_engine("sqlite://")
+    ensure_schema(bind)
+    with Session(bind) as session:
+        yield session
+
+
+def log(db, log_id, minutes_ago, predicted_class=0):
+    db.execute(insert(PredictionLog).values(
+        id=log_id, transaction_type="TRANSFER", risk_score=0.5, predicted_class=predicted_class,
+        timestamp=NOW - datetime.timedelta(minutes=minutes_ago)))
+
+
+def test_incremental_refresh_counts_each_row_once(db):
+    log(db, 1, 90)
+    log(db, 2, 10, predicted_class=1)
+    assert refresh_rollups(db) == 2
+    log(db, 3, 5)
+    assert refresh_rollups(db) == 1
+    assert refresh_rollups(db) == 0
+    assert get_kpi_summary(db)["predictions"] == 3
+    assert get_kpi_summary(db)["fraud_flags"] == 1
+
+
+def test_rescan_counts_a_row_that_commits_below_the_mark(db, monkeypatch):
+    # What PostgreSQL does: the mark passes id 2 before the transaction holding it commits
+    monkeypatch.setattr(rollups, "rescan_start", lambda _db, now=None: datetime.datetime(2026, 10, 17, 12))
+    log(db, 1, 120)
+    log(db, 3, 10)
+    assert refresh_rollups(db) == 2
+    log(db, 2, 5, predicted_class=1)
+    refresh_rollups(db)
+    refresh_rollups(db)  # Recomputing the recent hours again must not double-count
+    assert get_kpi_summary(db)["predictions"] == 3
+    assert get_kpi_summary(db)["fraud_flags"] == 1
+
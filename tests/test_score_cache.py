@@ -0,0 +1,68 @@
+# tests/test_score_cache.py
+"""Repeat submissions hit the score cache and are not counted towards the sender again."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_modules.features import FEATURE_COLUMNS, NUMERIC_FEATURES
+from app_modules.score_cache import ScoreCache
+from app_modules.scoring_engine import ScoringEngine, ThresholdPolicy
+from app_modules.velocity_store import VelocityStore
+
+RECORD = {
+    "type": "TRANSFER", "amount": 9839.64, "oldbalanceOrg": 170136.0, "newbalanceOrig": 160296.36,
+    "oldbalanceDest": 0.0, "newbalanceDest": 0.0, "step": 1,
+    "nameOrig": "C1231006815", "nameDest": "C1979787155",
+}
+
+
+class CountingPipeline:
+    """Stands in for the deployment pipeline: the score grows with the velocity count."""
+
+    feature_names_in_ = FEATURE_COLUMNS
+
+    def __init__(self, supports_numeric_path: bool):
+        self.supports_numeric_path = supports_numeric_path
+        self.calls = 0
+
+    def predict_proba(self, features):
+        self.calls += 1
+        scores = 0.1 + 0.1 * features["Orig_Count_1step"].to_numpy(dtype=np.float64)
+        return np.column_stack([1 - scores, scores])
+
+    def predict_proba_numeric(self, transaction_type, numeric):
+        self.calls += 1
+        return 0.1 + 0.1 * float(numeric[NUMERIC_FEATURES.index("Orig_Count_1step")])
+
+
+@pytest.mark.parametrize("record_path", [True, False])
+def test_repeat_submission_hits(record_path):
+    pipeline, cache, store = CountingPipeline(record_path), ScoreCache(), VelocityStore()
+    engine = ScoringEngine(pipeline, ThresholdPolicy(), velocity_store=store, model_version="v1", score_cache=cache)
+
+    results = [engine.score(dict(RECORD)) for _ in range(3)]
+
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+    assert pipeline.calls == 1
+    assert store.count(RECORD["nameOrig"], RECORD["step"]) == 1
+    assert [result.risk_score for result in results] == pytest.approx([0.1] * 3)
+    assert [result.orig_count for result in results] == [0, 0, 0]
+
+
+@pytest.mark.parametrize("record_path", [True, False])
+def test_new_transaction_by_same_sender_misses(record_path):
+    pipeline, cache, store = CountingPipeline(record_path), ScoreCache(), VelocityStore()
+    engine = ScoringEngine(pipeline, ThresholdPolicy(), velocity_store=store, model_version="v1", score_cache=cache)
+
+    first = engine.score(dict(RECORD))
+    second = engine.score(dict(RECORD, amount=500.0))
+
+    assert cache.stats()["misses"] == 2
+    assert store.count(RECORD["nameOrig"], RECORD["step"]) == 2
+    assert (first.orig_count, second.orig_count) == (0, 1)
+    assert second.risk_score > first.risk_score